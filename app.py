@@ -3,16 +3,26 @@ For saving files locally, use "app.root_path"
 """
 import json
 import base64
+import hashlib
+import threading
 from io import BytesIO
 import os
 
 from flask import Flask, Response, request, render_template, redirect, session, send_file, flash
+from flask.sessions import SecureCookieSessionInterface, SessionInterface
 from dotenv import load_dotenv
 
-from interpreter.parser_.ast_objects import Error
-from utils.utils import LanguageRuntimeException, Platform, BOOMERANG_PLATFORM
-from main_utils import evaluate, visualize_ast
+from interpreter.evaluator.purity import is_deterministic
+from interpreter.parser_.ast_objects import Error, Expression
+from interpreter.version import interpreter_version
+from utils.lru_cache import LRUCache
+from utils.program_io import ProgramIO, OutputSink
+from utils.session_store import FileSessionStore, ServerSideSessionInterface, SessionStore, SQLiteSessionStore
+from utils.utils import LanguageRuntimeException, Platform
+from utils.worker_pool import WorkerError, WorkerPool, WorkerTimeoutError
+from main_utils import ASTCache, evaluate, visualize_ast
 from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.limits import ExecutionLimits
 
 
 app = Flask(__name__)
@@ -22,12 +32,83 @@ project_folder = os.path.expanduser(app.root_path)
 load_dotenv(os.path.join(project_folder, ".env"))
 app.secret_key = os.getenv("SECRET_KEY")
 
+# Seconds a session (the source code and results shown on the page) is kept after it was last saved
+SESSION_TTL = 24 * 60 * 60
+
+# Where sessions are kept: "sqlite" or "filesystem" keep them in the "SESSION_DIRECTORY" folder (the app's instance
+# folder by default) and only put a session ID in the session cookie, and "cookie" keeps them in the cookie itself,
+# which is limited to about 4 KB
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+app.config["SESSION_DIRECTORY"] = os.getenv("SESSION_DIRECTORY", app.instance_path)
+
+
+def create_session_store(backend: str, directory: str) -> SessionStore:
+    if backend == "sqlite":
+        os.makedirs(directory, exist_ok=True)
+        return SQLiteSessionStore(os.path.join(directory, "sessions.sqlite3"), SESSION_TTL)
+    elif backend == "filesystem":
+        return FileSessionStore(os.path.join(directory, "sessions"), SESSION_TTL)
+    raise ValueError(f"unsupported session backend: {backend}")
+
+
+def create_session_interface(backend: str) -> SessionInterface:
+    """The store is only created when a request first uses it, in "SESSION_DIRECTORY" as it is then."""
+    if backend == "cookie":
+        return SecureCookieSessionInterface()
+    elif backend in ("sqlite", "filesystem"):
+        return ServerSideSessionInterface(lambda: create_session_store(backend, app.config["SESSION_DIRECTORY"]))
+    raise ValueError(f"unsupported session backend: {backend}")
+
+
+app.session_interface = create_session_interface(SESSION_BACKEND)
+
 # Cookie/Session keys
 SOURCE_CODE = "source_code"
 RESULTS = "results"
 
 BOOMERANG_FILE_EXT = "bng"
 
+# Most bytes of printed output kept for a program. Output after that is replaced with a truncation marker.
+MAX_OUTPUT_BYTES = 64 * 1024
+
+# Most loop elements and function calls a program may evaluate, and most seconds it may run for, before it is stopped
+# with an error (see "ExecutionLimits")
+MAX_EVALUATION_STEPS = 10_000_000
+EVALUATION_TIMEOUT = 5.0
+
+# Most bytes a program may allocate for its values (see "ExecutionLimits")
+MAX_EVALUATION_MEMORY = 256 * 1024 * 1024
+
+# Programs run in this many worker processes (see "WorkerPool"), so a program that runs forever, or crashes the
+# interpreter, is stopped without holding up the request that started it or any other request. 0 runs programs in the
+# threads that handle the requests.
+EVALUATION_WORKERS = os.cpu_count() or 1
+
+# Seconds before a worker is killed and its program stopped, for programs that "ExecutionLimits" cannot stop in time
+# (like a single operation on a very large number), and the most bytes of output and address space each worker may use
+WORKER_TIMEOUT = 2 * EVALUATION_TIMEOUT
+MAX_WORKER_RESULT_BYTES = 4 * MAX_OUTPUT_BYTES
+MAX_WORKER_MEMORY = 4 * MAX_EVALUATION_MEMORY
+
+evaluation_pool = WorkerPool(max(EVALUATION_WORKERS, 1), WORKER_TIMEOUT, MAX_WORKER_RESULT_BYTES, MAX_WORKER_MEMORY)
+
+# Most programs, and most bytes of JSON output, kept in the result cache
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_BYTES = 16 * 1024 * 1024
+
+# JSON output of deterministic programs (see "is_deterministic"), keyed by "result_key". Requests are handled by many
+# threads, so the cache is only used while holding its lock.
+result_cache: LRUCache[str, str] = LRUCache(RESULT_CACHE_SIZE, RESULT_CACHE_BYTES, len)
+result_cache_lock = threading.Lock()
+
+# Most programs, and most bytes of ASTs, kept in the AST cache
+AST_CACHE_SIZE = 256
+AST_CACHE_BYTES = 64 * 1024 * 1024
+
+# Parsed programs, shared by "/interpret" and "/visualize" so a program that was just run can be visualized (or the
+# other way around) without parsing it again
+ast_cache = ASTCache(AST_CACHE_SIZE, AST_CACHE_BYTES)
+
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -80,14 +161,93 @@ def upload_files() -> tuple[Response | None, bytes]:
 @app.route("/interpret", methods=["POST"])
 def interpret():
     source_code = request.form["source"]
+    key = result_key(source_code)
+
+    with result_cache_lock:
+        results = result_cache.get(key)
+
+    if results is None:
+        results, is_cacheable = run_program(source_code)
+        if is_cacheable:
+            with result_cache_lock:
+                result_cache.put(key, results)
+
+    return create_response("/", source_code, results)
+
+
+def run_program(source_code: str) -> tuple[str, bool]:
+    """Evaluate a program, and return its output as JSON and whether the same source always has the same output."""
+    try:
+        ast: list[Expression] | None = ast_cache.parse(source_code)
+    except LanguageRuntimeException:
+        # Syntax errors are reported by "evaluate"
+        ast = None
+    except Exception as e:
+        return json.dumps([f"Unexpected internal error: {str(e)}"]), False
 
+    limit_values = (MAX_EVALUATION_STEPS, EVALUATION_TIMEOUT, MAX_EVALUATION_MEMORY, MAX_OUTPUT_BYTES)
+    try:
+        if EVALUATION_WORKERS == 0:
+            results, is_finished = evaluate_program(source_code, ast, *limit_values)
+        else:
+            try:
+                results, is_finished = evaluation_pool.run(evaluate_program, source_code, ast, *limit_values)
+            except RecursionError:
+                # The AST is too deep to pickle, so the worker parses the program again
+                results, is_finished = evaluation_pool.run(evaluate_program, source_code, None, *limit_values)
+
+    except WorkerTimeoutError:
+        return json.dumps([f"Error: program exceeded the time limit of {evaluation_pool.timeout:g} seconds"]), False
+    except WorkerError as e:
+        return json.dumps([f"Error: {str(e)}"]), False
+
+    return results, is_finished and (ast is None or is_deterministic(ast))
+
+
+def evaluate_program(
+        source_code: str,
+        ast: list[Expression] | None,
+        max_steps: int,
+        timeout: float,
+        max_memory: int,
+        max_output_bytes: int
+) -> tuple[str, bool]:
+    """Evaluate a program that was parsed by "run_program", in a worker or in this process, and return its output as
+    JSON and whether it finished in time. The limits are arguments, rather than read from this module, so workers
+    always use the current ones.
+    """
     try:
-        os.environ[BOOMERANG_PLATFORM] = Platform.WEB.name
-        _, output = evaluate(source_code, Environment())
+        program_io = ProgramIO(Platform.WEB.name, sink=OutputSink(max_output_bytes))
+        limits = ExecutionLimits(max_steps, timeout, max_memory)
+        _, output = evaluate(source_code, Environment(), program_io=program_io, limits=limits, ast=ast)
+
     except Exception as e:
-        output = [f"Unexpected internal error: {str(e)}"]
+        return json.dumps([f"Unexpected internal error: {str(e)}"]), False
+
+    # A program that ran out of time might finish on a less busy server
+    return json.dumps(output), not limits.is_past_deadline()
+
+
+def result_key(source_code: str) -> str:
+    """Programs with the same source have the same output, unless the interpreter changed."""
+    return hashlib.sha256(f"{interpreter_version()}\0{source_code}".encode()).hexdigest()
+
 
-    return create_response("/", source_code, json.dumps(output))
+@app.route("/stats", methods=["GET"])
+def stats():
+    with result_cache_lock:
+        result_cache_stats = {
+            "hits": result_cache.hits,
+            "misses": result_cache.misses,
+            "hit_rate": result_cache.hit_rate,
+            "entries": len(result_cache),
+            "bytes": result_cache.byte_count,
+        }
+    return {
+        "result_cache": result_cache_stats,
+        "ast_cache": ast_cache.stats(),
+        "evaluation_pool": evaluation_pool.stats(),
+    }
 
 
 @app.route("/clear", methods=["POST"])
@@ -101,7 +261,7 @@ def visualize():
     source_code = request.form["source"]
 
     try:
-        vis_data = visualize_ast(source_code)
+        vis_data = visualize_ast(source_code, ast_cache.parse(source_code))
         vis_data = base64.b64encode(vis_data)  # convert to base64 as bytes
         vis_data = vis_data.decode()  # convert bytes to string
         return render_template("visualize.html", data=vis_data)
@@ -0,0 +1,35 @@
+"""Serve the web app with an ASGI server, like uvicorn: "uvicorn asgi:app".
+
+The routes are the ones in "app.py". Connections are handled by the server's event loop, and requests are handled by
+the Flask app in threads, so connections that are idle, or waiting for a program to finish, do not hold a thread.
+Programs are evaluated and visualized in their own thread pools, so slow programs never hold up the threads that serve
+pages.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import app as app_module
+from utils.asgi import AsyncWSGIApp
+
+# Threads that serve pages, files, and everything else that does not evaluate or visualize a program
+REQUEST_THREADS = 8
+
+# Threads that send programs to the evaluation workers and wait for them. More threads than workers would only wait
+# for a worker to be idle.
+EVALUATION_THREADS = max(app_module.EVALUATION_WORKERS, 1)
+
+# Threads that render visualizations with graphviz, which runs in its own process
+RENDER_THREADS = os.cpu_count() or 1
+
+# Largest request body accepted, which is much larger than any program typed into the page
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+app = AsyncWSGIApp(
+    app_module.app,
+    ThreadPoolExecutor(REQUEST_THREADS, thread_name_prefix="request"),
+    {
+        "/interpret": ThreadPoolExecutor(EVALUATION_THREADS, thread_name_prefix="evaluate"),
+        "/visualize": ThreadPoolExecutor(RENDER_THREADS, thread_name_prefix="render"),
+    },
+    MAX_REQUEST_BYTES
+)
@@ -0,0 +1,48 @@
+"""Measure the cost of counting steps and checking the deadline (see "ExecutionLimits").
+
+Run with "python -m benchmarks.execution_limits" from the repository root. Each program is run without limits, and with
+limits high enough that it is never stopped.
+"""
+import argparse
+import statistics
+import time
+
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.limits import ExecutionLimits
+from main_utils import evaluate
+
+# A program that is mostly loop elements, and one that is mostly function calls
+PROGRAMS = {
+    "loop": "total = len <- ((for i in range <- (0, {size}): for j in range <- (0, 10): i * j + 1),);",
+    "calls": "f = func n: n + 1; g = func n: (f <- (n,)) * 2; "
+             "total = len <- ((for i in range <- (0, {size}): g <- (i,)),);",
+}
+
+
+def run(source: str, native: bool, limits: ExecutionLimits | None) -> float:
+    start = time.perf_counter()
+    results, output = evaluate(source, Environment(), native=native, limits=limits)
+    elapsed = time.perf_counter() - start
+    assert len(output) == 0, output
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Execution limits benchmark")
+    parser.add_argument("--size", help="Number of outer loop elements", type=int, default=5000)
+    parser.add_argument("--repeat", help="Number of runs of each program", type=int, default=5)
+    parser.add_argument("--native", help="Use the native evaluator", action="store_true")
+    args = parser.parse_args()
+
+    for name, template in PROGRAMS.items():
+        source = template.format(size=args.size)
+
+        without_limits: list[float] = []
+        with_limits: list[float] = []
+        for _ in range(args.repeat):
+            without_limits.append(run(source, args.native, None))
+            with_limits.append(run(source, args.native, ExecutionLimits(max_steps=10 ** 12, timeout=3600)))
+
+        baseline = statistics.median(without_limits)
+        limited = statistics.median(with_limits)
+        print(f"{name}: no limits {baseline:.3f}s, limits {limited:.3f}s (overhead {limited / baseline - 1:+.1%})")
@@ -0,0 +1,112 @@
+"""Measure the throughput and latency of the web server (see "server.py") under concurrent load.
+
+Run with "python -m benchmarks.load_test" from the repository root. A server is started for each number of workers in
+"--workers", and "--clients" threads each send requests to it over their own keep-alive connection: every request runs
+a different program, so none of them are answered from the result cache.
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+# A program that takes a few milliseconds to evaluate
+PROGRAM = "f = func n: n * {id};\ntotal = len <- ((for i in range <- (0, 200): f <- (i,)),);\nprint <- (total,);"
+
+SERVER_START_TIMEOUT = 30
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen[bytes]:
+    environment = {**os.environ, "SECRET_KEY": "load-test"}
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--workers", str(workers)],
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+
+    server.kill()
+    raise RuntimeError(f"server did not start within {SERVER_START_TIMEOUT} seconds")
+
+
+def run_client(port: int, requests: int, first_id: int) -> list[float]:
+    """Send "requests" requests, and return the number of seconds each one took."""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    latencies = []
+    for request_id in range(first_id, first_id + requests):
+        body = urllib.parse.urlencode({"source": PROGRAM.format(id=request_id)})
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+        start = time.perf_counter()
+        connection.request("POST", "/interpret", body, headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+
+        assert response.status == 302, response.status
+    connection.close()
+    return latencies
+
+
+def load_test(port: int, clients: int, requests: int, first_id: int = 0) -> tuple[float, list[float]]:
+    """Return the number of seconds all clients took, and the latency of every request. Programs are numbered from
+    "first_id", so load tests with different "first_id"s do not run the same programs.
+    """
+    barrier = threading.Barrier(clients)
+
+    def client(client_id: int) -> list[float]:
+        barrier.wait()
+        return run_client(port, requests, first_id + client_id * requests)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        results = list(executor.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    return elapsed, [latency for latencies in results for latency in latencies]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Web server load test")
+    parser.add_argument(
+        "--workers", help="Numbers of server workers to compare", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--clients", help="Number of concurrent clients", type=int, default=16)
+    parser.add_argument("--requests", help="Number of requests sent by each client", type=int, default=50)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        port = free_port()
+        server = start_server(port, workers)
+        try:
+            # Not measured: starts the evaluation workers and opens connections
+            load_test(port, args.clients, 1, -args.clients)
+
+            elapsed, latencies = load_test(port, args.clients, args.requests)
+        finally:
+            server.terminate()
+            server.wait()
+
+        p50 = statistics.median(latencies) * 1000
+        p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+        print(f"{workers} workers: {len(latencies) / elapsed:.1f} requests/s, p50 {p50:.1f}ms, p99 {p99:.1f}ms")
@@ -0,0 +1,56 @@
+"""Compare "pmap" with a for-loop over the same list.
+
+Run with "python -m benchmarks.parallel_map" from the repository root. The speedup depends on the number of cores; on a
+machine with one core, "pmap" always evaluates serially.
+"""
+import argparse
+import statistics
+import time
+
+from interpreter.evaluator import parallel
+from interpreter.evaluator.environment_ import Environment
+from main_utils import evaluate
+
+# An expensive pure function
+FUNCTION = "work = func n: len <- ((for i in range <- (0, 200) if (i * n) % 7 == 0: i),);"
+
+
+def run(source: str, native: bool) -> float:
+    start = time.perf_counter()
+    results, output = evaluate(source, Environment(), native=native)
+    elapsed = time.perf_counter() - start
+    assert len(output) == 0, output
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pmap benchmark")
+    parser.add_argument("--size", help="Number of list elements", type=int, default=5000)
+    parser.add_argument("--repeat", help="Number of runs of each program", type=int, default=3)
+    parser.add_argument("--native", help="Use the native evaluator", action="store_true")
+    parser.add_argument("--workers", help="Number of worker processes", type=int, default=parallel.MAX_WORKERS)
+    args = parser.parse_args()
+
+    parallel.MAX_WORKERS = args.workers
+
+    values = f"range <- (1, {args.size + 1})"
+    programs = {
+        "for-loop": f"{FUNCTION} for x in {values}: work <- (x,);",
+        "pmap": f"{FUNCTION} pmap <- (work, {values});",
+    }
+
+    # The pool is started before timing, like it would be by an earlier "pmap" call in a long-running program
+    parallel.get_executor()
+
+    timings: dict[str, list[float]] = {name: [] for name in programs}
+    for _ in range(args.repeat):
+        for name, source in programs.items():
+            timings[name].append(run(source, args.native))
+
+    serial = statistics.median(timings["for-loop"])
+    print(f"workers: {parallel.MAX_WORKERS}, elements: {args.size}")
+    for name, times in timings.items():
+        median = statistics.median(times)
+        print(f"{name}: {median:.3f}s (speedup {serial / median:.2f}x)")
+
+    parallel.shutdown()
@@ -1,18 +1,32 @@
-import os
 import typing
-from io import StringIO
-import sys
 import copy
 
 import interpreter.parser_.ast_objects as o
-from interpreter.parser_.builtin_ast_objects import BuiltinFunction, Input
+from interpreter.parser_.builtin_ast_objects import BuiltinFunction, Input, ParallelMapCall
 from interpreter.tokens import tokens as t
+from interpreter.tokens.token import Token
 from interpreter.evaluator.environment_ import Environment
-from utils.utils import language_error, LanguageRuntimeException, Platform, BOOMERANG_PLATFORM, incorrect_number_of_arguments
+from interpreter.evaluator.limits import ExecutionLimits
+from interpreter.evaluator.memo import FunctionMemo
+from interpreter.evaluator.memory import REFERENCE_SIZE, factorial_size, infix_size
+from interpreter.evaluator.parallel import ChunkResult, parallel_map
+from interpreter.evaluator.purity import FunctionAnalysis, analyze_expression
+from interpreter.evaluator.statement_scheduler import StatementScheduler
+from utils.persistent_map import PersistentMap
+from utils.program_io import ProgramIO
+from utils.utils import language_error, LanguageRuntimeException, Platform, incorrect_number_of_arguments
 
 
 class Evaluator:
-    def __init__(self, ast: list[o.Expression], env: typing.Optional[Environment]) -> None:
+    def __init__(
+            self,
+            ast: list[o.Expression],
+            env: typing.Optional[Environment],
+            memo: typing.Optional[FunctionMemo] = None,
+            parallel_statements: bool = False,
+            program_io: typing.Optional[ProgramIO] = None,
+            limits: typing.Optional[ExecutionLimits] = None
+    ) -> None:
         self.ast = ast
 
         # Environment needs to be optional because, when switching between scopes--such as a function call--the parent
@@ -25,7 +39,31 @@ class Evaluator:
             Platform.TEST.name: []
         }
 
-        self.output: list[str] = []
+        # Platform, input, and output of the program. Printed lines and errors are collected by its output sink (see
+        # "OutputSink"), unless "program_io" prints to a stream.
+        self.program_io = program_io if program_io is not None else ProgramIO()
+        self.output = self.program_io.output
+
+        # Results of pure function calls
+        self.memo = memo if memo is not None else FunctionMemo()
+
+        # Values of loop invariants, keyed by the IDs of their "LoopInvariant" nodes. There is one dictionary for each
+        # for-loop currently being evaluated (innermost last), so saved values only live as long as a run of the loop.
+        self.loop_invariant_values: list[dict[int, o.Expression]] = []
+
+        # Purity analyses of loop invariants, keyed by node ID. Like function analyses (see "FunctionMemo"), these are
+        # reused until a variable they depend on is bound to a different function.
+        self.loop_invariant_analyses: dict[int, FunctionAnalysis] = {}
+
+        # Values of common sub-expressions, keyed by slot (see "SavedExpression")
+        self.saved_values: dict[int, o.Expression] = {}
+
+        # Whether independent top-level assignments are evaluated in worker processes (see "StatementScheduler")
+        self.parallel_statements = parallel_statements
+
+        # Steps and time the program may take (see "ExecutionLimits"). Work is never sent to worker processes when
+        # there are limits, so every step is counted.
+        self.limits = limits
 
     @property
     def get_env(self) -> Environment:
@@ -38,9 +76,20 @@ class Evaluator:
 
     def evaluate_statements(self, statements: list[o.Expression]) -> list[o.Expression]:
         evaluated_expressions = []
+        scheduler = StatementScheduler(statements, evaluate_in_worker) \
+            if self.parallel_statements and self.limits is None else None
         try:
-            for expression in statements:
-                evaluated_expression = self.evaluate_expression(expression)
+            for index, expression in enumerate(statements):
+                evaluated_expression = None
+                if scheduler is not None:
+                    scheduler.start_ready(index, self.get_env)
+                    evaluated_expression = scheduler.take(index)
+
+                if evaluated_expression is not None:
+                    assignment = typing.cast(o.Assignment, expression)
+                    self.get_env.set_var(assignment.name, evaluated_expression)
+                else:
+                    evaluated_expression = self.evaluate_expression(expression)
                 # `copy.deepcopy` ensures each evaluated expression in `evaluated_expressions` is accurate to the state
                 # of the program during the evaluation of that particular expression.
                 evaluated_expressions.append(copy.deepcopy(evaluated_expression))
@@ -48,9 +97,13 @@ class Evaluator:
 
         except LanguageRuntimeException as e:
             error_obj = o.Error(e.line_num, str(e))
-            self.output.append(str(error_obj))
+            self.program_io.error(str(error_obj))
             return [error_obj]
 
+        finally:
+            if scheduler is not None:
+                scheduler.cancel()
+
     def evaluate_expression(self, expression: o.Expression) -> o.Expression:
 
         # Raise an error if an expression instance is not supported on the current platform
@@ -61,12 +114,25 @@ class Evaluator:
         #         f"unsupported operation for platform {self.platform}: {type(expression).__name__}"
         #     )
 
-        if isinstance(expression, o.InfixExpression):
+        if isinstance(expression, o.NumberInfixExpression):
+            # The optimizer proved both operands are numbers, so they are not type-checked
+            left = typing.cast(o.Number, self.evaluate_expression(expression.left))
+            right = typing.cast(o.Number, self.evaluate_expression(expression.right))
+            return expression.apply(left, right)
+
+        elif isinstance(expression, o.InfixExpression):
             return self.evaluate_binary_expression(expression)
 
         elif isinstance(expression, o.PrefixExpression):
             return self.evaluate_unary_expression(expression)
 
+        elif isinstance(expression, o.InlinedCall):
+            # Like a function call (see "evaluate_function_call"), it is a step, and its value is relocated to the line
+            # of the call
+            if self.limits is not None:
+                self.limits.step(expression.line_num)
+            return self.evaluate_expression(expression.body).relocate(expression.line_num)
+
         elif isinstance(expression, o.Assignment):
             return self.evaluate_assign_variable(expression)
 
@@ -98,12 +164,31 @@ class Evaluator:
                 values.append(element_value)
             return o.List(expression.line_num, values)
 
+        elif isinstance(expression, o.MapLiteral):
+            return self.evaluate_map(expression)
+
+        elif isinstance(expression, o.SetLiteral):
+            return self.evaluate_set(expression)
+
+        elif isinstance(expression, o.Constant):
+            return expression.value
+
+        elif isinstance(expression, o.LoopInvariant):
+            return self.evaluate_loop_invariant(expression)
+
+        elif isinstance(expression, o.SavedExpression):
+            saved_value = self.saved_values[expression.slot] = self.evaluate_expression(expression.expression)
+            return saved_value
+
+        elif isinstance(expression, o.SavedValue):
+            return self.saved_values[expression.slot]
+
         # Base Types
-        elif any(isinstance(expression, t) for t in [o.Number, o.String, o.Boolean, o.Error, o.Function]):
+        elif any(isinstance(expression, t) for t in [o.Number, o.String, o.Boolean, o.Error, o.Function, o.Map, o.Set]):
             return expression
 
         elif isinstance(expression, BuiltinFunction):
-            platform = os.environ[BOOMERANG_PLATFORM]
+            platform = self.program_io.platform
 
             unsupported_platform: typing.Dict[typing.Type[o.Expression], list[str]] = {
                 Input: [Platform.WEB.name]
@@ -121,12 +206,28 @@ class Evaluator:
         # when a user is using this programming language.
         raise Exception(f"Unsupported type: {type(expression).__name__}")
 
+    def evaluate_map(self, map_literal: o.MapLiteral) -> o.Map:
+        new_map = o.Map(map_literal.line_num, PersistentMap())
+        for key_expression, value_expression in map_literal.pairs:
+            key = self.evaluate_expression(key_expression)
+            value = self.evaluate_expression(value_expression)
+            new_map = new_map.set_entry(key, value)
+        return new_map
+
+    def evaluate_set(self, set_literal: o.SetLiteral) -> o.Set:
+        new_set = o.Set(set_literal.line_num, PersistentMap())
+        for value_expression in set_literal.values:
+            new_set = new_set.add_value(self.evaluate_expression(value_expression))
+        return new_set
+
     def evaluate_postfix_expression(self, postfix_expression: o.PostfixExpression) -> o.Expression:
         result = self.evaluate_expression(postfix_expression.expression)
         op = postfix_expression.operator
 
         if op.type == t.BANG:
             # Factorial
+            if self.limits is not None:
+                self.limits.allocate(postfix_expression.line_num, factorial_size(result))
             return result.fac()
         elif op.type == t.DEC:
             # Decrement
@@ -149,8 +250,7 @@ class Evaluator:
 
         # When a variable is retrieved, update the line number to reflect the current line number because the
         # variable was saved with the line number where it was defined.
-        value.line_num = identifier.line_num
-        return value
+        return value.relocate(identifier.line_num)
 
     def evaluate_unary_expression(self, unary_expression: o.PrefixExpression) -> o.Expression:
         expression_result = self.evaluate_expression(unary_expression.expression)
@@ -172,9 +272,16 @@ class Evaluator:
 
     def evaluate_binary_expression(self, binary_operation: o.InfixExpression) -> o.Expression:
         left = self.evaluate_expression(binary_operation.left)
+        op = binary_operation.operator
+
+        # "and" and "or" only evaluate their right side if the left side does not already determine the result
+        if is_short_circuit(left, op):
+            return left
 
         right = self.evaluate_expression(binary_operation.right)
-        op = binary_operation.operator
+
+        if self.limits is not None:
+            self.limits.allocate(binary_operation.line_num, infix_size(op.type, left, right))
 
         # Math operations
         if op.type == t.PLUS:
@@ -196,26 +303,11 @@ class Evaluator:
             return left.pow(right)
 
         elif op.type == t.SEND:
-            tmp_stdout = StringIO()
-
-            # Only divert standard output if the interpreter is being called from the web interface.
-            platform = os.environ[BOOMERANG_PLATFORM]
-            if platform != Platform.CMD.name:
-                sys.stdout = tmp_stdout
-
-            try:
-                result = left.ptr(right)
-                if isinstance(result, o.FunctionCall):
-                    return self.evaluate_function_call(result)
-            finally:
-                # Reset STDOUT
-                sys.stdout = sys.__stdout__
-
-            # Get value from String stream. If the interpreter is not being called from the web interface,
-            # this value will always be an empty string.
-            output_str = tmp_stdout.getvalue().strip()
-            if len(output_str) > 0:
-                self.output.append(output_str)
+            result = left.call(right, self.program_io) if isinstance(left, BuiltinFunction) else left.ptr(right)
+            if isinstance(result, o.FunctionCall):
+                return self.evaluate_function_call(result)
+            elif isinstance(result, ParallelMapCall):
+                return self.evaluate_parallel_map(result)
             return result
 
         # Comparison Operations
@@ -264,6 +356,17 @@ class Evaluator:
         if len(call_params.values) != len(function_definition.parameters):
             raise incorrect_number_of_arguments(line_num, len(function_definition.parameters), len(call_params.values))
 
+        if self.limits is not None:
+            self.limits.step(line_num)
+
+        # Pure functions always return the same value for the same arguments, so a previous result can be reused
+        # instead of evaluating the body again.
+        memo_key = self.memo.key(function_definition, call_params, self.get_env)
+        if memo_key is not None:
+            cached_value = self.memo.get(function_definition, memo_key)
+            if cached_value is not None:
+                return cached_value.relocate(line_num)
+
         self.env = Environment(parent_env=self.get_env)
 
         # Set parameters as variables in new environment
@@ -277,14 +380,28 @@ class Evaluator:
         # Reset environment back to old environment
         self.env = self.get_env.parent_env
 
-        return_value.line_num = line_num
-        return return_value
+        if memo_key is not None:
+            self.memo.put(function_definition, memo_key, return_value)
+
+        return return_value.relocate(line_num)
+
+    def evaluate_parallel_map(self, call: ParallelMapCall) -> o.List:
+        results = parallel_map(call.function, call.values.values, self.get_env, evaluate_calls) \
+            if self.limits is None else None
+        if results is None:
+            results = [self.evaluate_function_call(function_call(call.function, value)) for value in call.values.values]
+        return o.List(call.line_num, results)
 
     def evaluate_when(self, when: o.When) -> o.Expression:
 
         switch_expression = self.evaluate_expression(when.expression)
 
-        for condition, return_expr in when.case_expressions:
+        case_expressions = when.case_expressions
+        if isinstance(when, o.JumpTableWhen):
+            # Only the case found in the table needs to be compared
+            case_expressions = [case_expressions[when.lookup(switch_expression)]]
+
+        for condition, return_expr in case_expressions:
             evaluated_condition = self.evaluate_expression(condition)
 
             is_equal = evaluated_condition.eq(switch_expression)
@@ -293,8 +410,7 @@ class Evaluator:
 
             if is_equal.value:
                 result = self.evaluate_expression(return_expr)
-                result.line_num = when.line_num
-                return result
+                return result.relocate(when.line_num)
 
         # When expressions should always return something because of the "else" clause. If nothing
         # is returned, there is a bug in the code.
@@ -304,31 +420,121 @@ class Evaluator:
 
         values = self.evaluate_expression(for_loop.values)
 
+        # Maps are iterated by key, and sets by value
+        if isinstance(values, o.Map):
+            values = o.List(values.line_num, values.entries.keys())
+        elif isinstance(values, o.Set):
+            values = o.List(values.line_num, values.values)
+
         if not isinstance(values, o.List):
             raise language_error(values.line_num, f"expected List, got {type(values).__name__}")
 
         # Create new environment for for-loop expression scope
         self.env = Environment(parent_env=self.get_env)
+        self.loop_invariant_values.append({})
 
         new_values = []
-        for value in values.values:
-            self.evaluate_assign_variable(
-                o.Assignment(value.line_num, for_loop.element_identifier, value)
-            )
+        try:
+            for value in values.values:
+                if self.limits is not None:
+                    self.limits.step(for_loop.line_num)
 
-            condition_evaluated = self.evaluate_expression(for_loop.conditional_expr)
-            if not isinstance(condition_evaluated, o.Boolean):
-                raise language_error(
-                    condition_evaluated.line_num,
-                    f"invalid type for for-loop conditional expression: {type(condition_evaluated).__name__}"
+                self.evaluate_assign_variable(
+                    o.Assignment(value.line_num, for_loop.element_identifier, value)
                 )
 
-            if condition_evaluated.value:
-                new_values.append(
-                    self.evaluate_expression(for_loop.expression)
-                )
+                condition_evaluated = self.evaluate_expression(for_loop.conditional_expr)
+                if not isinstance(condition_evaluated, o.Boolean):
+                    raise language_error(
+                        condition_evaluated.line_num,
+                        f"invalid type for for-loop conditional expression: {type(condition_evaluated).__name__}"
+                    )
+
+                if condition_evaluated.value:
+                    new_values.append(
+                        self.evaluate_expression(for_loop.expression)
+                    )
+        finally:
+            self.loop_invariant_values.pop()
 
         # Reset environment back to old environment
         self.env = self.get_env.parent_env
 
+        if self.limits is not None:
+            self.limits.allocate(for_loop.line_num, len(new_values) * REFERENCE_SIZE)
+
         return o.List(for_loop.line_num, new_values)
+
+    def evaluate_loop_invariant(self, invariant: o.LoopInvariant) -> o.Expression:
+        """Evaluate a loop invariant the first time it is reached in the current run of its loop, and reuse that
+        value for the rest of the run.
+
+        Because the value is computed where the expression appears, rather than before the loop starts, errors are
+        raised at the same point (and with the same line numbers) as they would be without the optimization, and loops
+        with no elements never evaluate their invariants.
+        """
+        if len(self.loop_invariant_values) == 0:
+            return self.evaluate_expression(invariant.expression)
+
+        saved_values = self.loop_invariant_values[-1]
+        value = saved_values.get(id(invariant), None)
+        if value is not None:
+            return value
+
+        value = self.evaluate_expression(invariant.expression)
+        if self.is_loop_invariant(invariant):
+            saved_values[id(invariant)] = value
+        return value
+
+    def is_loop_invariant(self, invariant: o.LoopInvariant) -> bool:
+        analysis = self.loop_invariant_analyses.get(id(invariant), None)
+        if analysis is None or not analysis.is_valid(self.get_env):
+            analysis = analyze_expression(invariant.expression, self.get_env)
+            self.loop_invariant_analyses[id(invariant)] = analysis
+
+        # Variables read by the functions the invariant calls may change from one element to the next
+        return analysis.is_pure and analysis.dependencies.keys().isdisjoint(invariant.varying_names)
+
+
+def is_short_circuit(left: o.Expression, operator: Token) -> bool:
+    """Check if "left" alone determines the result of a binary operation: "false and x" is always false and
+    "true or x" is always true.
+    """
+    if not isinstance(left, o.Boolean):
+        return False
+    return (operator.type == t.AND and not left.value) or (operator.type == t.OR and left.value)
+
+
+def function_call(function: o.Function, argument: o.Expression) -> o.FunctionCall:
+    # See "Function.ptr"
+    return o.FunctionCall(function.line_num, function, o.List(argument.line_num, [argument]))
+
+
+def evaluate_calls(
+        function: o.Function,
+        values: typing.Sequence[o.Expression],
+        variables: dict[str, o.Expression]
+) -> ChunkResult:
+    """Call "function" on each value in "values" (see "parallel_map")."""
+    env = Environment()
+    env.set_vars(variables)
+    evaluator = Evaluator([], env)
+
+    try:
+        return [evaluator.evaluate_function_call(function_call(function, value)) for value in values], None
+    except LanguageRuntimeException as e:
+        return [], (e.line_num, str(e))
+
+
+def evaluate_in_worker(
+        expression: o.Expression,
+        variables: dict[str, o.Expression]
+) -> tuple[typing.Optional[o.Expression], typing.Optional[tuple[int, str]]]:
+    """Evaluate "expression" with the given global variables (see "StatementScheduler")."""
+    env = Environment()
+    env.set_vars(variables)
+
+    try:
+        return Evaluator([], env).evaluate_expression(expression), None
+    except LanguageRuntimeException as e:
+        return None, (e.line_num, str(e))
@@ -0,0 +1,73 @@
+import time
+import typing
+
+from utils.utils import language_error
+
+# Steps between checks of the deadline. Reading the clock takes much longer than counting a step.
+DEADLINE_CHECK_INTERVAL = 1024
+
+
+class ExecutionLimits:
+    """Limits on how much work a program may do, and how much memory it may allocate, before it is stopped with an
+    error.
+
+    A step is one element of a for-loop or one function call, including calls the optimizer inlined (see
+    "InlinedCall"). Everything else a program does is bounded by the size of its source, so counting steps is enough to
+    stop programs that would otherwise run for a very long time (or forever), without the cost of counting every
+    expression that is evaluated.
+
+    "max_steps" is the number of steps allowed, and "timeout" is the number of seconds the program may run for,
+    measured with a monotonic clock from when the limits are created. Either can be None for no limit. The deadline is
+    checked every "DEADLINE_CHECK_INTERVAL" steps.
+
+    "max_memory" is the number of bytes the program may allocate for lists, strings, and numbers, estimated with the
+    sizes in "memory". Operations that can allocate much more than the size of their operands (see "infix_size" and
+    "factorial_size") are counted before they run, so an oversized result is rejected before any of it is allocated.
+    Memory is never given back, so this limits the total allocated over the whole program, which is never less than
+    the most it uses at once.
+    """
+
+    def __init__(
+            self,
+            max_steps: typing.Optional[int] = None,
+            timeout: typing.Optional[float] = None,
+            max_memory: typing.Optional[int] = None
+    ) -> None:
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.max_memory = max_memory
+
+        # Bytes allocated so far
+        self.memory = 0
+
+        self.steps = 0
+        self.next_check = 0
+        self.schedule_check()
+
+    def step(self, line_num: int) -> None:
+        self.steps += 1
+        if self.steps >= self.next_check:
+            self.check(line_num)
+
+    def check(self, line_num: int) -> None:
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise language_error(line_num, f"program exceeded the limit of {self.max_steps} steps")
+
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise language_error(line_num, f"program exceeded the time limit of {self.timeout:g} seconds")
+
+        self.schedule_check()
+
+    def schedule_check(self) -> None:
+        self.next_check = self.steps + DEADLINE_CHECK_INTERVAL
+        if self.max_steps is not None:
+            self.next_check = min(self.next_check, self.max_steps + 1)
+
+    def allocate(self, line_num: int, size: int) -> None:
+        self.memory += size
+        if self.max_memory is not None and self.memory > self.max_memory:
+            raise language_error(line_num, f"program exceeded the memory limit of {self.max_memory} bytes")
+
+    def is_past_deadline(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
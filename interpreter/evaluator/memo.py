@@ -0,0 +1,123 @@
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.purity import FunctionAnalysis, analyze_function, is_callable
+from utils.lru_cache import LRUCache
+
+# Maximum number of results cached for each function
+DEFAULT_MEMO_SIZE = 128
+
+CacheKey = typing.Hashable
+
+
+class FunctionMemo:
+    """Result caches for pure functions.
+
+    Every function gets its own LRU cache, keyed on the values of its arguments and of the free variables its body
+    reads (Boomerang functions are dynamically scoped, so those can differ between calls), and on the identities of the
+    functions it calls. Functions that can reach an impure builtin (print, input, randint, randfloat) are never cached.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MEMO_SIZE) -> None:
+        self.max_size = max_size
+
+        # Functions are identified by their bodies because a function value is copied whenever it is relocated to a
+        # new line (see "Expression.relocate"), but every copy shares the same body. Function objects are stored
+        # alongside their caches so the IDs of their bodies cannot be reused by other functions.
+        self.analyses: dict[int, tuple[o.Function, FunctionAnalysis]] = {}
+        self.caches: dict[int, tuple[o.Function, LRUCache[CacheKey, o.Expression]]] = {}
+
+    @property
+    def is_enabled(self) -> bool:
+        return self.max_size > 0
+
+    def key(self, function: o.Function, arguments: o.List, env: Environment) -> typing.Optional[CacheKey]:
+        """Return the cache key for calling "function" with "arguments" from "env", or None if the result of the
+        call cannot be cached.
+        """
+        if not self.is_enabled:
+            return None
+
+        analysis = self.analyze(function, env)
+        if not analysis.is_pure:
+            return None
+
+        # "analysis.is_valid" guarantees that data variables are still data, and that every other dependency is the
+        # same function or builtin (or still undefined) as when the function was analyzed. Those can be rebound
+        # between calls, so a result is only reused if they are the same objects.
+        bindings: list[tuple[str, typing.Hashable]] = []
+        for name, value in analysis.dependencies.items():
+            if value is None:
+                bindings.append((name, None))
+            elif is_callable(value):
+                bindings.append((name, Identity(value)))
+            else:
+                bindings.append((name, env.get_var(name)))
+
+        return value_key([tuple(arguments.values), tuple(bindings)])
+
+    def analyze(self, function: o.Function, env: Environment) -> FunctionAnalysis:
+        _, analysis = self.analyses.get(id(function.body), (function, None))
+        if analysis is None or not analysis.is_valid(env):
+            analysis = analyze_function(function, env)
+            self.analyses[id(function.body)] = (function, analysis)
+        return analysis
+
+    def get(self, function: o.Function, key: CacheKey) -> typing.Optional[o.Expression]:
+        return self.cache_for(function).get(key)
+
+    def put(self, function: o.Function, key: CacheKey, value: o.Expression) -> None:
+        self.cache_for(function).put(key, value)
+
+    def cache_for(self, function: o.Function) -> LRUCache[CacheKey, o.Expression]:
+        _, cache = self.caches.get(id(function.body), (function, None))
+        if cache is None:
+            cache = LRUCache(self.max_size)
+            self.caches[id(function.body)] = (function, cache)
+        return cache
+
+    @property
+    def hits(self) -> int:
+        return sum(cache.hits for _, cache in self.caches.values())
+
+    @property
+    def misses(self) -> int:
+        return sum(cache.misses for _, cache in self.caches.values())
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def report(self) -> str:
+        return f"memoization: {self.hits} hits, {self.misses} misses ({self.hit_rate:.1%} hit rate)"
+
+
+class Identity:
+    """Compares equal only to an "Identity" of the same object. Keys hold the object, so its ID is not reused while the
+    key is cached.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: object) -> None:
+        self.value = value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Identity) and other.value is self.value
+
+
+def value_key(values: list[typing.Hashable]) -> typing.Optional[CacheKey]:
+    """Combine values into a hashable key that compares equal exactly when the values do. Returns None if any value
+    cannot be compared by value (for example, a function).
+    """
+    key = tuple(values)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
@@ -0,0 +1,99 @@
+import math
+import sys
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.parser_.builtin_ast_objects import Range
+from interpreter.tokens import tokens as t
+
+# Approximate sizes of values, in bytes. A list holds a reference to each of its elements, and each new number,
+# boolean, or other small value takes about "VALUE_SIZE" bytes, including the reference to it.
+REFERENCE_SIZE = 8
+VALUE_SIZE = 64
+
+
+def infix_size(operator: str, left: typing.Any, right: typing.Any) -> int:
+    """Predict the number of bytes an infix operation allocates before it runs, for the operations whose results can be
+    much larger than their operands: concatenating lists or strings, adding an element to a list, and "range". Other
+    operations count as 0. "left" and "right" can be "Expression" objects or native values (see "native").
+    """
+    if operator == t.PLUS:
+        left_length = length(left)
+        right_length = length(right)
+        if left_length is None or right_length is None or is_string(left) != is_string(right):
+            return 0
+
+        # Strings take about one byte per character, and lists one reference per element
+        element_size = 1 if is_string(left) else REFERENCE_SIZE
+        return (left_length + right_length) * element_size
+
+    elif operator == t.SEND:
+        if isinstance(left, Range):
+            arguments = right.values if isinstance(right, o.List) else right
+            return range_length(arguments) * VALUE_SIZE
+
+        left_length = length(left)
+        if left_length is not None and isinstance(left, (tuple, o.List)):
+            return (left_length + 1) * REFERENCE_SIZE
+
+    return 0
+
+
+def factorial_size(value: typing.Any) -> int:
+    """Predict the number of bytes the factorial of "value" takes. Factorials grow faster than exponentially, so this
+    is the only postfix operation that can allocate more than a small value.
+    """
+    number = value.value if isinstance(value, o.Number) else value
+    if type(number) not in (int, float) or not float(number).is_integer():
+        return 0
+
+    # See "Number.fac"
+    base = abs(int(number)) + 1 if number < 0 else int(number)
+
+    # log2(n!) bits
+    bits = math.lgamma(base + 1) / math.log(2)
+    return VALUE_SIZE + int(bits / 8) if math.isfinite(bits) else sys.maxsize
+
+
+def range_length(arguments: typing.Any) -> int:
+    """The number of elements "range" returns for "arguments", or 0 if they are not valid (so the error "Range" raises
+    for them is not replaced). Ranges that never end have "sys.maxsize" elements.
+    """
+    if not isinstance(arguments, (tuple, list)) or not 1 <= len(arguments) <= 3:
+        return 0
+
+    numbers = [argument.value if isinstance(argument, o.Number) else argument for argument in arguments]
+    if not all(type(number) in (int, float) for number in numbers):
+        return 0
+
+    if len(numbers) == 1:
+        start, end, step = 0.0, numbers[0], 1.0
+    elif len(numbers) == 2:
+        start, end, step = numbers[0], numbers[1], 1.0
+    else:
+        start, end, step = numbers
+
+    if step == 0:
+        return 0
+
+    count = (end - start) / step
+    if not count > 0:
+        # Empty, in the wrong direction, or not a number
+        return 0
+    elif math.isinf(count):
+        return sys.maxsize
+    return math.ceil(count)
+
+
+def length(value: typing.Any) -> typing.Optional[int]:
+    if isinstance(value, (tuple, str)):
+        return len(value)
+    elif isinstance(value, o.List):
+        return len(value.values)
+    elif isinstance(value, o.String):
+        return len(value.value)
+    return None
+
+
+def is_string(value: typing.Any) -> bool:
+    return isinstance(value, (str, o.String))
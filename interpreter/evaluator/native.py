@@ -0,0 +1,195 @@
+import itertools
+import operator
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.tokens import tokens as t
+
+# Values in the native evaluator (see "NativeEvaluator"). Numbers, strings, and booleans are plain Python "int"/"float",
+# "str", and "bool" values, and lists are tuples of native values. Every other value (maps, sets, functions, and
+# builtins) is the same "Expression" object the regular evaluator uses.
+NativeValue = typing.Any
+
+InfixHandler = typing.Callable[[NativeValue, NativeValue], NativeValue]
+UnaryHandler = typing.Callable[[NativeValue], NativeValue]
+
+NUMBER_TYPES: tuple[type, ...] = (int, float)
+
+
+def box(value: NativeValue, line_num: int) -> o.Expression:
+    """Convert a native value to the "Expression" object the regular evaluator would have produced."""
+    value_type = type(value)
+
+    # "bool" is a subclass of "int", so booleans must be checked first
+    if value_type is bool:
+        return o.Boolean(line_num, value)
+
+    elif value_type is float or value_type is int:
+        return o.Number(line_num, value)
+
+    elif value_type is str:
+        return o.String(line_num, value)
+
+    elif value_type is tuple:
+        return o.List(line_num, [box(element, line_num) for element in value])
+
+    return typing.cast(o.Expression, value)
+
+
+def unbox(value: o.Expression) -> NativeValue:
+    """Convert an "Expression" object to a native value."""
+    if isinstance(value, o.Number) or isinstance(value, o.String) or isinstance(value, o.Boolean):
+        return value.value
+
+    elif isinstance(value, o.List):
+        return tuple(unbox(element) for element in value.values)
+
+    return value
+
+
+def type_name(value: NativeValue) -> str:
+    """The name of a native value's type in error messages."""
+    return type(box(value, 0)).__name__
+
+
+def native_equal(left: NativeValue, right: NativeValue) -> bool:
+    """Compare native values the same way their "Expression" objects compare.
+
+    Python's "==" is not enough on its own: "1 == true" is false in Boomerang, but "1 == True" is true in Python.
+    """
+    left_type = type(left)
+    right_type = type(right)
+
+    if left_type is tuple:
+        return right_type is tuple and len(left) == len(right) \
+            and all(native_equal(a, b) for a, b in zip(left, right))
+
+    elif left_type is bool or right_type is bool:
+        return left_type is right_type and left == right
+
+    elif isinstance(left, o.Expression) or isinstance(right, o.Expression):
+        return box(left, 0) == box(right, 0)
+
+    return typing.cast(bool, left == right)
+
+
+# Booleans are wrapped with this tag in equality keys so they are never equal to numbers
+_BOOLEAN_TAG = object()
+
+
+def equality_key(value: NativeValue) -> typing.Hashable:
+    """A key that is equal to another value's key exactly when "native_equal" is true for the two values. Raises a
+    TypeError if the value cannot be hashed (for example, a function or a list that contains one).
+    """
+    value_type = type(value)
+
+    if value_type is bool:
+        return _BOOLEAN_TAG, value
+
+    elif value_type is tuple:
+        return tuple(equality_key(element) for element in value)
+
+    hash(value)
+    return typing.cast(typing.Hashable, value)
+
+
+def index(values: tuple[NativeValue, ...], position: NativeValue) -> NativeValue:
+    # Invalid and out-of-range indices raise a "LookupError", so the operation falls back to "List.at" to report the
+    # error
+    if position % 1 != 0:
+        raise IndexError(position)
+    return values[int(position)]
+
+
+def build_infix_handlers() -> dict[tuple[str, type, type], InfixHandler]:
+    handlers: dict[tuple[str, type, type], InfixHandler] = {}
+
+    for left_type, right_type in itertools.product(NUMBER_TYPES, repeat=2):
+        handlers.update({
+            (t.PLUS, left_type, right_type): operator.add,
+            (t.MINUS, left_type, right_type): operator.sub,
+            (t.MULTIPLY, left_type, right_type): operator.mul,
+            (t.DIVIDE, left_type, right_type): operator.truediv,
+            (t.MOD, left_type, right_type): operator.mod,
+            (t.PACK, left_type, right_type): operator.pow,
+            (t.EQ, left_type, right_type): operator.eq,
+            (t.NE, left_type, right_type): operator.ne,
+            (t.GT, left_type, right_type): operator.gt,
+            (t.GE, left_type, right_type): operator.ge,
+            (t.LT, left_type, right_type): operator.lt,
+            (t.LE, left_type, right_type): operator.le,
+        })
+
+    for number_type in NUMBER_TYPES:
+        handlers[(t.INDEX, tuple, number_type)] = index
+
+    handlers.update({
+        (t.PLUS, str, str): operator.add,
+        (t.EQ, str, str): operator.eq,
+        (t.NE, str, str): operator.ne,
+
+        (t.AND, bool, bool): lambda left, right: left and right,
+        (t.OR, bool, bool): lambda left, right: left or right,
+        (t.XOR, bool, bool): operator.ne,
+        (t.EQ, bool, bool): operator.eq,
+        (t.NE, bool, bool): operator.ne,
+
+        (t.PLUS, tuple, tuple): operator.add,
+    })
+
+    return handlers
+
+
+# Operator semantics for native values, keyed by the operator and the exact types of the operands. Handlers may raise an
+# "ArithmeticError" or "LookupError" (such as for division by zero); the evaluator then repeats the operation on
+# "Expression" objects, which raises the same language error the regular evaluator would. Operations that are not in
+# these tables are always evaluated on "Expression" objects.
+INFIX_HANDLERS = build_infix_handlers()
+
+PREFIX_HANDLERS: dict[tuple[str, type], UnaryHandler] = {
+    **{(t.PLUS, number_type): operator.abs for number_type in NUMBER_TYPES},
+    **{(t.MINUS, number_type): operator.neg for number_type in NUMBER_TYPES},
+    (t.NOT, bool): operator.not_,
+    (t.MINUS, tuple): lambda values: values[::-1],
+    (t.PACK, tuple): lambda values: (values,),
+}
+
+POSTFIX_HANDLERS: dict[tuple[str, type], UnaryHandler] = {
+    **{(t.INC, number_type): lambda value: value + 1 for number_type in NUMBER_TYPES},
+    **{(t.DEC, number_type): lambda value: value - 1 for number_type in NUMBER_TYPES},
+}
+
+# Names of the "Expression" methods that implement each operator
+INFIX_METHODS: dict[str, str] = {
+    t.PLUS: "add",
+    t.MINUS: "sub",
+    t.MULTIPLY: "mul",
+    t.DIVIDE: "div",
+    t.MOD: "mod",
+    t.PACK: "pow",
+    t.SEND: "ptr",
+    t.EQ: "eq",
+    t.NE: "ne",
+    t.GT: "gt",
+    t.GE: "ge",
+    t.LT: "lt",
+    t.LE: "le",
+    t.AND: "and_",
+    t.OR: "or_",
+    t.XOR: "xor",
+    t.IN: "contains",
+    t.INDEX: "at",
+}
+
+PREFIX_METHODS: dict[str, str] = {
+    t.PLUS: "abs",
+    t.MINUS: "neg",
+    t.NOT: "not_",
+    t.PACK: "pack",
+}
+
+POSTFIX_METHODS: dict[str, str] = {
+    t.BANG: "fac",
+    t.INC: "inc",
+    t.DEC: "dec",
+}
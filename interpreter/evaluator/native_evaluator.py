@@ -0,0 +1,597 @@
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.parser_.builtin_ast_objects import BuiltinFunction, Input, ParallelMap, ParallelMapCall
+from interpreter.tokens import tokens as t
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.limits import ExecutionLimits
+from interpreter.evaluator.memo import FunctionMemo
+from interpreter.evaluator.memory import REFERENCE_SIZE, factorial_size, infix_size
+from interpreter.evaluator.parallel import ChunkResult, parallel_map
+from interpreter.evaluator.native import NativeValue, box, unbox, type_name, native_equal, equality_key, \
+    INFIX_HANDLERS, PREFIX_HANDLERS, POSTFIX_HANDLERS, INFIX_METHODS, PREFIX_METHODS, POSTFIX_METHODS
+from interpreter.evaluator.purity import FunctionAnalysis, analyze_expression
+from interpreter.evaluator.statement_scheduler import StatementScheduler
+from interpreter.optimizer.type_inference import value_line_num
+from utils.lru_cache import LRUCache
+from utils.persistent_map import PersistentMap
+from utils.program_io import ProgramIO
+from utils.utils import language_error, LanguageRuntimeException, Platform, incorrect_number_of_arguments
+
+# Number of lists whose membership indexes are kept (see "NativeEvaluator.contains")
+MEMBERSHIP_INDEX_CACHE_SIZE = 32
+
+ExpressionHandler = typing.Callable[[typing.Any], NativeValue]
+
+
+class NativeScope:
+    """Variables of one scope in the native evaluator. The same as "Environment", but for native values.
+
+    The global scope reads variables it does not have from the "Environment" the program was started with, which is
+    how values from previous runs (such as earlier lines in the REPL) are seen.
+    """
+
+    def __init__(self, parent: typing.Optional["NativeScope"], environment: typing.Optional[Environment] = None) -> None:
+        self.variables: dict[str, NativeValue] = {}
+        self.parent = parent
+        self.environment = environment
+
+        # Native values of variables read from "environment"
+        self.imported_variables: dict[str, NativeValue] = {}
+
+    def get_var(self, name: str) -> typing.Optional[NativeValue]:
+        scope: typing.Optional[NativeScope] = self
+        while scope is not None:
+            value = scope.variables.get(name, None)
+            if value is not None:
+                return value
+
+            if scope.environment is not None:
+                return scope.import_var(name)
+
+            scope = scope.parent
+
+        return None
+
+    def import_var(self, name: str) -> typing.Optional[NativeValue]:
+        value = self.imported_variables.get(name, None)
+        if value is None and self.environment is not None:
+            boxed_value = self.environment.get_var(name)
+            if boxed_value is not None:
+                value = self.imported_variables[name] = unbox(boxed_value)
+        return value
+
+
+class BoxedView(Environment):
+    """An "Environment" that reads variables from a native scope, for the analyses that only understand "Expression"
+    objects (see "purity"). Functions and builtins are returned as-is, so they keep their identities.
+    """
+
+    def __init__(self, scope: NativeScope) -> None:
+        super().__init__()
+        self.scope = scope
+
+    def get_var(self, key: str) -> typing.Optional[o.Expression]:
+        value = self.scope.get_var(key)
+        return None if value is None else box(value, 0)
+
+
+class NativeEvaluator:
+    """An evaluator whose values are plain Python values (see "native") instead of "Expression" objects.
+
+    Creating an "Expression" for every intermediate number, string, boolean, and list is the main cost of evaluating
+    tight loops, so this evaluator only converts values to "Expression" objects where it needs their behavior: for
+    results and variables returned to the caller, for builtin functions, and for operations its handler tables do not
+    cover (which includes every operation that raises an error, so error messages are the same as in "Evaluator").
+
+    Line numbers are not stored with native values. Where an error or result needs one, it is taken from the
+    expression that produced the value. This is the same line number "Evaluator" uses in every case except elements
+    retrieved from lists, which "Evaluator" reports at the line where the element was created.
+    """
+
+    def __init__(
+            self,
+            ast: list[o.Expression],
+            env: Environment,
+            memo: typing.Optional[FunctionMemo] = None,
+            parallel_statements: bool = False,
+            program_io: typing.Optional[ProgramIO] = None,
+            limits: typing.Optional[ExecutionLimits] = None
+    ) -> None:
+        self.ast = ast
+        self.env = env
+
+        self.global_scope = NativeScope(None, env)
+        self.scope = self.global_scope
+
+        # Line numbers of the values assigned to global variables, which they are saved to "env" with
+        self.global_lines: dict[str, int] = {}
+
+        # See "Evaluator"
+        self.program_io = program_io if program_io is not None else ProgramIO()
+        self.output = self.program_io.output
+
+        # Results of pure function calls
+        self.memo = memo if memo is not None else FunctionMemo()
+
+        # See "Evaluator.loop_invariant_values" and "Evaluator.loop_invariant_analyses"
+        self.loop_invariant_values: list[dict[int, NativeValue]] = []
+        self.loop_invariant_analyses: dict[int, FunctionAnalysis] = {}
+
+        # See "Evaluator.saved_values"
+        self.saved_values: dict[int, NativeValue] = {}
+
+        # See "Evaluator.parallel_statements"
+        self.parallel_statements = parallel_statements
+
+        # See "Evaluator.limits"
+        self.limits = limits
+
+        # Native values of "Constant" nodes, keyed by node ID
+        self.constant_values: dict[int, NativeValue] = {}
+
+        # Hash sets of the elements of recently searched lists, keyed by list ID. Each list is stored with its set so
+        # the ID cannot be reused by a different list while the set exists.
+        self.membership_indexes: LRUCache[int, tuple[tuple[NativeValue, ...], set[typing.Hashable]]] = \
+            LRUCache(MEMBERSHIP_INDEX_CACHE_SIZE)
+
+        self.handlers: dict[type, ExpressionHandler] = {
+            o.InfixExpression: self.evaluate_infix,
+            o.PrefixExpression: self.evaluate_prefix,
+            o.PostfixExpression: self.evaluate_postfix,
+            o.Assignment: self.evaluate_assignment,
+            o.Identifier: self.evaluate_identifier,
+            o.When: self.evaluate_when,
+            o.ForLoop: self.evaluate_for,
+            o.List: self.evaluate_list,
+            o.MapLiteral: self.evaluate_map,
+            o.SetLiteral: self.evaluate_set,
+            o.Constant: self.evaluate_constant,
+            o.LoopInvariant: self.evaluate_loop_invariant,
+            o.InlinedCall: self.evaluate_inlined_call,
+            o.SavedExpression: self.evaluate_saved_expression,
+            o.SavedValue: self.evaluate_saved_value,
+            o.Number: self.evaluate_literal,
+            o.String: self.evaluate_literal,
+            o.Boolean: self.evaluate_literal,
+            o.Function: self.evaluate_value,
+            o.Map: self.evaluate_value,
+            o.Set: self.evaluate_value,
+            o.Error: self.evaluate_value,
+            BuiltinFunction: self.evaluate_builtin,
+        }
+
+    def evaluate(self) -> tuple[list[o.Expression], list[str]]:
+        results: list[o.Expression] = []
+        scheduler = StatementScheduler(self.ast, evaluate_native_in_worker) \
+            if self.parallel_statements and self.limits is None else None
+        try:
+            for index, expression in enumerate(self.ast):
+                value = None
+                if scheduler is not None:
+                    scheduler.start_ready(index, BoxedView(self.global_scope))
+                    value = scheduler.take(index)
+
+                if value is not None:
+                    self.assign(typing.cast(o.Assignment, expression), value)
+                else:
+                    value = self.evaluate_expression(expression)
+
+                line_num = line_of(expression)
+                results.append(box(value, line_num).relocate(line_num))
+
+        except LanguageRuntimeException as e:
+            error_obj = o.Error(e.line_num, str(e))
+            self.program_io.error(str(error_obj))
+            results = [error_obj]
+
+        finally:
+            if scheduler is not None:
+                scheduler.cancel()
+
+            # Global variables are saved to the environment the same way "Evaluator" saves them
+            for name, value in self.global_scope.variables.items():
+                self.env.set_var(name, box(value, self.global_lines[name]))
+
+        return results, self.output
+
+    def evaluate_expression(self, expression: o.Expression) -> NativeValue:
+        handler = self.handlers.get(type(expression), None)
+        if handler is None:
+            handler = self.handler_for(type(expression))
+        return handler(expression)
+
+    def handler_for(self, expression_type: type) -> ExpressionHandler:
+        # Subclasses (for example, "NumberInfixExpression" and the builtin functions) use the handler of their closest
+        # base class
+        for base_type in expression_type.__mro__:
+            handler = self.handlers.get(base_type, None)
+            if handler is not None:
+                self.handlers[expression_type] = handler
+                return handler
+
+        # This is a program-specific error because a missing object type would come about during development, not
+        # when a user is using this programming language.
+        raise Exception(f"Unsupported type: {expression_type.__name__}")
+
+    def evaluate_literal(self, literal: typing.Union[o.Number, o.String, o.Boolean]) -> NativeValue:
+        return literal.value
+
+    def evaluate_value(self, value: o.Expression) -> NativeValue:
+        return value
+
+    def evaluate_constant(self, constant: o.Constant) -> NativeValue:
+        value = self.constant_values.get(id(constant), None)
+        if value is None:
+            value = self.constant_values[id(constant)] = unbox(constant.value)
+        return value
+
+    def evaluate_inlined_call(self, inlined_call: o.InlinedCall) -> NativeValue:
+        # Counted like the function call it replaces (see "call_function")
+        if self.limits is not None:
+            self.limits.step(inlined_call.line_num)
+        return self.evaluate_expression(inlined_call.body)
+
+    def evaluate_saved_expression(self, saved_expression: o.SavedExpression) -> NativeValue:
+        value = self.saved_values[saved_expression.slot] = self.evaluate_expression(saved_expression.expression)
+        return value
+
+    def evaluate_saved_value(self, saved_value: o.SavedValue) -> NativeValue:
+        return self.saved_values[saved_value.slot]
+
+    def evaluate_builtin(self, builtin: BuiltinFunction) -> NativeValue:
+        platform = self.program_io.platform
+
+        unsupported_platform: typing.Dict[typing.Type[o.Expression], list[str]] = {
+            Input: [Platform.WEB.name]
+        }
+
+        if platform in unsupported_platform.get(type(builtin), []):
+            raise language_error(
+                builtin.line_num,
+                f"unsupported builtin function '{type(builtin).__name__}' for {platform} platform"
+            )
+
+        return builtin
+
+    def evaluate_list(self, list_expression: o.List) -> NativeValue:
+        return tuple(self.evaluate_expression(element) for element in list_expression.values)
+
+    def evaluate_map(self, map_literal: o.MapLiteral) -> NativeValue:
+        new_map = o.Map(map_literal.line_num, PersistentMap())
+        for key_expression, value_expression in map_literal.pairs:
+            key = self.evaluate_expression(key_expression)
+            value = self.evaluate_expression(value_expression)
+            new_map = new_map.set_entry(box(key, line_of(key_expression)), box(value, line_of(value_expression)))
+        return new_map
+
+    def evaluate_set(self, set_literal: o.SetLiteral) -> NativeValue:
+        new_set = o.Set(set_literal.line_num, PersistentMap())
+        for value_expression in set_literal.values:
+            value = self.evaluate_expression(value_expression)
+            new_set = new_set.add_value(box(value, line_of(value_expression)))
+        return new_set
+
+    def evaluate_assignment(self, assignment: o.Assignment) -> NativeValue:
+        return self.assign(assignment, self.evaluate_expression(assignment.value))
+
+    def assign(self, assignment: o.Assignment, value: NativeValue) -> NativeValue:
+        self.scope.variables[assignment.name] = value
+        if self.scope is self.global_scope:
+            self.global_lines[assignment.name] = line_of(assignment.value)
+        return value
+
+    def evaluate_identifier(self, identifier: o.Identifier) -> NativeValue:
+        value = self.scope.get_var(identifier.value)
+        if value is None:
+            raise language_error(identifier.line_num, f"undefined variable: {identifier.value}")
+        return value
+
+    def evaluate_infix(self, infix_expression: o.InfixExpression) -> NativeValue:
+        left = self.evaluate_expression(infix_expression.left)
+        op = infix_expression.operator.type
+
+        # "and" and "or" only evaluate their right side if the left side does not already determine the result (see
+        # "is_short_circuit")
+        if (op == t.AND and left is False) or (op == t.OR and left is True):
+            return left
+
+        right = self.evaluate_expression(infix_expression.right)
+
+        if self.limits is not None:
+            self.limits.allocate(infix_expression.line_num, infix_size(op, left, right))
+
+        handler = INFIX_HANDLERS.get((op, type(left), type(right)), None)
+        if handler is not None:
+            try:
+                return handler(left, right)
+            except (ArithmeticError, LookupError):
+                return self.evaluate_boxed_infix(infix_expression, left, right)
+
+        if op == t.SEND:
+            return self.evaluate_send(infix_expression, left, right)
+
+        elif op == t.EQ:
+            return native_equal(left, right)
+
+        elif op == t.NE:
+            return not native_equal(left, right)
+
+        elif op == t.IN and type(right) is tuple:
+            return self.contains(right, left)
+
+        return self.evaluate_boxed_infix(infix_expression, left, right)
+
+    def evaluate_boxed_infix(self, infix_expression: o.InfixExpression, left: NativeValue, right: NativeValue) -> NativeValue:
+        """Apply an operator to the "Expression" objects of two values. Errors are raised by the "Expression"
+        methods, with the same messages as in "Evaluator".
+        """
+        left_line = line_of(infix_expression.left)
+        right_line = line_of(infix_expression.right)
+        method = getattr(box(left, left_line).relocate(left_line), INFIX_METHODS[infix_expression.operator.type])
+        return unbox(method(box(right, right_line).relocate(right_line)))
+
+    def evaluate_send(self, infix_expression: o.InfixExpression, left: NativeValue, right: NativeValue) -> NativeValue:
+        if type(left) is tuple:
+            return left + (right,)
+
+        elif isinstance(left, o.Function) and type(right) is tuple:
+            # The call is reported at the line of the function value, like "Function.ptr"
+            return self.call_function(left, right, line_of(infix_expression.left))
+
+        elif isinstance(left, ParallelMap):
+            return self.call_parallel_map(infix_expression, left, right)
+
+        elif isinstance(left, BuiltinFunction):
+            return self.call_builtin(infix_expression, left, right)
+
+        return self.evaluate_boxed_infix(infix_expression, left, right)
+
+    def call_builtin(self, infix_expression: o.InfixExpression, builtin: BuiltinFunction, arguments: NativeValue) -> NativeValue:
+        # See "evaluate_boxed_infix"
+        left_line = line_of(infix_expression.left)
+        right_line = line_of(infix_expression.right)
+        relocated_builtin = typing.cast(BuiltinFunction, builtin.relocate(left_line))
+        return unbox(relocated_builtin.call(box(arguments, right_line).relocate(right_line), self.program_io))
+
+    def call_function(self, function: o.Function, arguments: tuple[NativeValue, ...], line_num: int) -> NativeValue:
+        if len(arguments) != len(function.parameters):
+            raise incorrect_number_of_arguments(line_num, len(function.parameters), len(arguments))
+
+        if self.limits is not None:
+            self.limits.step(line_num)
+
+        # See "Evaluator.evaluate_function_call". Cached results are stored as "Expression" objects so the cache can be
+        # shared with "Evaluator".
+        memo_key = None
+        if self.memo.is_enabled:
+            boxed_arguments = o.List(line_num, [box(argument, line_num) for argument in arguments])
+            memo_key = self.memo.key(function, boxed_arguments, BoxedView(self.scope))
+            if memo_key is not None:
+                cached_value = self.memo.get(function, memo_key)
+                if cached_value is not None:
+                    return unbox(cached_value)
+
+        self.scope = NativeScope(self.scope)
+        for parameter, argument in zip(function.parameters, arguments):
+            self.scope.variables[parameter.value] = argument
+
+        return_value = self.evaluate_expression(function.body)
+
+        self.scope = typing.cast(NativeScope, self.scope.parent)
+
+        if memo_key is not None:
+            self.memo.put(function, memo_key, box(return_value, line_num))
+
+        return return_value
+
+    def call_parallel_map(
+            self,
+            infix_expression: o.InfixExpression,
+            builtin: ParallelMap,
+            arguments: NativeValue
+    ) -> NativeValue:
+        line_num = line_of(infix_expression.right)
+
+        if type(arguments) is tuple and len(arguments) == 2 and isinstance(arguments[0], o.Function) \
+                and type(arguments[1]) is tuple:
+            function, values = arguments
+        else:
+            # Other arguments are checked (or converted, for maps and sets) by "ParallelMap.ptr", so errors are the
+            # same as in "Evaluator"
+            relocated_builtin = builtin.relocate(line_of(infix_expression.left))
+            call = typing.cast(ParallelMapCall, relocated_builtin.ptr(box(arguments, line_num)))
+            function, values = call.function, unbox(call.values)
+
+        # Calls are reported at the line of the function value (see "Function.ptr"), which is not stored with native
+        # values, so the line of the arguments is used
+        function = typing.cast(o.Function, function.relocate(line_num))
+
+        results = parallel_map(function, values, BoxedView(self.scope), evaluate_native_calls, native=True) \
+            if self.limits is None else None
+        if results is None:
+            results = [self.call_function(function, (value,), line_num) for value in values]
+        return tuple(results)
+
+    def contains(self, values: tuple[NativeValue, ...], value: NativeValue) -> bool:
+        """Check if "value" is equal to any element in "values".
+
+        Like "List.has_value", the first check on a list is a linear scan, and later checks use a hash set of its
+        elements. Lists with unhashable elements are always scanned.
+        """
+        if type(value) is str:
+            # Strings are only ever equal to strings, so Python's comparisons are the same as Boomerang's
+            return value in values
+
+        try:
+            key = equality_key(value)
+        except TypeError:
+            return any(native_equal(value, element) for element in values)
+
+        cached_index = self.membership_indexes.get(id(values))
+        if cached_index is None:
+            try:
+                index = {equality_key(element) for element in values}
+            except TypeError:
+                return any(native_equal(value, element) for element in values)
+            self.membership_indexes.put(id(values), (values, index))
+        else:
+            _, index = cached_index
+
+        return key in index
+
+    def evaluate_prefix(self, prefix_expression: o.PrefixExpression) -> NativeValue:
+        value = self.evaluate_expression(prefix_expression.expression)
+        op = prefix_expression.operator.type
+
+        handler = PREFIX_HANDLERS.get((op, type(value)), None)
+        if handler is not None:
+            return handler(value)
+
+        line_num = line_of(prefix_expression.expression)
+        method_name = PREFIX_METHODS.get(op, None)
+        if method_name is None:
+            raise Exception(f"Invalid prefix operator: {op} ({prefix_expression.operator.value})")
+        return unbox(getattr(box(value, line_num).relocate(line_num), method_name)())
+
+    def evaluate_postfix(self, postfix_expression: o.PostfixExpression) -> NativeValue:
+        value = self.evaluate_expression(postfix_expression.expression)
+        op = postfix_expression.operator.type
+
+        if self.limits is not None and op == t.BANG:
+            self.limits.allocate(postfix_expression.line_num, factorial_size(value))
+
+        handler = POSTFIX_HANDLERS.get((op, type(value)), None)
+        if handler is not None:
+            return handler(value)
+
+        line_num = line_of(postfix_expression.expression)
+        method_name = POSTFIX_METHODS.get(op, None)
+        if method_name is None:
+            raise language_error(line_num, f"invalid postfix operator: {op} ({postfix_expression.operator.value})")
+        return unbox(getattr(box(value, line_num).relocate(line_num), method_name)())
+
+    def evaluate_when(self, when: o.When) -> NativeValue:
+        switch_value = self.evaluate_expression(when.expression)
+
+        case_expressions = when.case_expressions
+        if isinstance(when, o.JumpTableWhen):
+            # Only the case found in the table needs to be compared
+            case_expressions = [case_expressions[when.lookup(box(switch_value, when.line_num))]]
+
+        for condition, return_expr in case_expressions:
+            if native_equal(self.evaluate_expression(condition), switch_value):
+                return self.evaluate_expression(return_expr)
+
+        # When expressions should always return something because of the "else" clause. If nothing
+        # is returned, there is a bug in the code.
+        raise Exception(f"Error at line {when.line_num}: When statement did not return")
+
+    def evaluate_for(self, for_loop: o.ForLoop) -> NativeValue:
+        values = self.evaluate_expression(for_loop.values)
+
+        # Maps are iterated by key, and sets by value
+        if isinstance(values, o.Map):
+            values = tuple(unbox(key) for key in values.entries.keys())
+        elif isinstance(values, o.Set):
+            values = tuple(unbox(value) for value in values.values)
+
+        if type(values) is not tuple:
+            raise language_error(line_of(for_loop.values), f"expected List, got {type_name(values)}")
+
+        # Create new scope for for-loop expression scope
+        self.scope = NativeScope(self.scope)
+        self.loop_invariant_values.append({})
+
+        new_values = []
+        try:
+            for value in values:
+                if self.limits is not None:
+                    self.limits.step(for_loop.line_num)
+
+                self.scope.variables[for_loop.element_identifier] = value
+
+                condition = self.evaluate_expression(for_loop.conditional_expr)
+                if type(condition) is not bool:
+                    raise language_error(
+                        line_of(for_loop.conditional_expr),
+                        f"invalid type for for-loop conditional expression: {type_name(condition)}"
+                    )
+
+                if condition:
+                    new_values.append(self.evaluate_expression(for_loop.expression))
+        finally:
+            self.loop_invariant_values.pop()
+
+        # Reset scope back to old scope
+        self.scope = typing.cast(NativeScope, self.scope.parent)
+
+        if self.limits is not None:
+            self.limits.allocate(for_loop.line_num, len(new_values) * REFERENCE_SIZE)
+
+        return tuple(new_values)
+
+    def evaluate_loop_invariant(self, invariant: o.LoopInvariant) -> NativeValue:
+        # See "Evaluator.evaluate_loop_invariant"
+        if len(self.loop_invariant_values) == 0:
+            return self.evaluate_expression(invariant.expression)
+
+        saved_values = self.loop_invariant_values[-1]
+        value = saved_values.get(id(invariant), None)
+        if value is not None:
+            return value
+
+        value = self.evaluate_expression(invariant.expression)
+        if self.is_loop_invariant(invariant):
+            saved_values[id(invariant)] = value
+        return value
+
+    def is_loop_invariant(self, invariant: o.LoopInvariant) -> bool:
+        environment = BoxedView(self.scope)
+
+        analysis = self.loop_invariant_analyses.get(id(invariant), None)
+        if analysis is None or not analysis.is_valid(environment):
+            analysis = analyze_expression(invariant.expression, environment)
+            self.loop_invariant_analyses[id(invariant)] = analysis
+
+        return analysis.is_pure and analysis.dependencies.keys().isdisjoint(invariant.varying_names)
+
+
+def line_of(expression: o.Expression) -> int:
+    """The line number of the value "expression" evaluates to (see "value_line_num"). For elements retrieved from
+    lists, which is not known, the line number of the expression is used instead.
+    """
+    line_num = value_line_num(expression)
+    return line_num if line_num is not None else expression.line_num
+
+
+def evaluate_native_calls(
+        function: o.Function,
+        values: typing.Sequence[NativeValue],
+        variables: dict[str, o.Expression]
+) -> ChunkResult:
+    """Call "function" on each value in "values" (see "parallel_map"). The results are native values, which are
+    faster to send between processes than "Expression" objects.
+    """
+    env = Environment()
+    env.set_vars(variables)
+    evaluator = NativeEvaluator([], env)
+
+    try:
+        return [evaluator.call_function(function, (value,), function.line_num) for value in values], None
+    except LanguageRuntimeException as e:
+        return [], (e.line_num, str(e))
+
+
+def evaluate_native_in_worker(
+        expression: o.Expression,
+        variables: dict[str, o.Expression]
+) -> tuple[typing.Optional[NativeValue], typing.Optional[tuple[int, str]]]:
+    """Evaluate "expression" with the given global variables (see "StatementScheduler")."""
+    env = Environment()
+    env.set_vars(variables)
+
+    try:
+        return NativeEvaluator([], env).evaluate_expression(expression), None
+    except LanguageRuntimeException as e:
+        return None, (e.line_num, str(e))
@@ -0,0 +1,164 @@
+import concurrent.futures
+import itertools
+import math
+import os
+import threading
+import typing
+from concurrent.futures.process import BrokenProcessPool
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.purity import analyze_function
+from interpreter.evaluator.shared_numbers import SharedNumbers, SharedSlice, pack, packable_numbers, read_slice, \
+    write_slice
+from utils.utils import LanguageRuntimeException
+
+# Smallest list that "pmap" splits across processes. Below this, starting the work in other processes and copying the
+# values to and from them takes longer than calling the function on every element in this one.
+PARALLEL_THRESHOLD = 256
+
+# Number of worker processes
+MAX_WORKERS = os.cpu_count() or 1
+
+# Lists are split into this many chunks per worker, so workers that get cheap elements can take more chunks
+CHUNKS_PER_WORKER = 4
+
+# Results of calling a function on a chunk of values, and the line number and message of the error that stopped the
+# calls, if any. Exceptions are not sent between processes because "LanguageRuntimeException" cannot be pickled. The
+# results are None if they were written to shared memory instead (see "evaluate_chunk").
+ChunkResult = tuple[typing.Optional[list[typing.Any]], typing.Optional[tuple[int, str]]]
+
+# Calls a function on each value in a chunk, with the given global variables. Must be a module-level function so it
+# can be sent to worker processes.
+ChunkWorker = typing.Callable[[o.Function, typing.Sequence[typing.Any], dict[str, o.Expression]], ChunkResult]
+
+_executor: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# True in worker processes. Calls to "pmap" in a worker are evaluated in that worker, so workers never start workers.
+_is_worker = False
+
+
+def parallel_map(
+        function: o.Function,
+        values: typing.Sequence[typing.Any],
+        env: Environment,
+        worker: ChunkWorker,
+        native: bool = False
+) -> typing.Optional[list[typing.Any]]:
+    """Call "function" on every value in "values" in worker processes, and return the results in order. Returns None if
+    the calls should be made in this process instead.
+
+    Calls are only made in workers if "function" is pure when called from "env" (see "analyze_function"), so the order
+    they happen in cannot be observed, and there are at least "PARALLEL_THRESHOLD" values. Workers get a copy of each
+    variable the function reads, directly or through the functions it calls, rather than the whole environment.
+
+    Like a for-loop, the error raised is the one for the first value whose call fails.
+
+    Lists of numbers are sent to workers through shared memory rather than by pickling each number, and so are the
+    results of calls that return numbers (see "shared_numbers"). Set "native" if "values" and the results of "worker"
+    are native values rather than "Expression" objects.
+    """
+    if not can_use_workers() or len(values) < PARALLEL_THRESHOLD:
+        return None
+
+    analysis = analyze_function(function, env)
+    if not analysis.is_pure:
+        return None
+
+    variables = {name: value for name, value in analysis.dependencies.items() if value is not None}
+
+    chunk_size = math.ceil(len(values) / (MAX_WORKERS * CHUNKS_PER_WORKER))
+    starts = range(0, len(values), chunk_size)
+
+    # Function calls return values at the line of the function (see "Evaluator.evaluate_function_call")
+    outputs = SharedNumbers(len(values), None if native else function.line_num)
+    inputs = pack(values)
+    try:
+        chunks: list[typing.Any] = [
+            inputs.slice(start, start + chunk_size) if inputs is not None else values[start:start + chunk_size]
+            for start in starts
+        ]
+        output_slices = [outputs.slice(start, start + chunk_size) for start in starts]
+
+        results: list[typing.Any] = []
+        chunk_results = get_executor().map(
+            evaluate_chunk,
+            itertools.repeat(worker),
+            itertools.repeat(function),
+            chunks,
+            itertools.repeat(variables),
+            output_slices
+        )
+        for output_slice, (chunk_result, error) in zip(output_slices, chunk_results):
+            if error is not None:
+                line_num, message = error
+                raise LanguageRuntimeException(line_num, message)
+            if chunk_result is None:
+                chunk_result = outputs.read(output_slice.start, output_slice.stop)
+            results += chunk_result
+
+    except BrokenProcessPool:
+        # A worker was killed (for example, by the operating system when it ran out of memory). The pool is replaced
+        # for later calls, and this one is evaluated in this process.
+        shutdown()
+        return None
+
+    finally:
+        outputs.close()
+        if inputs is not None:
+            inputs.close()
+
+    return results
+
+
+def evaluate_chunk(
+        worker: ChunkWorker,
+        function: o.Function,
+        chunk: typing.Sequence[typing.Any] | SharedSlice,
+        variables: dict[str, o.Expression],
+        output: SharedSlice
+) -> ChunkResult:
+    """Call "worker" in a worker process, reading the values from shared memory and writing the results to it if they
+    are numbers.
+    """
+    values = read_slice(chunk) if isinstance(chunk, SharedSlice) else chunk
+
+    results, error = worker(function, values, variables)
+    if results is None or error is not None:
+        return results, error
+
+    numbers = packable_numbers(results, output.line_num)
+    if numbers is None:
+        return results, error
+
+    write_slice(output, numbers)
+    return None, None
+
+
+def can_use_workers() -> bool:
+    return MAX_WORKERS >= 2 and not _is_worker
+
+
+def get_executor() -> concurrent.futures.ProcessPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=_start_worker)
+        return _executor
+
+
+def shutdown() -> None:
+    """Stop the worker processes. A new pool is started the next time one is needed."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _start_worker() -> None:
+    global _is_worker
+    _is_worker = True
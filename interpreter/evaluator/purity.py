@@ -0,0 +1,220 @@
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.parser_.builtin_ast_objects import BuiltinFunction, Print, Input, RandomInt, RandomFloat
+from interpreter.evaluator.environment_ import Environment
+
+# Builtin functions that read from or write to the outside world. An expression that can reach one of these is not
+# pure, so its result cannot be reused.
+IMPURE_BUILTINS: tuple[typing.Type[BuiltinFunction], ...] = (Print, Input, RandomInt, RandomFloat)
+
+# Builtin functions whose results are not determined by the program
+NONDETERMINISTIC_BUILTINS: tuple[typing.Type[BuiltinFunction], ...] = (Input, RandomInt, RandomFloat)
+
+
+class FunctionAnalysis:
+    """The result of analyzing a function's body in a particular environment.
+
+    Boomerang functions are dynamically scoped: any variable in a function body that is not a parameter (or defined in
+    the body) is looked up in the environment of the caller. Because of that, whether a function is pure depends on
+    what its free variables are bound to when it is called. "dependencies" records what each free variable was bound to
+    when the analysis ran (None if it was not defined), so the analysis can be reused for as long as those bindings
+    have not changed.
+    """
+
+    def __init__(self, is_pure: bool, dependencies: dict[str, typing.Optional[o.Expression]]) -> None:
+        self.is_pure = is_pure
+        self.dependencies = dependencies
+
+    def is_valid(self, env: Environment) -> bool:
+        """Check if the analysis still applies to calls made from "env".
+
+        Functions and builtins the body refers to must be the exact same objects. Data variables may have different
+        values (they are part of the cache key) but cannot have become functions, since those were never analyzed.
+        """
+        for name, value in self.dependencies.items():
+            current_value = env.get_var(name)
+
+            if value is None or is_callable(value):
+                if current_value is not value:
+                    return False
+            elif current_value is None or is_callable(current_value):
+                return False
+
+        return True
+
+
+def is_callable(value: o.Expression) -> bool:
+    return isinstance(value, o.Function) or isinstance(value, BuiltinFunction)
+
+
+def analyze_function(function: o.Function, env: Environment) -> FunctionAnalysis:
+    """Determine whether calling "function" from "env" can ever reach an impure builtin, directly or through the
+    functions it calls.
+    """
+    analyzer = _PurityAnalyzer(env)
+    is_pure = analyzer.visit_function(function, frozenset())
+    return FunctionAnalysis(is_pure, analyzer.dependencies)
+
+
+def analyze_expression(expression: o.Expression, env: Environment) -> FunctionAnalysis:
+    """Determine whether evaluating "expression" in "env" can ever reach an impure builtin. The dependencies of the
+    result include every variable read from "env", including those read by the functions the expression calls.
+    """
+    analyzer = _PurityAnalyzer(env)
+    is_pure = analyzer.visit(expression, frozenset(), assigned_names(expression))
+    return FunctionAnalysis(is_pure, analyzer.dependencies)
+
+
+class _PurityAnalyzer:
+    def __init__(self, env: Environment) -> None:
+        self.env = env
+        self.dependencies: dict[str, typing.Optional[o.Expression]] = {}
+
+        # IDs of the functions currently being analyzed. A recursive reference to one of these does not need to be
+        # analyzed again; the function is impure only if something else in its body is impure.
+        self.visiting: set[int] = set()
+
+    def visit_function(self, function: o.Function, bound: frozenset[str]) -> bool:
+        if id(function) in self.visiting:
+            return True
+
+        self.visiting.add(id(function))
+        try:
+            parameters = frozenset(p.value for p in function.parameters)
+            return self.visit(function.body, bound | parameters, assigned_names(function.body))
+        finally:
+            self.visiting.remove(id(function))
+
+    def visit(self, expression: o.Expression, bound: frozenset[str], local: frozenset[str]) -> bool:
+        """Check if "expression" is pure.
+
+        :param bound: names that are always defined in the current scope (parameters and for-loop elements), so they
+        are never looked up in the caller's environment.
+        :param local: names assigned somewhere in the current scope. These could still be read from the caller's
+        environment before they are assigned.
+        """
+        if isinstance(expression, BuiltinFunction):
+            return not isinstance(expression, IMPURE_BUILTINS)
+
+        elif isinstance(expression, o.Identifier):
+            return self.visit_identifier(expression.value, bound, local)
+
+        elif isinstance(expression, o.Function):
+            # The function might be called anywhere in the body, so it is analyzed as if it were.
+            return self.visit_function(expression, bound | local)
+
+        elif isinstance(expression, o.ForLoop):
+            loop_bound = bound | {expression.element_identifier}
+            loop_local = local | assigned_names(expression.conditional_expr) | assigned_names(expression.expression)
+            return self.visit(expression.values, bound, local) \
+                and self.visit(expression.conditional_expr, loop_bound, loop_local) \
+                and self.visit(expression.expression, loop_bound, loop_local)
+
+        return all(self.visit(child, bound, local) for child in children(expression))
+
+    def visit_identifier(self, name: str, bound: frozenset[str], local: frozenset[str]) -> bool:
+        if name in bound:
+            return True
+
+        value = self.env.get_var(name)
+        self.dependencies[name] = value
+
+        if value is None:
+            # An undefined variable raises an error when it is evaluated (unless it is assigned first), so there is no
+            # result to reuse.
+            return name in local
+
+        if isinstance(value, o.Function):
+            # The called function can see everything defined in the current scope
+            return self.visit_function(value, bound | local)
+
+        # Data values can contain functions (for example, a list of functions), so they are checked too.
+        return self.visit(value, bound, local)
+
+
+def is_deterministic(ast: list[o.Expression]) -> bool:
+    """Check if a program prints the same output and returns the same results every time it is run in a new
+    environment: none of its expressions, including those in functions it never calls, is a builtin in
+    "NONDETERMINISTIC_BUILTINS". Builtins are only ever created by the parser, so a program that does not mention one
+    cannot call it.
+    """
+    expressions = list(ast)
+    while len(expressions) > 0:
+        expression = expressions.pop()
+        if isinstance(expression, NONDETERMINISTIC_BUILTINS):
+            return False
+        expressions += children(expression)
+    return True
+
+
+def assigned_names(expression: o.Expression) -> frozenset[str]:
+    """Names of all variables assigned in "expression", excluding those in nested functions and for-loops (which get
+    their own environments).
+    """
+    if isinstance(expression, o.Assignment):
+        return frozenset({expression.name}) | assigned_names(expression.value)
+
+    elif isinstance(expression, o.Function):
+        return frozenset()
+
+    elif isinstance(expression, o.ForLoop):
+        return assigned_names(expression.values)
+
+    names: frozenset[str] = frozenset()
+    for child in children(expression):
+        names |= assigned_names(child)
+    return names
+
+
+def children(expression: o.Expression) -> list[o.Expression]:
+    """The direct sub-expressions of an AST node."""
+    if isinstance(expression, o.InfixExpression):
+        return [expression.left, expression.right]
+
+    elif isinstance(expression, o.PrefixExpression) or isinstance(expression, o.PostfixExpression):
+        return [expression.expression]
+
+    elif isinstance(expression, o.Assignment):
+        return [expression.value]
+
+    elif isinstance(expression, o.List) or isinstance(expression, o.SetLiteral):
+        return list(expression.values)
+
+    elif isinstance(expression, o.MapLiteral):
+        return [sub_expression for pair in expression.pairs for sub_expression in pair]
+
+    elif isinstance(expression, o.Map):
+        return [value for pair in expression.entries.items() for value in pair]
+
+    elif isinstance(expression, o.Set):
+        return expression.values
+
+    elif isinstance(expression, o.When):
+        sub_expressions = [expression.expression]
+        for condition, return_expression in expression.case_expressions:
+            sub_expressions += [condition, return_expression]
+        return sub_expressions
+
+    elif isinstance(expression, o.ForLoop):
+        return [expression.values, expression.conditional_expr, expression.expression]
+
+    elif isinstance(expression, o.Function):
+        return [expression.body]
+
+    elif isinstance(expression, o.FunctionCall):
+        return [expression.function, expression.call_params]
+
+    elif isinstance(expression, o.Constant):
+        return [expression.value]
+
+    elif isinstance(expression, o.LoopInvariant):
+        return [expression.expression]
+
+    elif isinstance(expression, o.InlinedCall):
+        return [expression.body]
+
+    elif isinstance(expression, o.SavedExpression):
+        return [expression.expression]
+
+    return []
@@ -0,0 +1,129 @@
+import array
+import typing
+from multiprocessing import shared_memory
+
+import interpreter.parser_.ast_objects as o
+
+# Bytes per number. Numbers are stored as C doubles, which is what Python's "float" is.
+NUMBER_SIZE = 8
+
+
+class SharedSlice(typing.NamedTuple):
+    """A handle to part of a list of numbers in shared memory (see "SharedNumbers"). Sending a handle to another
+    process only copies the handle, not the numbers.
+
+    "line_num" is the line number of the "Number" objects the numbers are read as, or None if they are read as native
+    values (see "native").
+    """
+
+    name: str
+    start: int
+    stop: int
+    line_num: typing.Optional[int]
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+
+class SharedNumbers:
+    """A list of numbers packed into a shared memory segment, which other processes can read from and write to
+    without sending the numbers to each other.
+
+    The process that creates the segment owns it, and must call "close" (or use it in a "with" block) to free it.
+    """
+
+    def __init__(self, size: int, line_num: typing.Optional[int]) -> None:
+        self.size = size
+        self.line_num = line_num
+
+        # Segments cannot be empty
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1) * NUMBER_SIZE)
+
+    def __enter__(self) -> "SharedNumbers":
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+    def slice(self, start: int, stop: int) -> SharedSlice:
+        return SharedSlice(self.memory.name, start, min(stop, self.size), self.line_num)
+
+    def write(self, numbers: list[float]) -> None:
+        write_numbers(self.memory, 0, numbers)
+
+    def read(self, start: int = 0, stop: typing.Optional[int] = None) -> list[typing.Any]:
+        return read_numbers(self.memory, self.slice(start, stop if stop is not None else self.size))
+
+
+def pack(values: typing.Sequence[typing.Any]) -> typing.Optional[SharedNumbers]:
+    """Copy "values" into shared memory, if they are all numbers that can be copied exactly. Returns None otherwise.
+
+    Native values are packed if they are all floats. "Number" objects are packed if their values are all floats and
+    they are all on the same line. Whole numbers from "len" and "round" are ints, which are not packed because ints
+    larger than 2 ** 53 cannot be stored exactly as doubles.
+    """
+    if len(values) == 0:
+        return None
+
+    line_num = values[0].line_num if isinstance(values[0], o.Number) else None
+    numbers = packable_numbers(values, line_num)
+    if numbers is None:
+        return None
+
+    shared = SharedNumbers(len(numbers), line_num)
+    shared.write(numbers)
+    return shared
+
+
+def packable_numbers(
+        values: typing.Sequence[typing.Any],
+        line_num: typing.Optional[int]
+) -> typing.Optional[list[float]]:
+    """Return the numbers in "values" if they can be packed and read back as the same values (see "SharedSlice"), or
+    None if they cannot.
+    """
+    if line_num is not None:
+        if not all(type(value) is o.Number and value.line_num == line_num for value in values):
+            return None
+        values = [value.value for value in values]
+
+    if not all(type(value) is float for value in values):
+        return None
+    return list(values)
+
+
+def read_slice(handle: SharedSlice) -> list[typing.Any]:
+    """Read the numbers a handle refers to, from a process other than the one that owns them."""
+    memory = shared_memory.SharedMemory(name=handle.name)
+    try:
+        return read_numbers(memory, handle)
+    finally:
+        memory.close()
+
+
+def write_slice(handle: SharedSlice, numbers: list[float]) -> None:
+    """Write numbers to the part of a segment a handle refers to, from a process other than the one that owns it."""
+    memory = shared_memory.SharedMemory(name=handle.name)
+    try:
+        write_numbers(memory, handle.start, numbers[:len(handle)])
+    finally:
+        memory.close()
+
+
+def read_numbers(memory: shared_memory.SharedMemory, handle: SharedSlice) -> list[typing.Any]:
+    """Read numbers as "Number" objects or native values (see "SharedSlice")."""
+    with typing.cast(memoryview, memory.buf).cast("d") as view:
+        numbers = view[handle.start:handle.stop].tolist()
+
+    if handle.line_num is None:
+        return numbers
+    return [o.Number(handle.line_num, number) for number in numbers]
+
+
+def write_numbers(memory: shared_memory.SharedMemory, start: int, numbers: list[float]) -> None:
+    with typing.cast(memoryview, memory.buf).cast("d") as view:
+        view[start:start + len(numbers)] = array.array("d", numbers)
@@ -0,0 +1,124 @@
+import concurrent.futures
+import typing
+from concurrent.futures.process import BrokenProcessPool
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator import parallel
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.purity import analyze_expression, assigned_names, children
+from interpreter.parser_.builtin_ast_objects import BuiltinFunction, ParallelMap
+from interpreter.tokens import tokens as t
+from utils.utils import LanguageRuntimeException
+
+# Values that "<-" adds an element to, rather than calls
+COLLECTION_LITERAL_TYPES = (o.List, o.MapLiteral, o.SetLiteral, o.Constant)
+
+# Evaluates an expression with the given global variables, in a worker process. Returns the value, or the line number
+# and message of the error that stopped it (see "ChunkResult" in "parallel"). Must be a module-level function so it can
+# be sent to worker processes.
+StatementWorker = typing.Callable[
+    [o.Expression, dict[str, o.Expression]],
+    tuple[typing.Any, typing.Optional[tuple[int, str]]]
+]
+
+
+class StatementScheduler:
+    """Evaluates the values of top-level assignments in worker processes while the statements before them run.
+
+    The top-level statements form a dependency graph: an assignment depends on every earlier statement that assigns a
+    variable its value reads, directly or through the functions it calls. Before statement "i" runs, each later
+    assignment that depends on nothing from statement "i" on, and whose value is pure (see "analyze_expression") and
+    does not assign variables of its own, is started in a worker. When the program reaches that assignment, the
+    variable is assigned the worker's value instead of evaluating it again. Pure values cannot print anything, and
+    errors are raised when their statement is reached, so the output, results, and errors of the program are the same
+    as if every statement ran in order.
+
+    Only assignments that call functions or contain for-loops are started in workers, since anything else is faster to
+    evaluate than to send to another process.
+    """
+
+    def __init__(self, statements: list[o.Expression], worker: StatementWorker) -> None:
+        self.statements = statements
+        self.worker = worker
+
+        # Variables each statement assigns in the global scope
+        self.assigned_names = [assigned_names(statement) for statement in statements]
+
+        # Indexes of the statements that could be evaluated in workers
+        self.candidates = {
+            index for index, statement in enumerate(statements)
+            if isinstance(statement, o.Assignment) and len(assigned_names(statement.value)) == 0
+            and has_calls_or_loops(statement.value)
+        }
+
+        self.futures: dict[int, concurrent.futures.Future[tuple[typing.Any, typing.Optional[tuple[int, str]]]]] = {}
+
+    @property
+    def is_enabled(self) -> bool:
+        return len(self.candidates) > 0 and parallel.can_use_workers()
+
+    def start_ready(self, index: int, env: Environment) -> None:
+        """Start the assignments after statement "index" that do not depend on it or anything after it. "env" is the
+        global environment before statement "index" runs.
+        """
+        if not self.is_enabled:
+            return
+
+        assigned: set[str] = set(self.assigned_names[index])
+        for later_index in range(index + 1, len(self.statements)):
+            if later_index in self.candidates and later_index not in self.futures:
+                assignment = typing.cast(o.Assignment, self.statements[later_index])
+
+                analysis = analyze_expression(assignment.value, env)
+                if analysis.is_pure and analysis.dependencies.keys().isdisjoint(assigned):
+                    variables = {name: value for name, value in analysis.dependencies.items() if value is not None}
+                    self.futures[later_index] = parallel.get_executor().submit(self.worker, assignment.value, variables)
+
+            assigned |= self.assigned_names[later_index]
+
+    def take(self, index: int) -> typing.Optional[typing.Any]:
+        """Return the value a worker computed for statement "index", or None if it has to be evaluated here. Raises
+        the error the value raised, if it raised one.
+        """
+        future = self.futures.pop(index, None)
+        if future is None:
+            return None
+
+        try:
+            value, error = future.result()
+        except BrokenProcessPool:
+            # See "parallel_map". Every statement that has not been taken yet is evaluated here instead.
+            self.cancel()
+            parallel.shutdown()
+            return None
+
+        if error is not None:
+            line_num, message = error
+            raise LanguageRuntimeException(line_num, message)
+        return value
+
+    def cancel(self) -> None:
+        """Stop the workers from starting statements that will not be used, such as after an error."""
+        for future in self.futures.values():
+            future.cancel()
+        self.futures.clear()
+        self.candidates.clear()
+
+
+def has_calls_or_loops(expression: o.Expression) -> bool:
+    """Check if evaluating "expression" calls a function (other than a builtin, except "pmap") or runs a for-loop."""
+    if isinstance(expression, o.Function):
+        # Defining a function does not evaluate its body
+        return False
+
+    elif isinstance(expression, o.ForLoop):
+        return True
+
+    elif isinstance(expression, o.InfixExpression) and expression.operator.type == t.SEND:
+        if isinstance(expression.left, ParallelMap):
+            return True
+        elif not isinstance(expression.left, BuiltinFunction) \
+                and not isinstance(expression.left, COLLECTION_LITERAL_TYPES):
+            return True
+
+    return any(has_calls_or_loops(child) for child in children(expression))
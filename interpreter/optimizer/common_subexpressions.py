@@ -0,0 +1,209 @@
+import collections
+import logging
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.purity import IMPURE_BUILTINS
+from interpreter.optimizer.transform import map_children, walk
+from interpreter.optimizer.type_inference import value_line_num
+from interpreter.parser_.builtin_ast_objects import BuiltinFunction, ParallelMap
+from interpreter.tokens import tokens as t
+
+logger = logging.getLogger(__name__)
+
+# Expressions that are already as cheap to evaluate as a saved value
+TRIVIAL_TYPES = (o.Number, o.String, o.Boolean, o.Constant, o.Identifier, o.Function, BuiltinFunction)
+
+# Values that "<-" adds an element to, rather than calls
+COLLECTION_LITERAL_TYPES = (o.List, o.MapLiteral, o.SetLiteral, o.Constant)
+
+# A root expression of a region, and whether it is certain to be evaluated when the region is
+RegionRoot = tuple[o.Expression, bool]
+
+
+def eliminate_common_subexpressions(ast: list[o.Expression]) -> list[o.Expression]:
+    eliminator = CommonSubexpressionEliminator()
+    return [eliminator.eliminate(expression) for expression in ast]
+
+
+class CommonSubexpressionEliminator:
+    """Evaluate identical pure sub-expressions once, and reuse the value for the others.
+
+    Sub-expressions are only reused within a region: a top-level statement, or the filter and body of a for-loop for a
+    single element. Function bodies are left alone, since a recursive call could replace a saved value before it is
+    reused. Sub-expressions are identical if they are made of the same nodes on the same lines, so reusing a value
+    cannot change the line numbers of results or errors.
+
+    A sub-expression is pure if it only reads variables that are not assigned in its region and only calls builtins
+    other than print, input, randint, and randfloat. Its value is saved the first time it is certain to be evaluated,
+    and reused everywhere after that, including in when-expression cases and the right sides of "and" and "or".
+    """
+
+    def __init__(self) -> None:
+        self.slot_count = 0
+
+    def eliminate(self, statement: o.Expression) -> o.Expression:
+        statement = self.eliminate_in_loops(statement)
+        [statement] = self.eliminate_in_region([(statement, True)])
+        return statement
+
+    def eliminate_in_loops(self, expression: o.Expression) -> o.Expression:
+        if isinstance(expression, o.Function):
+            return expression
+
+        expression = map_children(expression, self.eliminate_in_loops)
+
+        if isinstance(expression, o.ForLoop):
+            # The body is only certain to run if there is no filter
+            has_filter = expression.conditional_expr != o.Boolean(expression.line_num, True)
+            conditional_expr, body = self.eliminate_in_region(
+                [(expression.conditional_expr, True), (expression.expression, not has_filter)]
+            )
+            return o.ForLoop(
+                expression.line_num, expression.element_identifier, expression.values, conditional_expr, body
+            )
+
+        return expression
+
+    def eliminate_in_region(self, roots: list[RegionRoot]) -> list[o.Expression]:
+        nodes = [node for root, is_certain in roots for node, _ in region_nodes(root, is_certain)]
+        assigned = frozenset(node.name for node in nodes if isinstance(node, o.Assignment))
+
+        counts = collections.Counter(repr(node) for node in nodes if is_candidate(node, assigned))
+        repeated = {key for key, count in counts.items() if count > 1}
+        if len(repeated) == 0:
+            return [root for root, _ in roots]
+
+        rewriter = _RegionRewriter(self, repeated)
+        new_roots = [rewriter.rewrite(root, is_certain) for root, is_certain in roots]
+
+        # A saved value is not used if every later occurrence of it was part of a larger expression that was reused
+        return [rewriter.remove_unused_saves(root) for root in new_roots]
+
+    def new_slot(self) -> int:
+        self.slot_count += 1
+        return self.slot_count
+
+
+class _RegionRewriter:
+    def __init__(self, eliminator: CommonSubexpressionEliminator, repeated: set[str]) -> None:
+        self.eliminator = eliminator
+        self.repeated = repeated
+        self.saved_slots: dict[str, int] = {}
+        self.used_slots: set[int] = set()
+
+    def rewrite(self, expression: o.Expression, is_certain: bool) -> o.Expression:
+        key = repr(expression) if not isinstance(expression, TRIVIAL_TYPES) else None
+
+        if key in self.repeated:
+            slot = self.saved_slots.get(key, None)
+            if slot is not None:
+                self.used_slots.add(slot)
+                logger.debug(f"line {expression.line_num}: reused a saved {type(expression).__name__} value")
+                value_line = value_line_num(expression)
+                return o.SavedValue(value_line if value_line is not None else expression.line_num, slot)
+
+            if is_certain:
+                slot = self.saved_slots[key] = self.eliminator.new_slot()
+                inner = map_region_children(expression, is_certain, self.rewrite)
+                return o.SavedExpression(expression.line_num, inner, slot)
+
+        return map_region_children(expression, is_certain, self.rewrite)
+
+    def remove_unused_saves(self, expression: o.Expression) -> o.Expression:
+        if isinstance(expression, o.Function):
+            return expression
+
+        expression = map_children(expression, self.remove_unused_saves)
+        if isinstance(expression, o.SavedExpression) and expression.slot not in self.used_slots:
+            return expression.expression
+        return expression
+
+
+def region_nodes(expression: o.Expression, is_certain: bool) -> typing.Iterator[tuple[o.Expression, bool]]:
+    """Yield the nodes of a region in the order they are evaluated, with whether each is certain to be evaluated.
+    Function bodies, and the filters and bodies of for-loops, are not part of the region.
+    """
+    yield expression, is_certain
+
+    children: list[RegionRoot] = []
+
+    def collect(child: o.Expression, child_is_certain: bool) -> o.Expression:
+        children.append((child, child_is_certain))
+        return child
+
+    map_region_children(expression, is_certain, collect)
+    for child, child_is_certain in children:
+        yield from region_nodes(child, child_is_certain)
+
+
+def map_region_children(
+        expression: o.Expression,
+        is_certain: bool,
+        transform: typing.Callable[[o.Expression, bool], o.Expression]
+) -> o.Expression:
+    """Like "map_children", for the children of "expression" that belong to its region, in the order they are
+    evaluated. "transform" is also told whether each child is certain to be evaluated.
+    """
+    if isinstance(expression, o.Function):
+        return expression
+
+    elif isinstance(expression, o.ForLoop):
+        return o.ForLoop(
+            expression.line_num,
+            expression.element_identifier,
+            transform(expression.values, is_certain),
+            expression.conditional_expr,
+            expression.expression
+        )
+
+    elif isinstance(expression, o.InfixExpression) and expression.operator.type in {t.AND, t.OR}:
+        # The right side is skipped if the left side determines the result
+        infix_type = type(expression)
+        return infix_type(
+            expression.line_num,
+            transform(expression.left, is_certain),
+            expression.operator,
+            transform(expression.right, False)
+        )
+
+    elif isinstance(expression, o.When):
+        # Only the switch expression and the first condition are always evaluated
+        switch_expression = transform(expression.expression, is_certain)
+        case_expressions = []
+        for index, (condition, result) in enumerate(expression.case_expressions):
+            condition = transform(condition, is_certain and index == 0)
+            case_expressions.append((condition, transform(result, False)))
+
+        when_type = type(expression)
+        return when_type(expression.line_num, switch_expression, case_expressions)
+
+    return map_children(expression, lambda child: transform(child, is_certain))
+
+
+def is_candidate(expression: o.Expression, assigned: frozenset[str]) -> bool:
+    """Check if the value of "expression" can be reused by identical expressions in a region that assigns the
+    variables in "assigned".
+    """
+    if isinstance(expression, TRIVIAL_TYPES):
+        return False
+
+    for node in walk(expression):
+        if isinstance(node, o.Assignment) or isinstance(node, o.Function) or isinstance(node, o.ForLoop):
+            return False
+
+        elif isinstance(node, o.InlinedCall):
+            # Each inlined call is a step, like the call it replaces (see "ExecutionLimits")
+            return False
+
+        elif isinstance(node, o.Identifier) and node.value in assigned:
+            return False
+
+        elif isinstance(node, o.InfixExpression) and node.operator.type == t.SEND:
+            # "pmap" calls the function it is given, which might not be pure
+            is_pure_builtin = isinstance(node.left, BuiltinFunction) \
+                and not isinstance(node.left, IMPURE_BUILTINS) and not isinstance(node.left, ParallelMap)
+            if not is_pure_builtin and not isinstance(node.left, COLLECTION_LITERAL_TYPES):
+                return False
+
+    return True
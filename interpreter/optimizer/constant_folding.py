@@ -0,0 +1,144 @@
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.evaluator import is_short_circuit
+from interpreter.optimizer.transform import map_children
+from interpreter.tokens import tokens as t
+from utils.persistent_map import PersistentMap
+from utils.utils import LanguageRuntimeException
+
+# Operators that are folded, mapped to the names of the methods that implement them (see "Evaluator"). Factorial and
+# exponentiation are left alone: their results can be arbitrarily expensive to compute, and that cost should only be
+# paid if the program actually reaches them.
+INFIX_OPERATIONS: dict[str, str] = {
+    t.PLUS: "add",
+    t.MINUS: "sub",
+    t.MULTIPLY: "mul",
+    t.DIVIDE: "div",
+    t.MOD: "mod",
+    t.EQ: "eq",
+    t.NE: "ne",
+    t.GT: "gt",
+    t.GE: "ge",
+    t.LT: "lt",
+    t.LE: "le",
+    t.AND: "and_",
+    t.OR: "or_",
+    t.XOR: "xor",
+    t.IN: "contains",
+}
+
+PREFIX_OPERATIONS: dict[str, str] = {
+    t.PLUS: "abs",
+    t.MINUS: "neg",
+    t.NOT: "not_",
+    t.PACK: "pack",
+}
+
+POSTFIX_OPERATIONS: dict[str, str] = {
+    t.INC: "inc",
+    t.DEC: "dec",
+}
+
+# Values that evaluate to themselves
+SCALAR_TYPES = (o.Number, o.String, o.Boolean)
+
+
+def fold_constants(ast: list[o.Expression]) -> list[o.Expression]:
+    return [fold(expression) for expression in ast]
+
+
+def fold(expression: o.Expression) -> o.Expression:
+    """Replace sub-expressions that only involve literals with their values.
+
+    Collections made entirely of constants are built once and wrapped in "Constant", so evaluating them returns the
+    same prebuilt value instead of a new copy. If computing a value raises an error (for example, dividing by zero),
+    the expression is left as it is so the error is still raised, with the same message and line number, if and when
+    the program reaches it.
+    """
+    expression = map_children(expression, fold)
+
+    if isinstance(expression, o.InfixExpression):
+        if is_short_circuit(expression.left, expression.operator):
+            # The right side is never evaluated, so it does not need to be constant
+            return expression.left
+
+        method_name = INFIX_OPERATIONS.get(expression.operator.type, None)
+        if method_name is not None and is_constant(expression.left) and is_constant(expression.right):
+            left = constant_value(expression.left)
+            return fold_operation(expression, method_name, left, constant_value(expression.right))
+
+    elif isinstance(expression, o.PrefixExpression):
+        method_name = PREFIX_OPERATIONS.get(expression.operator.type, None)
+        if method_name is not None and is_constant(expression.expression):
+            return fold_operation(expression, method_name, constant_value(expression.expression))
+
+    elif isinstance(expression, o.PostfixExpression):
+        method_name = POSTFIX_OPERATIONS.get(expression.operator.type, None)
+        if method_name is not None and is_constant(expression.expression):
+            return fold_operation(expression, method_name, constant_value(expression.expression))
+
+    elif isinstance(expression, o.List):
+        if all(is_constant(value) for value in expression.values):
+            values = [constant_value(value) for value in expression.values]
+            return o.Constant(expression.line_num, o.List(expression.line_num, values))
+
+    elif isinstance(expression, o.MapLiteral):
+        if all(is_constant(key) and is_constant(value) for key, value in expression.pairs):
+            return fold_map(expression)
+
+    elif isinstance(expression, o.SetLiteral):
+        if all(is_constant(value) for value in expression.values):
+            return fold_set(expression)
+
+    # Inlined calls are kept even if their bodies are folded, because each one is a step (see "ExecutionLimits")
+    return expression
+
+
+def fold_operation(
+        expression: o.Expression,
+        method_name: str,
+        operand: o.Expression,
+        *arguments: o.Expression
+) -> o.Expression:
+    """Call the method that implements an operator on constant operands. If the operation fails, "expression" is
+    returned unchanged.
+    """
+    try:
+        result: o.Expression = getattr(operand, method_name)(*arguments)
+    except (LanguageRuntimeException, ArithmeticError):
+        return expression
+    return as_constant(result)
+
+
+def fold_map(map_literal: o.MapLiteral) -> o.Expression:
+    new_map = o.Map(map_literal.line_num, PersistentMap())
+    try:
+        for key, value in map_literal.pairs:
+            new_map = new_map.set_entry(constant_value(key), constant_value(value))
+    except LanguageRuntimeException:
+        return map_literal
+    return o.Constant(map_literal.line_num, new_map)
+
+
+def fold_set(set_literal: o.SetLiteral) -> o.Expression:
+    new_set = o.Set(set_literal.line_num, PersistentMap())
+    try:
+        for value in set_literal.values:
+            new_set = new_set.add_value(constant_value(value))
+    except LanguageRuntimeException:
+        return set_literal
+    return o.Constant(set_literal.line_num, new_set)
+
+
+def is_constant(expression: o.Expression) -> bool:
+    return isinstance(expression, SCALAR_TYPES) or isinstance(expression, o.Constant)
+
+
+def constant_value(expression: o.Expression) -> o.Expression:
+    return expression.value if isinstance(expression, o.Constant) else expression
+
+
+def as_constant(value: o.Expression) -> o.Expression:
+    """Wrap "value" so that it is treated as a value, rather than a literal, by the evaluator."""
+    if isinstance(value, SCALAR_TYPES):
+        return value
+    return o.Constant(value.line_num, value)
@@ -0,0 +1,30 @@
+import logging
+
+import interpreter.parser_.ast_objects as o
+from interpreter.optimizer.transform import map_children, walk
+
+logger = logging.getLogger(__name__)
+
+
+def remove_unused_assignments(ast: list[o.Expression]) -> list[o.Expression]:
+    """Replace assignments to variables that are never read with the values being assigned, so the values (and any
+    side effects they have) are still evaluated.
+
+    Boomerang is dynamically scoped, so a variable assigned anywhere could be read by any function. A variable is
+    only unused if no identifier anywhere in the program refers to it. This pass must not run if the variables will be
+    read after the program finishes, such as by later inputs in the REPL.
+    """
+    referenced_names = {
+        node.value for statement in ast for node in walk(statement) if isinstance(node, o.Identifier)
+    }
+    return [remove(statement, referenced_names) for statement in ast]
+
+
+def remove(expression: o.Expression, referenced_names: set[str]) -> o.Expression:
+    expression = map_children(expression, lambda child: remove(child, referenced_names))
+
+    if isinstance(expression, o.Assignment) and expression.name not in referenced_names:
+        logger.debug(f"line {expression.line_num}: removed assignment to unused variable \"{expression.name}\"")
+        return expression.value
+
+    return expression
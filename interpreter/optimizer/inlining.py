@@ -0,0 +1,159 @@
+import collections
+
+import interpreter.parser_.ast_objects as o
+from interpreter.parser_.builtin_ast_objects import BuiltinFunction
+from interpreter.optimizer.transform import map_children, walk
+from interpreter.tokens import tokens as t
+
+# Largest function body, in AST nodes, that is inlined
+DEFAULT_MAX_INLINE_SIZE = 16
+
+# Arguments that always evaluate to themselves, so they can be substituted for parameters
+LITERAL_TYPES = (o.Number, o.String, o.Boolean)
+
+# Values that "<-" adds an element to, rather than calls
+COLLECTION_LITERAL_TYPES = (o.List, o.MapLiteral, o.SetLiteral, o.Constant)
+
+
+def inline_functions(ast: list[o.Expression], max_size: int = DEFAULT_MAX_INLINE_SIZE) -> list[o.Expression]:
+    """Replace calls to small functions with the bodies of those functions.
+
+    A function is inlined if it is assigned to a name in a top-level statement, and that name is not bound anywhere else
+    in the program (by another assignment, a parameter, or a for-loop element), so every call through that name after
+    the statement calls the same function. Its body must have at most "max_size" nodes, and cannot assign variables,
+    define functions, contain for-loops, or call anything other than builtins (once the calls in it have been
+    inlined). That means it is not recursive and, because Boomerang is dynamically scoped, no other function can read
+    its parameters.
+
+    A call is inlined if it comes after the function's definition and has the right number of arguments, and each
+    argument is either a literal or a variable that is certainly defined, so evaluating the arguments early (or not at
+    all) cannot change the program's output or errors. The body's other variables are looked up in the caller's scope,
+    which is where the function would have looked them up.
+    """
+    inliner = Inliner(count_bindings(ast), max_size)
+
+    new_ast: list[o.Expression] = []
+    for statement in ast:
+        statement = inliner.inline(statement, frozenset(inliner.defined_names))
+        new_ast.append(statement)
+        inliner.add_definitions(statement)
+    return new_ast
+
+
+class Inliner:
+    def __init__(self, binding_counts: dict[str, int], max_size: int) -> None:
+        self.binding_counts = binding_counts
+        self.max_size = max_size
+
+        # Functions that can be inlined, by the names they are assigned to
+        self.functions: dict[str, o.Function] = {}
+
+        # Variables assigned by the top-level statements seen so far, which are defined for the rest of the program
+        self.defined_names: set[str] = set()
+
+    def add_definitions(self, statement: o.Expression) -> None:
+        """Record the variables defined by a top-level statement, and the functions it defines that can be inlined."""
+        while isinstance(statement, o.Assignment):
+            self.defined_names.add(statement.name)
+
+            if isinstance(statement.value, o.Function) and self.binding_counts[statement.name] == 1 \
+                    and self.can_inline(statement.value):
+                self.functions[statement.name] = statement.value
+
+            statement = statement.value
+
+    def can_inline(self, function: o.Function) -> bool:
+        body_nodes = list(walk(function.body))
+        if len(body_nodes) > self.max_size:
+            return False
+
+        for node in body_nodes:
+            if isinstance(node, o.Assignment) or isinstance(node, o.Function) or isinstance(node, o.ForLoop):
+                return False
+
+            if isinstance(node, o.InfixExpression) and node.operator.type == t.SEND and not is_builtin_or_literal(node.left):
+                return False
+
+        return True
+
+    def inline(self, expression: o.Expression, defined_names: frozenset[str]) -> o.Expression:
+        """Inline calls in "expression".
+
+        :param defined_names: variables that are certainly defined wherever "expression" is evaluated.
+        """
+        if isinstance(expression, o.Function):
+            parameters = frozenset(parameter.value for parameter in expression.parameters)
+            body = self.inline(expression.body, defined_names | parameters)
+            return o.Function(expression.line_num, expression.parameters, body)
+
+        elif isinstance(expression, o.ForLoop):
+            loop_defined_names = defined_names | {expression.element_identifier}
+            return o.ForLoop(
+                expression.line_num,
+                expression.element_identifier,
+                self.inline(expression.values, defined_names),
+                self.inline(expression.conditional_expr, loop_defined_names),
+                self.inline(expression.expression, loop_defined_names)
+            )
+
+        expression = map_children(expression, lambda child: self.inline(child, defined_names))
+
+        if isinstance(expression, o.InfixExpression) and expression.operator.type == t.SEND:
+            return self.inline_call(expression, defined_names)
+
+        return expression
+
+    def inline_call(self, call: o.InfixExpression, defined_names: frozenset[str]) -> o.Expression:
+        if not isinstance(call.left, o.Identifier) or not isinstance(call.right, o.List):
+            return call
+
+        function = self.functions.get(call.left.value, None)
+        if function is None:
+            return call
+
+        arguments = call.right.values
+        if len(arguments) != len(function.parameters):
+            # Left as a call so the error is raised as usual
+            return call
+
+        if not all(is_substitutable(argument, defined_names) for argument in arguments):
+            return call
+
+        substitutions = {parameter.value: argument for parameter, argument in zip(function.parameters, arguments)}
+
+        # A function's return value is at the line of the function value, which is where the call's identifier is
+        return o.InlinedCall(call.left.line_num, substitute(function.body, substitutions))
+
+
+def is_builtin_or_literal(expression: o.Expression) -> bool:
+    return isinstance(expression, BuiltinFunction) or isinstance(expression, COLLECTION_LITERAL_TYPES)
+
+
+def is_substitutable(argument: o.Expression, defined_names: frozenset[str]) -> bool:
+    if isinstance(argument, LITERAL_TYPES):
+        return True
+    return isinstance(argument, o.Identifier) and argument.value in defined_names
+
+
+def substitute(expression: o.Expression, substitutions: dict[str, o.Expression]) -> o.Expression:
+    if isinstance(expression, o.Identifier) and expression.value in substitutions:
+        # Parameters are relocated to the line where they are used (see "Evaluator.evaluate_identifier"), and so are
+        # the arguments that replace them
+        return substitutions[expression.value].relocate(expression.line_num)
+
+    return map_children(expression, lambda child: substitute(child, substitutions))
+
+
+def count_bindings(ast: list[o.Expression]) -> dict[str, int]:
+    """Count the places each name is bound: assignments, function parameters, and for-loop elements."""
+    counts: dict[str, int] = collections.defaultdict(int)
+    for statement in ast:
+        for node in walk(statement):
+            if isinstance(node, o.Assignment):
+                counts[node.name] += 1
+            elif isinstance(node, o.ForLoop):
+                counts[node.element_identifier] += 1
+            elif isinstance(node, o.Function):
+                for parameter in node.parameters:
+                    counts[parameter.value] += 1
+    return counts
@@ -0,0 +1,24 @@
+import interpreter.parser_.ast_objects as o
+from interpreter.optimizer.constant_folding import is_constant
+from interpreter.optimizer.transform import map_children
+
+
+def compile_jump_tables(ast: list[o.Expression]) -> list[o.Expression]:
+    return [compile_jump_table(expression) for expression in ast]
+
+
+def compile_jump_table(expression: o.Expression) -> o.Expression:
+    """Replace "when" expressions whose cases are all constants with "JumpTableWhen".
+
+    Cases that are not constants could have side effects or raise errors, so they must still be evaluated one at a time
+    in order. "when" expressions with any of those are left as they are.
+    """
+    expression = map_children(expression, compile_jump_table)
+
+    if isinstance(expression, o.When) and not isinstance(expression, o.JumpTableWhen):
+        # The last case is "else", which is compared the same way with or without a table
+        conditions = [condition for condition, _ in expression.case_expressions[:-1]]
+        if all(is_constant(condition) for condition in conditions):
+            return o.JumpTableWhen(expression.line_num, expression.expression, expression.case_expressions)
+
+    return expression
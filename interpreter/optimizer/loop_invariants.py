@@ -0,0 +1,77 @@
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.purity import assigned_names
+from interpreter.optimizer.transform import map_children, walk
+from interpreter.parser_.builtin_ast_objects import BuiltinFunction
+
+# Expressions that are already as cheap to evaluate as a saved value
+TRIVIAL_TYPES = (
+    o.Number, o.String, o.Boolean, o.Constant, o.Identifier, o.Function, BuiltinFunction, o.LoopInvariant, o.SavedValue
+)
+
+
+def hoist_loop_invariants(ast: list[o.Expression]) -> list[o.Expression]:
+    return [hoist(expression) for expression in ast]
+
+
+def hoist(expression: o.Expression) -> o.Expression:
+    """Mark the loop-invariant sub-expressions in the filter and body of every for-loop in "expression".
+
+    Only the syntactic part of the check happens here: an invariant cannot mention the loop's element or any variable
+    assigned in the loop, and cannot assign variables itself. Whether it is pure, and whether the functions it calls
+    read varying variables, depends on what its identifiers are bound to, so the evaluator checks that when the loop
+    runs (see "Evaluator.evaluate_loop_invariant").
+    """
+    # Inner loops are handled first, so the invariants of an inner loop can themselves be part of an expression that
+    # is invariant in the outer loop.
+    expression = map_children(expression, hoist)
+
+    if isinstance(expression, o.ForLoop):
+        varying_names = frozenset({expression.element_identifier}) \
+            | assigned_names(expression.conditional_expr) \
+            | assigned_names(expression.expression)
+
+        return o.ForLoop(
+            expression.line_num,
+            expression.element_identifier,
+            expression.values,
+            mark_invariants(expression.conditional_expr, varying_names),
+            mark_invariants(expression.expression, varying_names)
+        )
+
+    return expression
+
+
+def mark_invariants(expression: o.Expression, varying_names: frozenset[str]) -> o.Expression:
+    """Wrap the largest invariant sub-expressions of "expression" in "LoopInvariant"."""
+    if is_invariant(expression, varying_names):
+        if isinstance(expression, TRIVIAL_TYPES):
+            return expression
+        return o.LoopInvariant(expression.line_num, expression, varying_names)
+
+    if isinstance(expression, o.Function):
+        # Function bodies are evaluated wherever the function is called, not necessarily in this loop
+        return expression
+
+    if isinstance(expression, o.ForLoop):
+        # The filter and body of a nested loop belong to that loop. Only its values are evaluated in this loop.
+        return o.ForLoop(
+            expression.line_num,
+            expression.element_identifier,
+            mark_invariants(expression.values, varying_names),
+            expression.conditional_expr,
+            expression.expression
+        )
+
+    return map_children(expression, lambda child: mark_invariants(child, varying_names))
+
+
+def is_invariant(expression: o.Expression, varying_names: frozenset[str]) -> bool:
+    for sub_expression in walk(expression):
+        if isinstance(sub_expression, o.Identifier) and sub_expression.value in varying_names:
+            return False
+        if isinstance(sub_expression, o.Assignment):
+            return False
+        if isinstance(sub_expression, o.SavedValue):
+            # The saved value might have been computed from the loop's element
+            return False
+    return True
@@ -0,0 +1,58 @@
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.optimizer.common_subexpressions import eliminate_common_subexpressions
+from interpreter.optimizer.constant_folding import fold_constants
+from interpreter.optimizer.dead_assignments import remove_unused_assignments
+from interpreter.optimizer.inlining import inline_functions, DEFAULT_MAX_INLINE_SIZE
+from interpreter.optimizer.jump_tables import compile_jump_tables
+from interpreter.optimizer.loop_invariants import hoist_loop_invariants
+from interpreter.optimizer.type_inference import infer_types
+
+OptimizationPass = typing.Callable[[list[o.Expression]], list[o.Expression]]
+
+# Passes run in this order
+PASSES: list[OptimizationPass] = [
+    fold_constants,
+    eliminate_common_subexpressions,
+    compile_jump_tables,
+    infer_types,
+    hoist_loop_invariants,
+]
+
+
+def optimize(
+        ast: list[o.Expression],
+        max_inline_size: int = DEFAULT_MAX_INLINE_SIZE,
+        keep_unused_variables: bool = False
+) -> list[o.Expression]:
+    """Rewrite a parsed program into an equivalent program that is faster to evaluate.
+
+    The result of evaluating the optimized program, including its output and any errors (with their messages and line
+    numbers), is the same as for the original.
+
+    "max_inline_size" is the size of the largest function that is inlined at its call sites (see "inline_functions").
+    Use 0 to disable inlining.
+
+    Assignments to variables the program never reads are removed (see "remove_unused_assignments"). Set
+    "keep_unused_variables" to True if the variables are read after the program finishes, like in the REPL.
+
+    What the optimizer removes is logged at the DEBUG level.
+
+    Raises a LanguageRuntimeException if the program is certain to fail with a type error before it does anything else
+    (see "infer_types").
+    """
+    # Inlining runs first so the other passes can optimize inlined bodies together with the code around them
+    ast = inline_functions(ast, max_inline_size)
+
+    # Inlining can leave the variables that functions were assigned to unused
+    if not keep_unused_variables:
+        ast = remove_unused_assignments(ast)
+
+    for optimization_pass in PASSES:
+        if optimization_pass is infer_types:
+            # Assignments to variables that are kept can be observed, so type errors after them are left to runtime
+            ast = infer_types(ast, keep_unused_variables)
+        else:
+            ast = optimization_pass(ast)
+    return ast
@@ -0,0 +1,77 @@
+import typing
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.purity import children
+
+Transform = typing.Callable[[o.Expression], o.Expression]
+
+
+def map_children(expression: o.Expression, transform: Transform) -> o.Expression:
+    """Return a copy of "expression" with "transform" applied to each of its direct sub-expressions.
+
+    Nodes without sub-expressions (values, identifiers, builtins, constants) are returned unchanged. The original
+    node is never modified.
+    """
+    if isinstance(expression, o.InfixExpression):
+        infix_type = type(expression)
+        return infix_type(
+            expression.line_num, transform(expression.left), expression.operator, transform(expression.right)
+        )
+
+    elif isinstance(expression, o.PrefixExpression):
+        return o.PrefixExpression(expression.line_num, expression.operator, transform(expression.expression))
+
+    elif isinstance(expression, o.PostfixExpression):
+        return o.PostfixExpression(expression.line_num, expression.operator, transform(expression.expression))
+
+    elif isinstance(expression, o.Assignment):
+        return o.Assignment(expression.line_num, expression.name, transform(expression.value))
+
+    elif isinstance(expression, o.List):
+        return o.List(expression.line_num, [transform(value) for value in expression.values])
+
+    elif isinstance(expression, o.MapLiteral):
+        return o.MapLiteral(
+            expression.line_num, [(transform(key), transform(value)) for key, value in expression.pairs]
+        )
+
+    elif isinstance(expression, o.SetLiteral):
+        return o.SetLiteral(expression.line_num, [transform(value) for value in expression.values])
+
+    elif isinstance(expression, o.When):
+        when_type = type(expression)
+        return when_type(
+            expression.line_num,
+            transform(expression.expression),
+            [(transform(condition), transform(result)) for condition, result in expression.case_expressions]
+        )
+
+    elif isinstance(expression, o.ForLoop):
+        return o.ForLoop(
+            expression.line_num,
+            expression.element_identifier,
+            transform(expression.values),
+            transform(expression.conditional_expr),
+            transform(expression.expression)
+        )
+
+    elif isinstance(expression, o.Function):
+        return o.Function(expression.line_num, expression.parameters, transform(expression.body))
+
+    elif isinstance(expression, o.LoopInvariant):
+        return o.LoopInvariant(expression.line_num, transform(expression.expression), expression.varying_names)
+
+    elif isinstance(expression, o.InlinedCall):
+        return o.InlinedCall(expression.line_num, transform(expression.body))
+
+    elif isinstance(expression, o.SavedExpression):
+        return o.SavedExpression(expression.line_num, transform(expression.expression), expression.slot)
+
+    return expression
+
+
+def walk(expression: o.Expression) -> typing.Iterator[o.Expression]:
+    """Yield "expression" and all of its sub-expressions, including those in nested functions and for-loops."""
+    yield expression
+    for child in children(expression):
+        yield from walk(child)
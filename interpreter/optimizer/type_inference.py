@@ -0,0 +1,447 @@
+import typing
+
+import interpreter.parser_.ast_objects as o
+import interpreter.parser_.builtin_ast_objects as bo
+from interpreter.evaluator.purity import assigned_names
+from interpreter.tokens import tokens as t
+from interpreter.tokens.token import Token
+from utils.persistent_map import PersistentMap
+
+
+class ValueType:
+    """What is known, before a program runs, about the value an expression evaluates to.
+
+    "value_type" is the class of the value (such as "Number"), or None if it cannot be determined. For lists,
+    "element_type" describes every element (None if the elements can have different or unknown types).
+    """
+
+    def __init__(
+            self,
+            value_type: typing.Optional[typing.Type[o.Expression]] = None,
+            element_type: typing.Optional["ValueType"] = None
+    ) -> None:
+        self.value_type = value_type
+        self.element_type = element_type
+
+    @property
+    def is_known(self) -> bool:
+        return self.value_type is not None
+
+    @property
+    def element(self) -> "ValueType":
+        return self.element_type if self.element_type is not None else UNKNOWN
+
+    def is_a(self, value_type: typing.Type[o.Expression]) -> bool:
+        return self.value_type is value_type
+
+    def join(self, other: "ValueType") -> "ValueType":
+        """The type of a value that could come from either "self" or "other"."""
+        if self.value_type is not other.value_type:
+            return UNKNOWN
+        if self.is_a(o.List):
+            return ValueType(o.List, self.element.join(other.element))
+        return self
+
+
+UNKNOWN = ValueType()
+NUMBER = ValueType(o.Number)
+STRING = ValueType(o.String)
+BOOLEAN = ValueType(o.Boolean)
+
+# Types returned by builtin functions when they do not raise an error
+BUILTIN_RESULT_TYPES: dict[typing.Type[bo.BuiltinFunction], ValueType] = {
+    bo.Length: NUMBER,
+    bo.Range: ValueType(o.List, NUMBER),
+    bo.Round: NUMBER,
+    bo.RandomInt: NUMBER,
+    bo.RandomFloat: NUMBER,
+    bo.Input: STRING,
+    bo.Format: STRING,
+    bo.ParallelMap: ValueType(o.List),
+}
+
+ARITHMETIC_OPERATORS = {t.PLUS, t.MINUS, t.MULTIPLY, t.DIVIDE, t.MOD, t.PACK}
+COMPARISON_OPERATORS = {t.GT, t.GE, t.LT, t.LE, t.EQ, t.NE}
+
+# Operators on two numbers that can still raise an error, for example by dividing by zero
+RAISING_NUMBER_OPERATORS = {t.DIVIDE, t.MOD, t.PACK}
+
+# Operators whose type errors are reported before the program runs, mapped to the methods that implement them. For
+# these, whether an error is raised depends only on the types of the operands when the operands are sample values.
+INFIX_METHODS: dict[str, str] = {
+    t.PLUS: "add",
+    t.MINUS: "sub",
+    t.MULTIPLY: "mul",
+    t.DIVIDE: "div",
+    t.MOD: "mod",
+    t.PACK: "pow",
+    t.GT: "gt",
+    t.GE: "ge",
+    t.LT: "lt",
+    t.LE: "le",
+    t.XOR: "xor",
+    t.IN: "contains",
+}
+
+PREFIX_METHODS: dict[str, str] = {
+    t.PLUS: "abs",
+    t.MINUS: "neg",
+    t.NOT: "not_",
+    t.PACK: "pack",
+}
+
+POSTFIX_METHODS: dict[str, str] = {
+    t.BANG: "fac",
+    t.INC: "inc",
+    t.DEC: "dec",
+}
+
+
+def infer_types(ast: list[o.Expression], keep_unused_variables: bool = False) -> list[o.Expression]:
+    """Specialize operations on values whose types can be proven before the program runs, and report operations that
+    will always raise a type error.
+
+    Arithmetic and comparisons on two numbers become "NumberInfixExpression", which skips the type checks. A type
+    error is raised (as a LanguageRuntimeException, with the same message and line number as at runtime) for an
+    operation that is certain to run, and to be the first thing the program does that can be observed, such as
+    "1 + true;" at the top level. Operations in functions, when-expression branches, and for-loop bodies might never
+    run, and operations after anything that could print, read input, or raise an error (like "print <- (1,);" or
+    "1 / 0;") must not fail before it, so those are left to fail at runtime.
+
+    Set "keep_unused_variables" to True if the variables are read after the program finishes, like in the REPL. Then
+    assignments can be observed too.
+    """
+    inference = TypeInference(keep_unused_variables)
+    return [inference.infer(expression, is_certain=True)[0] for expression in ast]
+
+
+class TypeInference:
+    def __init__(self, assignments_are_observed: bool = False) -> None:
+        self.assignments_are_observed = assignments_are_observed
+
+        # Whether everything inferred so far is certain to have no effect that can be observed (see "is_unobservable").
+        # Type errors are only reported while this is True, because at runtime the effects would come first.
+        self.is_unobserved = True
+
+        # Types of the variables assigned so far in the current scope. Variables that are not in this dictionary (such
+        # as those defined in earlier REPL inputs or a caller's scope) are unknown.
+        self.variable_types: dict[str, ValueType] = {}
+
+        # Types of the values of common sub-expressions, by slot (see "SavedExpression"). Shared by every scope.
+        self.saved_types: dict[int, ValueType] = {}
+
+    def infer(self, expression: o.Expression, is_certain: bool) -> tuple[o.Expression, ValueType]:
+        """Infer the type of "expression", following the order in which the evaluator evaluates it.
+
+        :param is_certain: whether "expression" is always evaluated when the statement containing it runs. Only type
+        errors in these expressions are reported.
+        """
+        result, result_type = self.infer_expression(expression, is_certain)
+
+        # Sub-expressions were inferred, and checked, before this
+        if not self.is_unobservable(result):
+            self.is_unobserved = False
+        return result, result_type
+
+    def is_unobservable(self, expression: o.Expression) -> bool:
+        """Check if evaluating "expression", not counting its sub-expressions, is certain not to print, read input,
+        raise an error, or (if "assignments_are_observed") assign a variable.
+        """
+        if isinstance(expression, o.Identifier):
+            # Variables with known types were assigned, so reading them does not raise an error
+            return self.variable_types.get(expression.value, UNKNOWN).is_known
+
+        elif isinstance(expression, o.Assignment):
+            return not self.assignments_are_observed
+
+        elif isinstance(expression, o.NumberInfixExpression):
+            return expression.operator.type not in RAISING_NUMBER_OPERATORS
+
+        return any(isinstance(expression, expression_type) for expression_type in [
+            o.Number, o.String, o.Boolean, o.Constant, o.Function, bo.BuiltinFunction, o.List, o.LoopInvariant,
+            o.SavedExpression, o.SavedValue
+        ])
+
+    def can_report(self, is_certain: bool) -> bool:
+        return is_certain and self.is_unobserved
+
+    def infer_expression(self, expression: o.Expression, is_certain: bool) -> tuple[o.Expression, ValueType]:
+        if isinstance(expression, o.Number) or isinstance(expression, o.String) or isinstance(expression, o.Boolean):
+            return expression, ValueType(type(expression))
+
+        elif isinstance(expression, o.Constant):
+            return expression, value_type_of(expression.value)
+
+        elif isinstance(expression, bo.BuiltinFunction) or isinstance(expression, o.Function):
+            if isinstance(expression, o.Function):
+                # Functions are evaluated in their own scope, with parameters and free variables of unknown types
+                body, _ = TypeInference().infer(expression.body, is_certain=False)
+                expression = o.Function(expression.line_num, expression.parameters, body)
+            return expression, ValueType(type(expression))
+
+        elif isinstance(expression, o.Identifier):
+            return expression, self.variable_types.get(expression.value, UNKNOWN)
+
+        elif isinstance(expression, o.Assignment):
+            value, value_type = self.infer(expression.value, is_certain)
+            self.variable_types[expression.name] = value_type
+            return o.Assignment(expression.line_num, expression.name, value), value_type
+
+        elif isinstance(expression, o.List):
+            values: list[o.Expression] = []
+            element_type: typing.Optional[ValueType] = None
+            for value in expression.values:
+                value, value_type = self.infer(value, is_certain)
+                values.append(value)
+                element_type = value_type if element_type is None else element_type.join(value_type)
+            return o.List(expression.line_num, values), ValueType(o.List, element_type)
+
+        elif isinstance(expression, o.MapLiteral):
+            pairs = [
+                (self.infer(key, is_certain)[0], self.infer(value, is_certain)[0]) for key, value in expression.pairs
+            ]
+            return o.MapLiteral(expression.line_num, pairs), ValueType(o.Map)
+
+        elif isinstance(expression, o.SetLiteral):
+            set_values = [self.infer(value, is_certain)[0] for value in expression.values]
+            return o.SetLiteral(expression.line_num, set_values), ValueType(o.Set)
+
+        elif isinstance(expression, o.InfixExpression):
+            return self.infer_infix(expression, is_certain)
+
+        elif isinstance(expression, o.PrefixExpression):
+            operand, operand_type = self.infer(expression.expression, is_certain)
+            prefix = o.PrefixExpression(expression.line_num, expression.operator, operand)
+
+            if self.can_report(is_certain):
+                check_operation(PREFIX_METHODS.get(expression.operator.type, None), operand, operand_type)
+
+            if expression.operator.type in {t.PLUS, t.MINUS} and operand_type.is_a(o.Number):
+                return prefix, NUMBER
+            elif expression.operator.type == t.NOT and operand_type.is_a(o.Boolean):
+                return prefix, BOOLEAN
+            elif expression.operator.type == t.MINUS and operand_type.is_a(o.List):
+                return prefix, operand_type
+            return prefix, UNKNOWN
+
+        elif isinstance(expression, o.PostfixExpression):
+            operand, operand_type = self.infer(expression.expression, is_certain)
+            postfix = o.PostfixExpression(expression.line_num, expression.operator, operand)
+
+            if self.can_report(is_certain):
+                check_operation(POSTFIX_METHODS.get(expression.operator.type, None), operand, operand_type)
+
+            return postfix, NUMBER if operand_type.is_a(o.Number) else UNKNOWN
+
+        elif isinstance(expression, o.When):
+            return self.infer_when(expression, is_certain)
+
+        elif isinstance(expression, o.ForLoop):
+            return self.infer_for(expression, is_certain)
+
+        elif isinstance(expression, o.LoopInvariant):
+            inner, inner_type = self.infer(expression.expression, is_certain)
+            return o.LoopInvariant(expression.line_num, inner, expression.varying_names), inner_type
+
+        elif isinstance(expression, o.InlinedCall):
+            # Inlined bodies never assign variables, so they are inferred in the current scope
+            body, body_type = self.infer(expression.body, is_certain)
+            return o.InlinedCall(expression.line_num, body), body_type
+
+        elif isinstance(expression, o.SavedExpression):
+            inner, inner_type = self.infer(expression.expression, is_certain)
+            self.saved_types[expression.slot] = inner_type
+            return o.SavedExpression(expression.line_num, inner, expression.slot), inner_type
+
+        elif isinstance(expression, o.SavedValue):
+            return expression, self.saved_types.get(expression.slot, UNKNOWN)
+
+        return expression, UNKNOWN
+
+    def infer_infix(self, infix: o.InfixExpression, is_certain: bool) -> tuple[o.Expression, ValueType]:
+        left, left_type = self.infer(infix.left, is_certain)
+        op = infix.operator
+
+        if op.type in {t.AND, t.OR}:
+            # The right side is skipped when the left side determines the result
+            right, right_type = self.infer_conditionally(infix.right)
+
+            if self.can_report(is_certain) and not left_type.is_a(o.Boolean):
+                # Values other than booleans never short-circuit, so the operation always fails
+                check_operation("and_" if op.type == t.AND else "or_", left, left_type, right_type)
+
+            result_type = BOOLEAN if left_type.is_a(o.Boolean) and right_type.is_a(o.Boolean) else UNKNOWN
+            return o.InfixExpression(infix.line_num, left, op, right), result_type
+
+        right, right_type = self.infer(infix.right, is_certain)
+
+        if left_type.is_a(o.Number) and right_type.is_a(o.Number) and op.type in o.NUMBER_OPERATIONS:
+            result_type = BOOLEAN if op.type in COMPARISON_OPERATORS else NUMBER
+            return o.NumberInfixExpression(infix.line_num, left, op, right), result_type
+
+        if self.can_report(is_certain):
+            check_operation(INFIX_METHODS.get(op.type, None), left, left_type, right_type)
+
+        return o.InfixExpression(infix.line_num, left, op, right), infix_result_type(left, left_type, op, right_type)
+
+    def infer_when(self, when: o.When, is_certain: bool) -> tuple[o.Expression, ValueType]:
+        switch_expression, _ = self.infer(when.expression, is_certain)
+
+        case_expressions: list[tuple[o.Expression, o.Expression]] = []
+        result_type: typing.Optional[ValueType] = None
+        variable_types_after_first_condition = self.variable_types
+
+        # The first condition is always evaluated. Every other condition, and every case's expression, only runs if
+        # the conditions before it do not match.
+        for index, (condition, return_expression) in enumerate(when.case_expressions):
+            condition, _ = self.infer(condition, is_certain and index == 0)
+            if index == 0:
+                variable_types_after_first_condition = dict(self.variable_types)
+
+            return_expression, return_type = self.scope().infer(return_expression, is_certain=False)
+
+            case_expressions.append((condition, return_expression))
+            result_type = return_type if result_type is None else result_type.join(return_type)
+
+        # Afterwards, the variables assigned in those parts might have their old or their new types
+        self.variable_types = variable_types_after_first_condition
+        for index, (condition, return_expression) in enumerate(when.case_expressions):
+            if index > 0:
+                self.forget(assigned_names(condition))
+            self.forget(assigned_names(return_expression))
+
+        when_type = type(when)
+        return when_type(when.line_num, switch_expression, case_expressions), result_type or UNKNOWN
+
+    def infer_for(self, for_loop: o.ForLoop, is_certain: bool) -> tuple[o.Expression, ValueType]:
+        values, values_type = self.infer(for_loop.values, is_certain)
+
+        # The loop has its own scope, which is shared by every element. Variables assigned in the loop could have
+        # been assigned by the previous element, so their types are unknown.
+        loop_inference = self.scope()
+        loop_inference.forget(assigned_names(for_loop.conditional_expr) | assigned_names(for_loop.expression))
+        loop_inference.variable_types[for_loop.element_identifier] = \
+            values_type.element if values_type.is_a(o.List) else UNKNOWN
+
+        conditional_expr, _ = loop_inference.infer(for_loop.conditional_expr, is_certain=False)
+        expression, expression_type = loop_inference.infer(for_loop.expression, is_certain=False)
+
+        new_for_loop = o.ForLoop(
+            for_loop.line_num, for_loop.element_identifier, values, conditional_expr, expression
+        )
+        return new_for_loop, ValueType(o.List, expression_type)
+
+    def infer_conditionally(self, expression: o.Expression) -> tuple[o.Expression, ValueType]:
+        """Infer the type of an expression that might not be evaluated. Afterwards, the variables it assigns could
+        have their old types or their new types.
+        """
+        result = self.scope().infer(expression, is_certain=False)
+        self.forget(assigned_names(expression))
+        return result
+
+    def scope(self) -> "TypeInference":
+        """Create an inference that starts with the variable types known here, without changing them."""
+        inference = TypeInference()
+        inference.variable_types = dict(self.variable_types)
+        inference.saved_types = self.saved_types
+        return inference
+
+    def forget(self, names: typing.Iterable[str]) -> None:
+        for name in names:
+            self.variable_types[name] = UNKNOWN
+
+
+def infix_result_type(left: o.Expression, left_type: ValueType, op: Token, right_type: ValueType) -> ValueType:
+    if op.type in {t.EQ, t.NE, t.IN}:
+        return BOOLEAN
+
+    elif op.type == t.SEND:
+        if isinstance(left, bo.BuiltinFunction):
+            return BUILTIN_RESULT_TYPES.get(type(left), UNKNOWN)
+        elif left_type.is_a(o.List):
+            return ValueType(o.List, left_type.element.join(right_type))
+
+    elif op.type == t.INDEX and left_type.is_a(o.List) and right_type.is_a(o.Number):
+        return left_type.element
+
+    elif op.type in ARITHMETIC_OPERATORS and left_type.is_a(o.Number) and right_type.is_a(o.Number):
+        return NUMBER
+
+    elif op.type == t.PLUS and left_type.is_known and left_type.value_type is right_type.value_type:
+        # Concatenating strings and lists, or merging maps and sets
+        return left_type.join(right_type)
+
+    return UNKNOWN
+
+
+def check_operation(method_name: typing.Optional[str], operand: o.Expression, *operand_types: ValueType) -> None:
+    """Raise the error an operation will raise at runtime, if it is certain to raise one because of the types of its
+    operands.
+    """
+    if method_name is None or not all(operand_type.is_known for operand_type in operand_types):
+        return
+
+    line_num = value_line_num(operand)
+    if line_num is None:
+        return
+
+    # Calling the method on sample values of the operands' types raises the same error as at runtime. None of the
+    # checked methods raise errors for these samples for any reason other than their types.
+    samples = [
+        sample_value(typing.cast(typing.Type[o.Expression], operand_type.value_type), line_num)
+        for operand_type in operand_types
+    ]
+    getattr(samples[0], method_name)(*samples[1:])
+
+
+def value_type_of(value: o.Expression) -> ValueType:
+    if isinstance(value, o.List):
+        element_type: typing.Optional[ValueType] = None
+        for element in value.values:
+            element_value_type = value_type_of(element)
+            element_type = element_value_type if element_type is None else element_type.join(element_value_type)
+        return ValueType(o.List, element_type)
+    return ValueType(type(value))
+
+
+def sample_value(value_type: typing.Type[o.Expression], line_num: int) -> o.Expression:
+    samples: dict[typing.Type[o.Expression], o.Expression] = {
+        o.Number: o.Number(line_num, 1),
+        o.String: o.String(line_num, ""),
+        o.Boolean: o.Boolean(line_num, True),
+        o.List: o.List(line_num, []),
+        o.Map: o.Map(line_num, PersistentMap()),
+        o.Set: o.Set(line_num, PersistentMap()),
+        o.Function: o.Function(line_num, [], o.Number(line_num, 0)),
+    }
+
+    sample = samples.get(value_type, None)
+    if sample is None:
+        # Builtin functions
+        return typing.cast(typing.Callable[[int], o.Expression], value_type)(line_num)
+    return sample
+
+
+def value_line_num(expression: o.Expression) -> typing.Optional[int]:
+    """The line number of the value "expression" evaluates to, which is the line number runtime errors raised by that
+    value's methods refer to. Returns None if it depends on values that are not known before the program runs.
+    """
+    if isinstance(expression, o.InfixExpression):
+        if expression.operator.type == t.INDEX:
+            # The line number of an element is wherever the element was created
+            return None
+        return value_line_num(expression.left)
+
+    elif isinstance(expression, o.PrefixExpression) or isinstance(expression, o.PostfixExpression):
+        return value_line_num(expression.expression)
+
+    elif isinstance(expression, o.Assignment):
+        return value_line_num(expression.value)
+
+    elif isinstance(expression, o.LoopInvariant):
+        return value_line_num(expression.expression)
+
+    elif isinstance(expression, o.SavedExpression):
+        return value_line_num(expression.expression)
+
+    return expression.line_num
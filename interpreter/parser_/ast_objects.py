@@ -1,7 +1,10 @@
-from functools import reduce
+import math
+import typing
+from copy import copy
 
 from interpreter.tokens.token import Token
 from interpreter.tokens import tokens as t
+from utils.persistent_map import PersistentMap
 from utils.utils import language_error, divide_by_zero_error
 
 
@@ -19,10 +22,25 @@ class Expression:
 
     def __repr__(self) -> str:
         class_name = self.__class__.__name__
-        instance_vars = vars(self)
+
+        # Attributes starting with an underscore are internal caches, not part of the expression's state
+        instance_vars = {name: value for name, value in vars(self).items() if not name.startswith("_")}
 
         return f"{class_name}({', '.join(list(map(lambda p: f'{p[0]}={repr(p[1])}', instance_vars.items())))})"
 
+    def relocate(self, line_num: int) -> "Expression":
+        """Return this expression with a different line number.
+
+        Values are shared between variables, function-result caches, and the AST, so their line numbers are never
+        changed in place; a shallow copy is returned instead.
+        """
+        if self.line_num == line_num:
+            return self
+
+        relocated = copy(self)
+        relocated.line_num = line_num
+        return relocated
+
     def eq(self, other: "Expression") -> "Boolean":
         return Boolean(self.line_num, self == other)
 
@@ -63,7 +81,13 @@ class Expression:
 
     def contains(self, other: object) -> "Boolean":
         if isinstance(other, List):
-            return Boolean(self.line_num, self in other.values)
+            return Boolean(self.line_num, other.has_value(self))
+
+        elif isinstance(other, Map):
+            return Boolean(self.line_num, other.has_key(self))
+
+        elif isinstance(other, Set):
+            return Boolean(self.line_num, other.has_value(self))
 
         raise language_error(self.line_num,
                              f"invalid types {type(self).__name__} and {type(other).__name__} for {t.IN}")
@@ -138,6 +162,9 @@ class Number(Expression):
             return False
         return self.value == other.value
 
+    def __hash__(self) -> int:
+        return hash(self.value)
+
     def __display_value(self) -> float:
         if self.is_whole_number():
             return int(self.value)
@@ -166,11 +193,7 @@ class Number(Expression):
         else:
             start_number = base_number
 
-        # No need to start at 1 because 1 multiplied by anything is itself
-        return Number(
-            self.line_num,
-            reduce(lambda a, b: a * b, [i for i in range(2, start_number + 1)])
-        )
+        return Number(self.line_num, math.factorial(start_number))
 
     def inc(self) -> "Expression":
         return Number(self.line_num, self.value + 1)
@@ -262,6 +285,9 @@ class String(Expression):
             return False
         return self.value == other.value
 
+    def __hash__(self) -> int:
+        return hash(self.value)
+
     def add(self, other: object) -> Expression:
         if isinstance(other, String):
             return String(self.line_num, self.value + other.value)
@@ -282,6 +308,9 @@ class Boolean(Expression):
             return False
         return self.value == other.value
 
+    def __hash__(self) -> int:
+        return hash(self.value)
+
     def not_(self) -> "Expression":
         return Boolean(self.line_num, not self.value)
 
@@ -306,6 +335,11 @@ class List(Expression):
         super().__init__(line_num)
         self.values = values
 
+        # Lists are immutable, so their hash value and membership index are computed at most once. This dictionary is
+        # shared by every copy of the list made by "relocate", so a list stored in a variable keeps its index no
+        # matter how many times the variable is read.
+        self._cache: dict[str, typing.Any] = {}
+
     def __str__(self) -> str:
         return f"({', '.join(map(str, self.values))})"
 
@@ -314,6 +348,48 @@ class List(Expression):
             return False
         return self.values == other.values
 
+    def __hash__(self) -> int:
+        """Lists are hashable only if all their elements are (functions, for example, are not hashable). A TypeError
+        is raised otherwise, the same as for a tuple.
+        """
+        list_hash = self._cache.get("hash", None)
+        if list_hash is None:
+            list_hash = self._cache["hash"] = hash(tuple(self.values))
+        return typing.cast(int, list_hash)
+
+    def has_value(self, value: Expression) -> bool:
+        """Check if "value" is equal to any element in this list.
+
+        The first check on a list is a linear scan. Starting with the second check, a hash set of the list's elements
+        is built once and reused, so repeated checks against the same list take constant time on average.
+        """
+        index: typing.Optional[tuple[set[Expression], list[Expression]]] = self._cache.get("index", None)
+
+        if index is None:
+            if not self._cache.get("has_been_searched", False):
+                self._cache["has_been_searched"] = True
+                return value in self.values
+
+            hashable_values: set[Expression] = set()
+            unhashable_values: list[Expression] = []
+            for element in self.values:
+                try:
+                    hashable_values.add(element)
+                except TypeError:
+                    unhashable_values.append(element)
+
+            index = self._cache["index"] = (hashable_values, unhashable_values)
+
+        hashable_values, unhashable_values = index
+        try:
+            if value in hashable_values:
+                return True
+        except TypeError:
+            # "value" cannot be hashed, so it can only be found by comparing it to every element
+            return value in self.values
+
+        return value in unhashable_values
+
     def neg(self) -> "Expression":
         values = list(reversed(self.values))
         return List(self.line_num, values)
@@ -333,10 +409,8 @@ class List(Expression):
 
     def sub(self, other: object) -> "Expression":
         if isinstance(other, List):
-            new_values = self.values
-            for value_to_remove in other.values:
-                new_values = [v for v in new_values if v.ne(
-                    value_to_remove).value]
+            # Searching "other" uses its hash index after the first element, so this is O(n + m) rather than O(n * m)
+            new_values = [v for v in self.values if not other.has_value(v)]
             return List(self.line_num, new_values)
 
         return super().sub(other)
@@ -356,6 +430,164 @@ class List(Expression):
         return super().at(other)
 
 
+def is_hashable(value: Expression) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+class Map(Expression):
+    """An immutable mapping of keys to values.
+
+    Adding or removing keys creates a new map that shares most of its structure with the original (see
+    "PersistentMap"), and looking up a key takes constant time on average. Keys must be hashable, which excludes
+    functions and collections that contain them.
+    """
+
+    def __init__(self, line_num: int, entries: PersistentMap[Expression, Expression]):
+        super().__init__(line_num)
+        self.entries = entries
+
+        # Shared by copies made by "relocate" (see "List")
+        self._cache: dict[str, typing.Any] = {}
+
+    def __str__(self) -> str:
+        return f"{{{', '.join(f'{key}: {value}' for key, value in self.entries.items())}}}"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Map) or len(self.entries) != len(other.entries):
+            return False
+
+        for key, value in self.entries.items():
+            other_entry = other.entries.find(key)
+            if other_entry is None or other_entry.value != value:
+                return False
+        return True
+
+    def __hash__(self) -> int:
+        map_hash = self._cache.get("hash", None)
+        if map_hash is None:
+            map_hash = self._cache["hash"] = hash(frozenset(self.entries.items()))
+        return typing.cast(int, map_hash)
+
+    def has_key(self, key: Expression) -> bool:
+        # An unhashable value can never be a key
+        return is_hashable(key) and key in self.entries
+
+    def set_entry(self, key: Expression, value: Expression) -> "Map":
+        if not is_hashable(key):
+            raise language_error(self.line_num, f"invalid key type {type(key).__name__} for Map")
+        return Map(self.line_num, self.entries.set(key, value))
+
+    def at(self, other: object) -> "Expression":
+        if isinstance(other, Expression):
+            entry = self.entries.find(other) if is_hashable(other) else None
+            if entry is None:
+                raise language_error(self.line_num, f"key {other} not found in Map")
+            return typing.cast(Expression, entry.value)
+
+        return super().at(other)
+
+    def ptr(self, other: object) -> "Expression":
+        # map <- (key, value) creates a new map with "key" set to "value"
+        if isinstance(other, List) and len(other.values) == 2:
+            key, value = other.values
+            return self.set_entry(key, value)
+
+        return super().ptr(other)
+
+    def add(self, other: object) -> "Expression":
+        # Merge two maps. Values in the right map replace values in the left map.
+        if isinstance(other, Map):
+            entries = self.entries
+            for key, value in other.entries.items():
+                entries = entries.set(key, value)
+            return Map(self.line_num, entries)
+
+        return super().add(other)
+
+    def sub(self, other: object) -> "Expression":
+        # Remove all keys in a list or set
+        if isinstance(other, List) or isinstance(other, Set):
+            entries = self.entries
+            for key in other.values:
+                if is_hashable(key):
+                    entries = entries.remove(key)
+            return Map(self.line_num, entries)
+
+        return super().sub(other)
+
+
+class Set(Expression):
+    """An immutable, unordered collection of unique values, with the same performance characteristics as "Map"."""
+
+    def __init__(self, line_num: int, entries: PersistentMap[Expression, bool]):
+        super().__init__(line_num)
+        self.entries = entries
+
+        # Shared by copies made by "relocate" (see "List")
+        self._cache: dict[str, typing.Any] = {}
+
+    def __str__(self) -> str:
+        if len(self.entries) == 0:
+            # "{}" is an empty map
+            return "{,}"
+        return f"{{{', '.join(map(str, self.entries.keys()))}}}"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Set) or len(self.entries) != len(other.entries):
+            return False
+        return all(value in other.entries for value in self.entries.keys())
+
+    def __hash__(self) -> int:
+        set_hash = self._cache.get("hash", None)
+        if set_hash is None:
+            set_hash = self._cache["hash"] = hash(frozenset(self.entries.keys()))
+        return typing.cast(int, set_hash)
+
+    @property
+    def values(self) -> list[Expression]:
+        return self.entries.keys()
+
+    def has_value(self, value: Expression) -> bool:
+        return is_hashable(value) and value in self.entries
+
+    def add_value(self, value: Expression) -> "Set":
+        if not is_hashable(value):
+            raise language_error(self.line_num, f"invalid value type {type(value).__name__} for Set")
+        return Set(self.line_num, self.entries.set(value, True))
+
+    def ptr(self, other: object) -> "Expression":
+        # set <- value creates a new set that includes "value"
+        if isinstance(other, Expression):
+            return self.add_value(other)
+
+        return super().ptr(other)
+
+    def add(self, other: object) -> "Expression":
+        # Union
+        if isinstance(other, Set):
+            entries = self.entries
+            for value in other.entries.keys():
+                entries = entries.set(value, True)
+            return Set(self.line_num, entries)
+
+        return super().add(other)
+
+    def sub(self, other: object) -> "Expression":
+        # Difference
+        if isinstance(other, List) or isinstance(other, Set):
+            entries = self.entries
+            for value in other.values:
+                if is_hashable(value):
+                    entries = entries.remove(value)
+            return Set(self.line_num, entries)
+
+        return super().sub(other)
+
+
 class Function(Expression):
     def __init__(self, line_num: int, parameters: list["Identifier"], body: Expression):
         super().__init__(line_num)
@@ -388,6 +620,138 @@ class FunctionCall(Expression):
         return self.function == other.function and self.call_params == other.call_params
 
 
+class MapLiteral(Expression):
+    """A map in source code, such as {"a": 1, "b": 2}. Evaluates to a "Map"."""
+
+    def __init__(self, line_num: int, pairs: list[tuple[Expression, Expression]]):
+        super().__init__(line_num)
+        self.pairs = pairs
+
+    def __str__(self) -> str:
+        return f"{{{', '.join(f'{key}: {value}' for key, value in self.pairs)}}}"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MapLiteral):
+            return False
+        return self.pairs == other.pairs
+
+
+class SetLiteral(Expression):
+    """A set in source code, such as {1, 2, 3}. Evaluates to a "Set"."""
+
+    def __init__(self, line_num: int, values: list[Expression]):
+        super().__init__(line_num)
+        self.values = values
+
+    def __str__(self) -> str:
+        return f"{{{', '.join(map(str, self.values))}}}" if len(self.values) > 0 else "{,}"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SetLiteral):
+            return False
+        return self.values == other.values
+
+
+class Constant(Expression):
+    """A value computed ahead of time by the optimizer, such as a list literal whose elements are all constants.
+
+    Evaluating a constant returns "value" itself rather than building a new copy of it, so the same value is shared by
+    every evaluation. That is safe because values are never modified in place.
+    """
+
+    def __init__(self, line_num: int, value: Expression):
+        super().__init__(line_num)
+        self.value = value
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Constant):
+            return False
+        return self.value == other.value
+
+
+class LoopInvariant(Expression):
+    """A sub-expression of a for-loop's filter or body that does not depend on the loop's element or on any variable
+    assigned inside the loop. These are marked by the optimizer.
+
+    The first time the expression is evaluated in a run of the loop, its value is saved and reused for the remaining
+    elements, provided it is pure: it cannot reach an impure builtin, and none of the functions it calls read a
+    variable in "varying_names" (functions are dynamically scoped, so that can only be checked at runtime).
+    """
+
+    def __init__(self, line_num: int, expression: Expression, varying_names: frozenset[str]):
+        super().__init__(line_num)
+        self.expression = expression
+
+        # The loop's element identifier and the variables assigned in the loop
+        self.varying_names = varying_names
+
+    def __str__(self) -> str:
+        return str(self.expression)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LoopInvariant):
+            return False
+        return self.expression == other.expression and self.varying_names == other.varying_names
+
+
+class InlinedCall(Expression):
+    """The body of a function, with its parameters replaced by the call's arguments, in place of a call to that
+    function. These are created by the optimizer.
+
+    Like the result of a function call, the value of the body is relocated to the line number of the call.
+    """
+
+    def __init__(self, line_num: int, body: Expression):
+        super().__init__(line_num)
+        self.body = body
+
+    def __str__(self) -> str:
+        return str(self.body)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, InlinedCall):
+            return False
+        return self.body == other.body
+
+
+class SavedExpression(Expression):
+    """An expression whose value is saved in "slot" when it is evaluated, so that identical expressions evaluated after
+    it (see "SavedValue") can reuse the value. These are created by the optimizer.
+    """
+
+    def __init__(self, line_num: int, expression: Expression, slot: int):
+        super().__init__(line_num)
+        self.expression = expression
+        self.slot = slot
+
+    def __str__(self) -> str:
+        return str(self.expression)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SavedExpression):
+            return False
+        return self.expression == other.expression and self.slot == other.slot
+
+
+class SavedValue(Expression):
+    """The value saved by the "SavedExpression" with the same slot, in place of an identical expression."""
+
+    def __init__(self, line_num: int, slot: int):
+        super().__init__(line_num)
+        self.slot = slot
+
+    def __str__(self) -> str:
+        return f"<saved value {self.slot}>"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SavedValue):
+            return False
+        return self.slot == other.slot
+
+
 class Identifier(Expression):
     def __init__(self, line_num: int, value: str):
         super().__init__(line_num)
@@ -417,6 +781,39 @@ class When(Expression):
         return f"<when {hex(id(self))}>"
 
 
+class JumpTableWhen(When):
+    """A "when" expression whose cases (other than "else") are all constants, such as:
+
+        when n:
+            is 1: "one"
+            is 2: "two"
+            else: "many"
+
+    The position of the first case for each constant is stored in a hash table, so the matching case is found in one
+    lookup instead of by comparing the value to every case in order. These are created by the optimizer.
+    """
+
+    def __init__(self, line_num: int, expression: Expression, case_expressions: list[tuple[Expression, Expression]]):
+        super().__init__(line_num, expression, case_expressions)
+
+        self.table: dict[Expression, int] = {}
+        for index, (condition, _) in enumerate(case_expressions[:-1]):
+            value = condition.value if isinstance(condition, Constant) else condition
+            self.table.setdefault(value, index)
+
+    def lookup(self, value: Expression) -> int:
+        """Return the index of the case that matches "value". If none of the constant cases match, the index of the
+        "else" case is returned.
+        """
+        try:
+            index = self.table.get(value, None)
+        except TypeError:
+            # Unhashable values (such as functions) are not equal to any constant
+            index = None
+
+        return len(self.case_expressions) - 1 if index is None else index
+
+
 class ForLoop(Expression):
     def __init__(
             self,
@@ -474,6 +871,59 @@ class InfixExpression(Expression):
         return self.left == other.left and self.operator == other.operator and self.right == other.right
 
 
+def _divide(line_num: int, left: float, right: float) -> Expression:
+    if right == 0:
+        raise divide_by_zero_error(line_num)
+    return Number(line_num, left / right)
+
+
+def _modulo(line_num: int, left: float, right: float) -> Expression:
+    if right == 0:
+        raise divide_by_zero_error(line_num)
+    return Number(line_num, left % right)
+
+
+# Operators on two numbers, applied to their values. These must return the same results (and raise the same errors)
+# as the corresponding "Number" methods.
+NUMBER_OPERATIONS: dict[str, typing.Callable[[int, float, float], Expression]] = {
+    t.PLUS: lambda line_num, left, right: Number(line_num, left + right),
+    t.MINUS: lambda line_num, left, right: Number(line_num, left - right),
+    t.MULTIPLY: lambda line_num, left, right: Number(line_num, left * right),
+    t.DIVIDE: _divide,
+    t.MOD: _modulo,
+    t.EQ: lambda line_num, left, right: Boolean(line_num, left == right),
+    t.NE: lambda line_num, left, right: Boolean(line_num, left != right),
+    t.GT: lambda line_num, left, right: Boolean(line_num, left > right),
+    t.GE: lambda line_num, left, right: Boolean(line_num, left >= right),
+    t.LT: lambda line_num, left, right: Boolean(line_num, left < right),
+    t.LE: lambda line_num, left, right: Boolean(line_num, left <= right),
+}
+
+
+class NumberInfixExpression(InfixExpression):
+    """An infix expression whose operands the optimizer has proven are always numbers, so the operator can be applied
+    to their values directly instead of dispatching through the type-checked "Number" methods.
+    """
+
+    def __init__(self, line_num: int, left: Expression, operator: Token, right: Expression):
+        super().__init__(line_num, left, operator, right)
+        self._operation = NUMBER_OPERATIONS[operator.type]
+
+    def apply(self, left: Number, right: Number) -> Expression:
+        return self._operation(left.line_num, left.value, right.value)
+
+    def __getstate__(self) -> dict[str, typing.Any]:
+        # Functions in "NUMBER_OPERATIONS" cannot be pickled, so the operation is looked up again when unpickling. That
+        # lets optimized code be sent to other processes (see "parallel").
+        state = dict(self.__dict__)
+        del state["_operation"]
+        return state
+
+    def __setstate__(self, state: dict[str, typing.Any]) -> None:
+        self.__dict__.update(state)
+        self._operation = NUMBER_OPERATIONS[self.operator.type]
+
+
 class PostfixExpression(Expression):
     def __init__(self, line_num: int, operator: Token, expression: Expression):
         super().__init__(line_num)
@@ -1,22 +1,27 @@
 from random import random, uniform, randint
 from typing import Callable
 
-from interpreter.parser_.ast_objects import Expression, List, Number, String, Boolean
+from interpreter.parser_.ast_objects import Expression, List, Number, String, Boolean, Map, Set, Function
+from utils.program_io import ProgramIO
 from utils.utils import language_error, incorrect_number_of_arguments
 
 
 class BuiltinFunction(Expression):
-    pass
+    def call(self, other: object, program_io: ProgramIO) -> "Expression":
+        """Send "other" to this builtin (the "<-" operator). Builtins that read input or write output override this to
+        use the streams in "program_io" rather than the process's.
+        """
+        return self.ptr(other)
 
 
 class Print(BuiltinFunction):
     def __init__(self, line_num: int):
         super().__init__(line_num)
 
-    def ptr(self, other: object) -> "Expression":
+    def call(self, other: object, program_io: ProgramIO) -> "Expression":
         if isinstance(other, List):
             arguments = other.values
-            print(", ".join(map(str, arguments)))
+            program_io.print(", ".join(map(str, arguments)))
             return List(self.line_num, arguments)
         return super().ptr(other)
 
@@ -26,7 +31,7 @@ class Input(BuiltinFunction):
     def __init__(self, line_num: int):
         super().__init__(line_num)
 
-    def ptr(self, other: object) -> "Expression":
+    def call(self, other: object, program_io: ProgramIO) -> "Expression":
         if isinstance(other, List):
             arguments = other.values
 
@@ -41,7 +46,7 @@ class Input(BuiltinFunction):
                     f"unsupported type {type(prompt).__name__} for built-in function len"
                 )
 
-            value = input(prompt.value)
+            value = program_io.input(prompt.value)
 
             return String(self.line_num, value)
 
@@ -163,6 +168,8 @@ class Length(BuiltinFunction):
                 return Number(self.line_num, len(collection.value))
             elif isinstance(collection, List):
                 return Number(self.line_num, len(collection.values))
+            elif isinstance(collection, Map) or isinstance(collection, Set):
+                return Number(self.line_num, len(collection.entries))
             raise language_error(
                 self.line_num,
                 f"unsupported type {type(collection).__name__} for built-in function len"
@@ -347,3 +354,57 @@ class IsWholeNumber(BuiltinFunction):
             return Boolean(value.line_num, value.is_whole_number())
 
         return super().ptr(other)
+
+
+class ParallelMap(BuiltinFunction):
+    """Call a function on every element of a list, like a for-loop, possibly in several processes at once (see
+    "parallel_map").
+    """
+
+    def __init__(self, line_num: int):
+        super().__init__(line_num)
+
+    def ptr(self, other: object) -> "Expression":
+        if isinstance(other, List):
+            arguments = other.values
+
+            if len(arguments) != 2:
+                raise incorrect_number_of_arguments(self.line_num, 2, len(arguments))
+
+            function, values = arguments
+
+            if not isinstance(function, Function):
+                raise language_error(
+                    self.line_num,
+                    f"expected Function for function, got {type(function).__name__}"
+                )
+
+            # Maps are mapped over by key, and sets by value, like in for-loops
+            if isinstance(values, Map):
+                values = List(values.line_num, values.entries.keys())
+            elif isinstance(values, Set):
+                values = List(values.line_num, values.values)
+
+            if not isinstance(values, List):
+                raise language_error(
+                    self.line_num,
+                    f"expected List for values, got {type(values).__name__}"
+                )
+
+            return ParallelMapCall(self.line_num, function, values)
+
+        return super().ptr(other)
+
+
+class ParallelMapCall(Expression):
+    """A call to "pmap", which the evaluator carries out (see "FunctionCall")."""
+
+    def __init__(self, line_num: int, function: Function, values: List):
+        super().__init__(line_num)
+        self.function = function
+        self.values = values
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ParallelMapCall):
+            return False
+        return self.function == other.function and self.values == other.values
@@ -1,7 +1,7 @@
 from copy import copy
 
 from interpreter.parser_.builtin_ast_objects import Print, Input, RandomInt, RandomFloat, Length, Range, Round, Format, \
-    IsWholeNumber
+    IsWholeNumber, ParallelMap
 from interpreter.tokens.token_queue import TokenQueue
 from interpreter.tokens.token import Token
 import interpreter.parser_.ast_objects as o
@@ -144,6 +144,9 @@ class Parser:
         elif self.current.type == t.OPEN_PAREN:
             return self.parse_grouped_expression()
 
+        elif self.current.type == t.OPEN_BRACE:
+            return self.parse_map_or_set()
+
         elif self.current.type == t.NUMBER:
             return self.parse_number()
 
@@ -238,7 +241,8 @@ class Parser:
             "range": Range(line_num),
             "round": Round(line_num),
             "format": Format(line_num),
-            "is_whole_number": IsWholeNumber(line_num)
+            "is_whole_number": IsWholeNumber(line_num),
+            "pmap": ParallelMap(line_num)
         }.get(identifier_token.value, o.Identifier(identifier_token.line_num, identifier_token.value))
 
     def parse_assign(self) -> o.Expression:
@@ -279,6 +283,57 @@ class Parser:
         # Return list object
         return o.List(line_num, values)
 
+    def parse_map_or_set(self) -> o.MapLiteral | o.SetLiteral:
+        """Parse a map ({key: value, ...}) or a set ({value, ...}).
+
+        Like Python, an empty pair of braces ({}) is an empty map. An empty set is written with a single comma ({,}),
+        similar to how a one-element list is written (1,).
+        """
+        line_num = self.current.line_num
+        self.advance()  # skip open brace
+
+        if self.current.type == t.CLOSED_BRACE:
+            self.advance()
+            return o.MapLiteral(line_num, [])
+
+        if self.current.type == t.COMMA:
+            self.advance()
+            self.is_expected_token(t.CLOSED_BRACE)
+            self.advance()
+            return o.SetLiteral(line_num, [])
+
+        first_expression = self.expression()
+
+        # A colon after the first expression means we're parsing a map
+        if self.current.type == t.COLON:
+            self.advance()
+            pairs = [(first_expression, self.expression())]
+
+            while self.current.type == t.COMMA:
+                self.advance()
+                if self.current.type == t.CLOSED_BRACE:
+                    break  # trailing comma
+
+                key = self.expression()
+                self.is_expected_token(t.COLON)
+                self.advance()
+                pairs.append((key, self.expression()))
+
+            self.is_expected_token(t.CLOSED_BRACE)
+            self.advance()
+            return o.MapLiteral(line_num, pairs)
+
+        values = [first_expression]
+        while self.current.type == t.COMMA:
+            self.advance()
+            if self.current.type == t.CLOSED_BRACE:
+                break  # trailing comma
+            values.append(self.expression())
+
+        self.is_expected_token(t.CLOSED_BRACE)
+        self.advance()
+        return o.SetLiteral(line_num, values)
+
     def parse_function(self) -> o.Function:
         line_num: int = self.current.line_num
         self.advance()  # skip function keyword
@@ -66,6 +66,8 @@ SEMICOLON: str = get_token_type("SEMICOLON")
 COLON: str = get_token_type("COLON")
 OPEN_PAREN: str = get_token_type("OPEN_PAREN")
 CLOSED_PAREN: str = get_token_type("CLOSED_PAREN")
+OPEN_BRACE: str = get_token_type("OPEN_BRACE")
+CLOSED_BRACE: str = get_token_type("CLOSED_BRACE")
 PERIOD: str = get_token_type("PERIOD")
 COMMA: str = get_token_type("COMMA")
 SEND: str = get_token_type("SEND")
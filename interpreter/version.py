@@ -0,0 +1,31 @@
+import functools
+import hashlib
+import pathlib
+
+VERSION = "1.0"
+
+# Files whose contents determine what a program does: the interpreter's code and its token definitions
+SOURCE_SUFFIXES = (".py", ".yaml")
+
+# Modules outside the interpreter package that it uses. Their classes are pickled with compiled programs (e.g.,
+# "PersistentMap" in folded Map and Set constants), so a compiled program is out of date if one of them changes.
+UTILS_MODULES = ("utils.py", "persistent_map.py", "lru_cache.py", "program_io.py")
+
+
+@functools.cache
+def interpreter_version() -> str:
+    """A string that changes whenever the interpreter does, for keys of cached results and compiled programs.
+
+    It is "VERSION" followed by a hash of the interpreter's own source files and the "UTILS_MODULES" it uses, so a
+    cached value is never reused by a different interpreter, even one with the same "VERSION".
+    """
+    package = pathlib.Path(__file__).parent
+    root = package.parent
+    paths = [path for path in package.rglob("*") if path.suffix in SOURCE_SUFFIXES and "__pycache__" not in path.parts]
+    paths += [root / "utils" / name for name in UTILS_MODULES]
+
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(path.relative_to(root).as_posix().encode())
+        digest.update(path.read_bytes())
+    return f"{VERSION}-{digest.hexdigest()[:16]}"
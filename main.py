@@ -1,13 +1,18 @@
 import argparse
-import os
+import logging
+import sys
 
 from utils.utils import get_source
 from main_utils import evaluate, visualize_ast
 from interpreter.evaluator.environment_ import Environment
-from utils.utils import Platform, BOOMERANG_PLATFORM
+from interpreter.evaluator.limits import ExecutionLimits
+from interpreter.evaluator.memo import FunctionMemo, DEFAULT_MEMO_SIZE
+from interpreter.optimizer.inlining import DEFAULT_MAX_INLINE_SIZE
+from utils.program_cache import CacheMode, CACHE_DIRECTORY, compile_file
+from utils.program_io import ProgramIO
 
 
-def repl(prompt: str = ">>") -> None:
+def repl(memo: FunctionMemo, optimize_ast: bool, native: bool, max_inline_size: int, prompt: str = ">>") -> None:
     """Execute code in REPL/command line.
 
     Uses both output (e.g., print) and individual expression values.
@@ -19,7 +24,16 @@ def repl(prompt: str = ">>") -> None:
         if _input.lower() == "exit":
             break
         else:
-            evaluated_expressions, output = evaluate(_input, env)
+            evaluated_expressions, output = evaluate(
+                _input,
+                env,
+                memo,
+                optimize_ast,
+                native,
+                max_inline_size,
+                keep_unused_variables=True,
+                program_io=ProgramIO(stdout=sys.stdout)
+            )
 
             # Display output, if any exists
             if len(output) > 0:
@@ -31,8 +45,6 @@ def repl(prompt: str = ">>") -> None:
 
 
 if __name__ == "__main__":
-    os.environ[BOOMERANG_PLATFORM] = Platform.CMD.name
-
     parser = argparse.ArgumentParser(description="Boomerang Interpreter")
 
     parser.add_argument("path", nargs="?", default=None)
@@ -41,8 +53,67 @@ if __name__ == "__main__":
     parser.add_argument(
         *visualize_flags, help="Create an Abstract Syntax Tree visualization", action="store_true")
 
+    parser.add_argument(
+        "--memo-size",
+        help=f"Maximum number of results cached per pure function; 0 disables caching (default: {DEFAULT_MEMO_SIZE})",
+        type=int,
+        default=DEFAULT_MEMO_SIZE
+    )
+    parser.add_argument(
+        "--memo-stats", help="Report the function-result cache hit rate after running", action="store_true")
+
+    parser.add_argument(
+        "--no-optimize", help="Evaluate the program exactly as written, without optimizing it", action="store_true")
+
+    parser.add_argument(
+        "--inline-size",
+        help="Largest function body, in AST nodes, that is inlined at its call sites; 0 disables inlining "
+             f"(default: {DEFAULT_MAX_INLINE_SIZE})",
+        type=int,
+        default=DEFAULT_MAX_INLINE_SIZE
+    )
+
+    parser.add_argument(
+        "--native",
+        help="Evaluate with plain Python values instead of AST objects, which is faster for numeric and list-heavy code",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--parallel",
+        help="Evaluate independent top-level assignments that call functions at the same time, in worker processes",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--max-steps", help="Stop the program after this many loop elements and function calls", type=int, default=None)
+    parser.add_argument("--timeout", help="Stop the program after this many seconds", type=float, default=None)
+    parser.add_argument(
+        "--max-memory", help="Stop the program once it has allocated about this many bytes", type=int, default=None)
+
+    parser.add_argument(
+        "--cache",
+        help=f"\"use\" loads the program compiled by an earlier run from {CACHE_DIRECTORY} if the file has not "
+             "changed, \"ignore\" compiles it without loading or saving it, and \"rebuild\" compiles it and saves it "
+             "(default: use)",
+        choices=[mode.value for mode in CacheMode],
+        default=CacheMode.USE.value
+    )
+
+    parser.add_argument(
+        "--debug", help="Report what the optimizer removed or reused before running", action="store_true")
+
     args = parser.parse_args()
 
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
+    memo = FunctionMemo(args.memo_size)
+
+    limits = None
+    if args.max_steps is not None or args.timeout is not None or args.max_memory is not None:
+        limits = ExecutionLimits(args.max_steps, args.timeout, args.max_memory)
+
     path_var = args.path
     visualize_path = args.visualize
 
@@ -58,10 +129,27 @@ if __name__ == "__main__":
 
         # Otherwise, just evaluate the code
         else:
-            _, output = evaluate(source, Environment())
+            ast = compile_file(path_var, source, not args.no_optimize, args.inline_size, CacheMode(args.cache))
+
+            # Programs with errors found before they run are not compiled, so "evaluate" can report the errors
+            _, output = evaluate(
+                source,
+                Environment(),
+                memo,
+                ast is None and not args.no_optimize,
+                args.native,
+                args.inline_size,
+                parallel_statements=args.parallel,
+                program_io=ProgramIO(stdout=sys.stdout),
+                limits=limits,
+                ast=ast
+            )
 
             if len(output) > 0:
                 print("\n".join(output))
+
+            if args.memo_stats:
+                print(memo.report())
     else:
         # Run the REPL if no file path is provided
-        repl()
+        repl(memo, not args.no_optimize, args.native, args.inline_size)
@@ -1,25 +1,68 @@
+import hashlib
+import sys
+import threading
+
 from interpreter.evaluator.environment_ import Environment
 from interpreter.evaluator.evaluator import Evaluator
+from interpreter.evaluator.limits import ExecutionLimits
+from interpreter.evaluator.memo import FunctionMemo
+from interpreter.evaluator.native_evaluator import NativeEvaluator
+from interpreter.optimizer.inlining import DEFAULT_MAX_INLINE_SIZE
+from interpreter.optimizer.optimizer import optimize
+from interpreter.optimizer.transform import walk
 from interpreter.parser_.ast_objects import Error, Expression
 from interpreter.parser_.parser_ import Parser
 from interpreter.tokens.token_queue import TokenQueue
 from interpreter.tokens.tokenizer import Tokenizer
 from utils.ast_visualizer import ASTVisualizer
+from utils.lru_cache import LRUCache
+from utils.program_io import ProgramIO
 from utils.utils import LanguageRuntimeException
 
 
-def evaluate(source: str, environment: Environment) -> tuple[list[Expression], list[str]]:
+def evaluate(
+        source: str,
+        environment: Environment,
+        memo: FunctionMemo | None = None,
+        optimize_ast: bool = True,
+        native: bool = False,
+        max_inline_size: int = DEFAULT_MAX_INLINE_SIZE,
+        keep_unused_variables: bool = False,
+        parallel_statements: bool = False,
+        program_io: ProgramIO | None = None,
+        limits: ExecutionLimits | None = None,
+        ast: list[Expression] | None = None
+) -> tuple[list[Expression], list[str]]:
     """Execute code in a file.
 
     Unlike REPL, this execution style does not use the results of each individual expression.
+
+    Pass "memo" to control the size of the function-result cache or to inspect its statistics afterwards. Set
+    "optimize_ast" to False to evaluate the program exactly as it was parsed. Set "native" to True to evaluate it with
+    "NativeEvaluator", which is faster for programs that spend most of their time on numbers, strings, and lists.
+    "max_inline_size" limits the size of the functions the optimizer inlines at their call sites. Set
+    "keep_unused_variables" to True if "environment" will be used again, so variables that this source does not read
+    are still assigned. Set "parallel_statements" to True to evaluate independent top-level assignments in worker
+    processes (see "StatementScheduler"). "program_io" sets the platform and the streams the program reads input from
+    and prints to; by default, printed lines are returned with the errors. "limits" stops the program with an error if
+    it runs for too many steps or too long (see "ExecutionLimits"). Pass "ast" if "source" has already been parsed (see
+    "parse").
     """
     try:
-        t = Tokenizer(source)
-        tokens = TokenQueue(t)
+        if ast is None:
+            ast = parse(source)
+
+        if optimize_ast:
+            try:
+                ast = optimize(ast, max_inline_size, keep_unused_variables)
+            except LanguageRuntimeException as e:
+                # Type errors found before the program runs are reported the same way as errors found while it runs
+                error_object = Error(e.line_num, str(e))
+                return [error_object], [str(error_object)]
 
-        p = Parser(tokens)
-        ast = p.parse()
-        return Evaluator(ast, environment).evaluate()
+        if native:
+            return NativeEvaluator(ast, environment, memo, parallel_statements, program_io, limits).evaluate()
+        return Evaluator(ast, environment, memo, parallel_statements, program_io, limits).evaluate()
 
     except LanguageRuntimeException as e:
         # This catch is needed for the parser and tokenizer. Evaluator.evaluate handles these errors on its own.
@@ -27,9 +70,68 @@ def evaluate(source: str, environment: Environment) -> tuple[list[Expression], l
         return [str(error_object)], []
 
 
-def visualize_ast(source: str) -> bytes:
+def parse(source: str) -> list[Expression]:
     t = Tokenizer(source)
-    tq = TokenQueue(t)
-    p = Parser(tq)
-    ast = p.parse()
+    tokens = TokenQueue(t)
+
+    p = Parser(tokens)
+    return p.parse()
+
+
+def visualize_ast(source: str, ast: list[Expression] | None = None) -> bytes:
+    """Create a PDF of the AST of "source". Pass "ast" if "source" has already been parsed (see "parse")."""
+    if ast is None:
+        ast = parse(source)
     return ASTVisualizer(ast).visualize()
+
+
+class ASTCache:
+    """Parsed programs, keyed by a hash of their source, that can be shared by many threads.
+
+    Neither the optimizer nor the evaluators change the ASTs they are given, so one parsed program can be evaluated or
+    visualized any number of times, at the same time. Least-recently-used programs are evicted once the cache holds
+    more than "max_size" programs, or their ASTs take up more than about "max_bytes" bytes (see "ast_size").
+    """
+
+    def __init__(self, max_size: int, max_bytes: int) -> None:
+        self.cache: LRUCache[str, list[Expression]] = LRUCache(max_size, max_bytes, ast_size)
+        self.lock = threading.Lock()
+
+    def parse(self, source: str) -> list[Expression]:
+        """Return the AST of "source", parsing it only if it is not already cached. Syntax errors are raised, and not
+        cached.
+        """
+        key = hashlib.sha256(source.encode()).hexdigest()
+        with self.lock:
+            ast = self.cache.get(key)
+
+        if ast is None:
+            # Parsing happens outside the lock so other threads are not kept waiting
+            ast = parse(source)
+            with self.lock:
+                self.cache.put(key, ast)
+        return ast
+
+    def stats(self) -> dict[str, int | float]:
+        with self.lock:
+            return {
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "hit_rate": self.cache.hit_rate,
+                "entries": len(self.cache),
+                "bytes": self.cache.byte_count,
+            }
+
+
+def ast_size(ast: list[Expression]) -> int:
+    """The approximate number of bytes an AST takes up: the size of each node, its attributes, and the lists and
+    strings it holds.
+    """
+    size = sys.getsizeof(ast)
+    for statement in ast:
+        for node in walk(statement):
+            size += sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+            for value in node.__dict__.values():
+                if isinstance(value, (list, str)):
+                    size += sys.getsizeof(value)
+    return size
@@ -0,0 +1,177 @@
+"""Serve the web app with several worker processes that share one listening socket, instead of Flask's development
+server.
+
+Run with "python server.py" from the repository root. The interpreter is imported and warmed up once, in the master
+process, before the workers are forked, so workers start serving requests right away and share the memory of the
+warmed-up modules. Workers that stop are replaced. The server stops when it receives SIGINT or SIGTERM.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import typing
+
+from werkzeug.serving import make_server
+
+import app as app_module
+from interpreter.evaluator.environment_ import Environment
+from main_utils import evaluate
+from utils.worker_pool import WorkerPool
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5000
+
+# Number of worker processes that handle requests
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Connections waiting to be accepted by a worker
+LISTEN_BACKLOG = 1024
+
+# Uses every builtin and most of the syntax, so the code that handles them is loaded and run before workers are forked
+WARM_UP_PROGRAM = """
+square = func n: n * n;
+numbers = for i in range <- (0, 100) if i % 3 == 0: square <- (i,);
+total = pmap <- (square, range <- (0, 10));
+words = ("a", "b") + ("c",);
+s = format <- ("$0, $1", "hello", "world");
+x = when len <- (numbers,): is 0: 0 else: numbers @ 0;
+y = (randint <- (1, 10)) + (round <- (randfloat <- (0, 1), 2)) + 5!;
+z = not true and false or 1 < 2 and is_whole_number <- (1.5,);
+m = {"a": 1, (1, 2): "b"};
+u = {1, 2,};
+print <- (numbers, total, words, s, x, y, z, m @ "a", u);
+"""
+
+
+def warm_up() -> None:
+    """Run the parts of the app that load or build something the first time they are used: parsing, optimizing, and
+    evaluating a program, hashing the interpreter's files (see "interpreter_version"), and compiling the templates.
+
+    Programs are evaluated in this process rather than in the app's worker pool, so no evaluation workers are started
+    before the HTTP workers are forked.
+    """
+    for native in [False, True]:
+        evaluate(WARM_UP_PROGRAM, Environment(), native=native)
+
+    app_module.result_key(WARM_UP_PROGRAM)
+    app_module.evaluate_program(
+        WARM_UP_PROGRAM,
+        None,
+        app_module.MAX_EVALUATION_STEPS,
+        app_module.EVALUATION_TIMEOUT,
+        app_module.MAX_EVALUATION_MEMORY,
+        app_module.MAX_OUTPUT_BYTES
+    )
+
+    with app_module.app.test_request_context():
+        app_module.app.jinja_env.get_template("index.html")
+        app_module.app.jinja_env.get_template("visualize.html")
+
+
+def serve(host: str, port: int, workers: int, evaluation_workers: int) -> None:
+    listener = socket.create_server((host, port), backlog=LISTEN_BACKLOG)
+    logging.info(f"Listening on http://{host}:{listener.getsockname()[1]} with {workers} workers")
+
+    warm_up()
+
+    # Objects that exist now are never collected, so collections in the workers do not write to (and copy) the pages
+    # they share with this process
+    gc.collect()
+    gc.freeze()
+
+    if not hasattr(os, "fork"):
+        # Windows cannot fork, so the only worker is this process
+        run_worker(listener, evaluation_workers)
+        return
+
+    children: set[int] = set()
+    is_stopping = False
+
+    def stop(*_: typing.Any) -> None:
+        nonlocal is_stopping
+        is_stopping = True
+        for child in children:
+            os.kill(child, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    def fork_worker() -> None:
+        child = os.fork()
+        if child == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            run_worker(listener, evaluation_workers)
+            os._exit(0)
+        children.add(child)
+
+    for _ in range(workers):
+        fork_worker()
+
+    while children:
+        try:
+            child, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        children.discard(child)
+        if not is_stopping:
+            logging.warning(f"Worker {child} stopped with status {status}; starting a new worker")
+            fork_worker()
+
+    listener.close()
+
+
+def run_worker(listener: socket.socket, evaluation_workers: int) -> None:
+    # Evaluation workers are started here, not in the master, so each HTTP worker has its own
+    app_module.EVALUATION_WORKERS = evaluation_workers
+    if evaluation_workers > 0:
+        app_module.evaluation_pool = WorkerPool(
+            evaluation_workers,
+            app_module.WORKER_TIMEOUT,
+            app_module.MAX_WORKER_RESULT_BYTES,
+            app_module.MAX_WORKER_MEMORY
+        )
+        app_module.evaluation_pool.start()
+
+    server = make_server(listener.getsockname()[0], 0, app_module.app, threaded=True, fd=listener.fileno())
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Boomerang web server")
+    parser.add_argument("--host", help=f"Address to listen on (default: {DEFAULT_HOST})", default=DEFAULT_HOST)
+    parser.add_argument("--port", help=f"Port to listen on (default: {DEFAULT_PORT})", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--workers",
+        help=f"Number of worker processes that handle requests (default: {DEFAULT_WORKERS})",
+        type=int,
+        default=DEFAULT_WORKERS
+    )
+    parser.add_argument(
+        "--evaluation-workers",
+        help="Number of processes each worker evaluates programs in; 0 evaluates them in the threads that handle "
+             "requests (default: the number of CPU cores divided by the number of workers, and at least 1)",
+        type=int,
+        default=None
+    )
+    parser.add_argument("--access-log", help="Log every request", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not args.access_log:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    if args.workers < 1:
+        sys.exit(f"--workers must be at least 1, got {args.workers}")
+
+    evaluation_workers = args.evaluation_workers
+    if evaluation_workers is None:
+        evaluation_workers = max((os.cpu_count() or 1) // args.workers, 1)
+
+    serve(args.host, args.port, args.workers, evaluation_workers)
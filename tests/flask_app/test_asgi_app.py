@@ -0,0 +1,70 @@
+import asyncio
+import urllib.parse
+
+import pytest
+
+import app as app_module
+import asgi
+from app import app as main_app
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    main_app.secret_key = "test_secret_key"
+    main_app.config.update({
+        "TESTING": True,
+    })
+
+    # Keep sessions out of the repository's instance folder
+    monkeypatch.setitem(main_app.config, "SESSION_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(main_app, "session_interface", app_module.create_session_interface(app_module.SESSION_BACKEND))
+    yield asgi.app
+
+
+async def request(app, method, path, form=None, cookie=None):
+    body = urllib.parse.urlencode(form or {}).encode()
+    headers = [(b"content-type", b"application/x-www-form-urlencoded")]
+    if cookie is not None:
+        headers.append((b"cookie", cookie))
+
+    messages = [{"type": "http.request", "body": body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path, "headers": headers}, receive, send)
+
+    start, response_body = sent
+    return start["status"], dict(start["headers"]), response_body["body"]
+
+
+def test_request_index(app):
+    status, _, body = asyncio.run(request(app, "GET", "/"))
+    assert status == 200
+    assert b"<h1>Boomerang</h1>" in body
+
+
+def test_request_interpret(app):
+    status, headers, _ = asyncio.run(request(app, "POST", "/interpret", {"source": "print <- (1 + 2,);"}))
+    assert status == 302
+    assert headers[b"location"] == b"/"
+
+    session_cookie = headers[b"set-cookie"].split(b";")[0]
+    _, _, body = asyncio.run(request(app, "GET", "/", cookie=session_cookie))
+    assert b"<li>3</li>" in body
+
+
+def test_request_download(app):
+    status, _, body = asyncio.run(request(app, "POST", "/download", {"source": "x = 1;"}))
+    assert status == 200
+    assert body == b"x = 1;"
+
+
+def test_request_stats(app):
+    status, headers, _ = asyncio.run(request(app, "GET", "/stats"))
+    assert status == 200
+    assert headers[b"content-type"] == b"application/json"
@@ -1,18 +1,24 @@
 import io
+import json
 
 import pytest
 from flask import session
 
+import app as app_module
 from app import app as main_app
 
 
 @pytest.fixture()
-def app():
+def app(tmp_path, monkeypatch):
     main_app.secret_key = "test_secret_key"
     main_app.config.update({
         "TESTING": True,
     })
 
+    # Keep sessions out of the repository's instance folder
+    monkeypatch.setitem(main_app.config, "SESSION_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(main_app, "session_interface", app_module.create_session_interface(app_module.SESSION_BACKEND))
+
     # other setup can go here
 
     yield main_app
@@ -126,3 +132,149 @@ def test_request_upload(client, data, num_redirects):
     assert response.status_code == 200
     assert len(response.history) == num_redirects
     assert response.request.path == "/"
+
+
+@pytest.fixture()
+def result_cache():
+    app_module.result_cache.clear()
+    app_module.result_cache.hits = 0
+    app_module.result_cache.misses = 0
+    yield app_module.result_cache
+    app_module.result_cache.clear()
+
+
+def test_interpret_result_cache(client, result_cache):
+    source = "for i in range <- (0, 3): print <- (i,);"
+    for _ in range(3):
+        with client:
+            client.post("/interpret", data={"source": source})
+            assert session.get("results") == json.dumps(["0", "1", "2"])
+
+    stats = client.get("/stats").get_json()["result_cache"]
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] == len(json.dumps(["0", "1", "2"]))
+
+
+@pytest.mark.parametrize("source", [
+    "randint <- (1, 10);",
+    "randfloat <- (1, 10);",
+    "x = input;",
+    "f = func: randint <- (1, 10); 1;",
+
+    # A program may run out of time on a busy server and not on an idle one
+    "for i in range <- (0, 1000): for j in range <- (0, 1000): j;",
+])
+def test_interpret_result_cache_skips_nondeterministic_programs(client, result_cache, monkeypatch, source):
+    monkeypatch.setattr(app_module, "EVALUATION_TIMEOUT", 0.01)
+
+    for _ in range(2):
+        client.post("/interpret", data={"source": source})
+
+    assert result_cache.hits == 0
+    assert result_cache.misses == 2
+    assert len(result_cache) == 0
+
+
+@pytest.fixture()
+def ast_cache(monkeypatch):
+    cache = app_module.ASTCache(app_module.AST_CACHE_SIZE, app_module.AST_CACHE_BYTES)
+    monkeypatch.setattr(app_module, "ast_cache", cache)
+    yield cache
+
+
+def test_ast_cache_shared_by_interpret_and_visualize(client, result_cache, ast_cache, monkeypatch):
+    visualized = []
+
+    def visualize_ast(source, ast):
+        visualized.append(ast)
+        return b""
+
+    monkeypatch.setattr(app_module, "visualize_ast", visualize_ast)
+
+    # Visualizing a program that was just run does not parse it again
+    client.post("/interpret", data={"source": "x = 1;"})
+    client.post("/visualize", data={"source": "x = 1;"})
+    assert ast_cache.cache.misses == 1
+    assert ast_cache.cache.hits == 1
+
+    # Neither does running a program that was just visualized
+    client.post("/visualize", data={"source": "y = 2;"})
+    client.post("/interpret", data={"source": "y = 2;"})
+    assert ast_cache.cache.misses == 2
+    assert ast_cache.cache.hits == 2
+
+    assert len(visualized) == 2
+    stats = client.get("/stats").get_json()["ast_cache"]
+    assert stats["entries"] == 2
+    assert stats["bytes"] > 0
+
+
+def test_ast_cache_skips_syntax_errors(client, result_cache, ast_cache):
+    client.post("/interpret", data={"source": "x = ;"})
+
+    assert ast_cache.cache.misses == 1
+    assert len(ast_cache.cache) == 0
+
+
+@pytest.fixture()
+def evaluation_pool(monkeypatch):
+    pool = app_module.WorkerPool(1, 0.5, app_module.MAX_WORKER_RESULT_BYTES)
+    monkeypatch.setattr(app_module, "evaluation_pool", pool)
+    monkeypatch.setattr(app_module, "EVALUATION_WORKERS", 1)
+    yield pool
+    pool.shutdown()
+
+
+def test_interpret_in_worker(client, result_cache, evaluation_pool):
+    with client:
+        client.post("/interpret", data={"source": "for i in range <- (0, 3): print <- (i,);"})
+        assert session.get("results") == json.dumps(["0", "1", "2"])
+
+    stats = client.get("/stats").get_json()["evaluation_pool"]
+    assert stats == {"workers": 1, "idle": 1, "restarts": 0}
+
+
+def test_interpret_worker_timeout(client, result_cache, evaluation_pool, monkeypatch):
+    # Programs that the evaluator does not stop in time are stopped by killing their worker
+    monkeypatch.setattr(app_module, "EVALUATION_TIMEOUT", 3600)
+    source = "for i in range <- (0, 10000): for j in range <- (0, 10000): print <- (j,);"
+
+    with client:
+        client.post("/interpret", data={"source": source})
+        assert session.get("results") == json.dumps(["Error: program exceeded the time limit of 0.5 seconds"])
+
+    assert len(result_cache) == 0
+    assert evaluation_pool.stats() == {"workers": 1, "idle": 1, "restarts": 1}
+
+    # The new worker runs the next program
+    with client:
+        client.post("/interpret", data={"source": "print <- (1,);"})
+        assert session.get("results") == json.dumps(["1"])
+
+
+def test_interpret_without_workers(client, result_cache, monkeypatch):
+    def fail(*_):
+        raise AssertionError("program was sent to a worker")
+
+    monkeypatch.setattr(app_module, "EVALUATION_WORKERS", 0)
+    monkeypatch.setattr(app_module.evaluation_pool, "run", fail)
+
+    with client:
+        client.post("/interpret", data={"source": "print <- (1,);"})
+        assert session.get("results") == json.dumps(["1"])
+
+
+def test_session_is_stored_on_server(client, result_cache):
+    # Far more output than fits in a cookie
+    source = "for i in range <- (0, 2000): print <- (i,);"
+    with client:
+        client.post("/interpret", data={"source": source})
+        assert session.get("source_code") == source
+        assert session.get("results") == json.dumps([str(i) for i in range(2000)])
+
+    assert len(client.get_cookie("session").value) == 43
+
+    response = client.get("/")
+    assert "<li>1999</li>" in response.text
@@ -0,0 +1,55 @@
+import http.client
+import os
+import signal
+import urllib.parse
+
+import pytest
+
+import app as app_module
+import server
+from benchmarks.load_test import free_port, start_server
+from interpreter.evaluator.environment_ import Environment
+from main_utils import evaluate
+
+
+def test_warm_up(monkeypatch):
+    def fail(*_):
+        raise AssertionError("warm-up program was sent to a worker")
+
+    pool = app_module.WorkerPool(1, 1, 1)
+    monkeypatch.setattr(pool, "run", fail)
+    monkeypatch.setattr(app_module, "evaluation_pool", pool)
+    server.warm_up()
+
+    assert pool.stats()["workers"] == 0
+
+
+def test_warm_up_program():
+    _, output = evaluate(server.WARM_UP_PROGRAM, Environment())
+    assert len(output) == 1
+    assert not output[0].startswith("Error")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="workers are only forked where the platform supports it")
+def test_serve(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSION_DIRECTORY", str(tmp_path))
+    port = free_port()
+    process = start_server(port, 2)
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        for _ in range(4):
+            connection.request("GET", "/")
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 200
+
+        body = urllib.parse.urlencode({"source": "print <- (1 + 2,);"})
+        connection.request("POST", "/interpret", body, {"Content-Type": "application/x-www-form-urlencoded"})
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 302
+        connection.close()
+    finally:
+        process.send_signal(signal.SIGTERM)
+
+    assert process.wait(timeout=30) == 0
@@ -0,0 +1,14 @@
+import pytest
+
+# Keyword arguments for "evaluator_actual_result". The optimizer and the native evaluator must not change what a
+# program does, so the integration tests run every program in each mode.
+EVALUATION_MODES = {
+    "optimized": {"optimize_ast": True},
+    "unoptimized": {"optimize_ast": False},
+    "native": {"native": True},
+}
+
+
+@pytest.fixture(params=list(EVALUATION_MODES.values()), ids=list(EVALUATION_MODES))
+def evaluation_mode(request):
+    return request.param
@@ -1,7 +1,7 @@
 import pytest
 
 import interpreter.parser_.ast_objects as o
-from interpreter.parser_.builtin_ast_objects import Print
+from interpreter.parser_.builtin_ast_objects import Print, IsWholeNumber
 from utils.utils import LanguageRuntimeException
 from tests.testing_utils import assert_expression_equal
 from interpreter.tokens import tokens as t
@@ -141,6 +141,11 @@ def test_add(left, right, expected_result):
         o.List(1, [o.Number(1, 1), o.Number(1, 1), o.Number(1, 3), o.Number(1, 4), o.Number(1, 4)]),
         o.List(1, [o.Number(1, 1), o.Number(1, 4)]),
         o.List(1, [o.Number(1, 3)])
+    ),
+    (
+        o.List(1, [o.Number(1, 1), o.String(1, "1"), o.Boolean(1, True), test_function]),
+        o.List(1, [o.Boolean(1, True), test_function]),
+        o.List(1, [o.Number(1, 1), o.String(1, "1")])
     )
 ])
 def test_sub(left, right, expected_result):
@@ -185,6 +190,11 @@ def test_sub(left, right, expected_result):
             ),
             o.List(1, [o.Number(1, 1), o.Number(1, 2)])
         )
+    ),
+    (
+        IsWholeNumber(1),
+        o.List(1, [o.Number(1, 2)]),
+        o.Boolean(1, True)
     )
 ])
 def test_ptr(left, right, expected_result):
@@ -303,6 +313,41 @@ def test_in_valid(left, right, expected_result):
     assert_expression_equal(expected_result, actual_result)
 
 
+def test_in_repeated():
+    """The first membership check scans the list; later checks use its hash index."""
+    values = o.List(1, [o.Number(1, i) for i in range(100)] + [o.List(1, [o.String(1, "a")]), test_function])
+
+    for _ in range(3):
+        assert values.has_value(o.Number(1, 99))
+        assert values.has_value(o.Number(1, 99.0))
+        assert not values.has_value(o.Number(1, 100))
+        assert not values.has_value(o.Boolean(1, True))
+        assert values.has_value(o.List(1, [o.String(1, "a")]))
+        assert values.has_value(test_function)
+
+    # Copies of a list share its index
+    relocated = values.relocate(2)
+    assert relocated.has_value(o.Number(2, 0))
+    assert relocated._cache is values._cache
+
+
+@pytest.mark.parametrize("left, right", [
+    (o.Number(1, 1), o.Number(2, 1.0)),
+    (o.String(1, "hello"), o.String(2, "hello")),
+    (o.Boolean(1, False), o.Boolean(2, False)),
+    (o.List(1, [o.Number(1, 1), o.List(1, [])]), o.List(2, [o.Number(2, 1), o.List(2, [])])),
+])
+def test_hash(left, right):
+    assert left == right
+    assert hash(left) == hash(right)
+    assert len({left, right}) == 1
+
+
+def test_hash_unhashable_list():
+    with pytest.raises(TypeError):
+        hash(o.List(1, [o.Number(1, 1), test_function]))
+
+
 @pytest.mark.parametrize("left, right, expected_error_message", [
     (o.Number(1, 1), o.Number(1, 1), "Error at line 1: invalid types Number and Number for IN"),
     (o.Number(1, 1), o.Boolean(1, True), "Error at line 1: invalid types Number and Boolean for IN"),
@@ -0,0 +1,122 @@
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.environment_ import Environment
+from main_utils import ASTCache, ast_size, evaluate
+from tests.testing_utils import evaluator_actual_result, assert_expressions_equal
+from utils.program_io import ProgramIO
+from utils.utils import Platform
+
+THREAD_COUNT = 16
+RUNS_PER_THREAD = 5
+PRINT_COUNT = 50
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    # Switch threads as often as possible, so evaluations interleave in the middle of printing
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def printing_program(thread_id: int) -> str:
+    return f"for i in range <- (0, {PRINT_COUNT}): print <- ({thread_id}, i);\nx = {thread_id};"
+
+
+def expected_lines(thread_id: int) -> list[str]:
+    return [f"{thread_id}, {i}" for i in range(PRINT_COUNT)]
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_concurrent_output_is_isolated(frequent_thread_switches, native):
+    barrier = threading.Barrier(THREAD_COUNT)
+
+    def run(thread_id: int) -> None:
+        barrier.wait()
+        for _ in range(RUNS_PER_THREAD):
+            actual_results, actual_output = evaluator_actual_result(printing_program(thread_id), native=native)
+            assert actual_output == expected_lines(thread_id)
+            assert_expressions_equal([o.Number(2, thread_id)], actual_results[-1:])
+
+    with ThreadPoolExecutor(THREAD_COUNT) as executor:
+        for future in [executor.submit(run, thread_id) for thread_id in range(THREAD_COUNT)]:
+            future.result()
+
+
+def test_concurrent_platforms_are_isolated(frequent_thread_switches):
+    # Programs on the web platform cannot read input, even while programs on other platforms are reading it
+    barrier = threading.Barrier(THREAD_COUNT)
+
+    def run(thread_id: int) -> None:
+        barrier.wait()
+        for _ in range(RUNS_PER_THREAD):
+            if thread_id % 2 == 0:
+                _, actual_output = evaluator_actual_result("input;", platform=Platform.WEB.name)
+                assert actual_output == ["Error at line 1: unsupported builtin function 'Input' for WEB platform"]
+            else:
+                actual_results, actual_output = evaluator_actual_result("input;", platform=Platform.TEST.name)
+                assert actual_output == []
+                assert len(actual_results) == 1
+
+    with ThreadPoolExecutor(THREAD_COUNT) as executor:
+        for future in [executor.submit(run, thread_id) for thread_id in range(THREAD_COUNT)]:
+            future.result()
+
+
+def test_concurrent_streams_are_isolated(frequent_thread_switches):
+    barrier = threading.Barrier(THREAD_COUNT)
+
+    def run(thread_id: int) -> None:
+        barrier.wait()
+        for _ in range(RUNS_PER_THREAD):
+            stdin = io.StringIO(f"{thread_id}\n")
+            stdout = io.StringIO()
+            source = f"name = input <- (\"name: \",);\n{printing_program(thread_id)}\nprint <- (name,);"
+
+            _, actual_output = evaluate(source, Environment(), program_io=ProgramIO(stdin=stdin, stdout=stdout))
+
+            assert actual_output == []
+            lines = [f"{thread_id}, {i}" for i in range(PRINT_COUNT)] + [f"\"{thread_id}\""]
+            assert stdout.getvalue() == "name: " + "".join(f"{line}\n" for line in lines)
+
+    with ThreadPoolExecutor(THREAD_COUNT) as executor:
+        for future in [executor.submit(run, thread_id) for thread_id in range(THREAD_COUNT)]:
+            future.result()
+
+
+def test_program_io_input_end_of_stream():
+    program_io = ProgramIO(stdin=io.StringIO(""))
+    with pytest.raises(EOFError):
+        program_io.input("name: ")
+
+
+def test_concurrent_ast_cache(frequent_thread_switches):
+    cache = ASTCache(THREAD_COUNT, 10 ** 8)
+    barrier = threading.Barrier(THREAD_COUNT)
+
+    def run(thread_id: int) -> None:
+        barrier.wait()
+        for run_id in range(RUNS_PER_THREAD):
+            # Every thread runs every program, so threads read programs other threads parsed
+            program_id = (thread_id + run_id) % THREAD_COUNT
+            source = printing_program(program_id)
+
+            actual_results, actual_output = evaluate(source, Environment(), ast=cache.parse(source))
+            assert actual_output == expected_lines(program_id)
+            assert_expressions_equal([o.Number(2, program_id)], actual_results[-1:])
+
+    with ThreadPoolExecutor(THREAD_COUNT) as executor:
+        for future in [executor.submit(run, thread_id) for thread_id in range(THREAD_COUNT)]:
+            future.result()
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == THREAD_COUNT * RUNS_PER_THREAD
+    assert stats["entries"] == THREAD_COUNT
+    assert stats["bytes"] == sum(ast_size(ast) for ast in cache.cache.entries.values())
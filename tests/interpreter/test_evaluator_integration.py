@@ -4,6 +4,7 @@ import interpreter.parser_.ast_objects as o
 from tests.testing_utils import assert_expressions_equal, evaluator_actual_result
 from interpreter.tokens.tokenizer import Token
 from interpreter.tokens.tokens import PLUS, LE, SEND, MINUS
+from utils.persistent_map import PersistentMap
 
 
 @pytest.mark.parametrize("source,expected_results", [
@@ -24,8 +25,8 @@ from interpreter.tokens.tokens import PLUS, LE, SEND, MINUS
     ("(1,)", [o.List(1, [o.Number(1, 1)])]),
     ("(1, 2, 3)", [o.List(1, [o.Number(1, 1), o.Number(1, 2), o.Number(1, 3)])]),
 ])
-def test_evaluator(source, expected_results):
-    actual_results, _ = evaluator_actual_result(f"{source};")
+def test_evaluator(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
     assert_expressions_equal(expected_results, actual_results)
 
 
@@ -88,6 +89,16 @@ def test_evaluator(source, expected_results):
     ("false or true", [o.Boolean(1, True)]),
     ("false or false", [o.Boolean(1, False)]),
 
+    # Short-circuit evaluation: the right side is only evaluated when it is needed
+    ("false and undefined", [o.Boolean(1, False)]),
+    ("false and 1 / 0", [o.Boolean(1, False)]),
+    ("true or undefined", [o.Boolean(1, True)]),
+    ("true and undefined", [o.Error(1, "Error at line 1: undefined variable: undefined")]),
+    ("false or undefined", [o.Error(1, "Error at line 1: undefined variable: undefined")]),
+    ("true and 1", [o.Error(1, "Error at line 1: Invalid types Boolean and Number for AND")]),
+    ("false or 1", [o.Error(1, "Error at line 1: invalid types Boolean and Number for OR")]),
+    ("1 and false", [o.Error(1, "Error at line 1: Invalid types Number and Boolean for AND")]),
+
     ("true xor true", [o.Boolean(1, False)]),
     ("true xor false", [o.Boolean(1, True)]),
     ("false xor true", [o.Boolean(1, True)]),
@@ -131,8 +142,8 @@ def test_evaluator(source, expected_results):
     ("(1,) == \"1\"", [o.Boolean(1, False)]),
     ("(1,) == (\"1\",)", [o.Boolean(1, False)])
 ])
-def test_binary_expressions(source, expected_results):
-    actual_results, _ = evaluator_actual_result(f"{source};")
+def test_binary_expressions(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
     assert_expressions_equal(expected_results, actual_results)
 
 
@@ -171,8 +182,8 @@ def test_binary_expressions(source, expected_results):
     ("16--++", [o.Number(1, 16)]),
     ("13++--", [o.Number(1, 13)]),
 ])
-def test_suffix_operators(source, expected_results):
-    actual_results, _ = evaluator_actual_result(f"{source};")
+def test_suffix_operators(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
     assert_expressions_equal(expected_results, actual_results)
 
 
@@ -214,8 +225,8 @@ def test_suffix_operators(source, expected_results):
         o.List(1, [o.List(1, [o.Number(1, 1), o.Number(1, 2), o.Number(1, 3)])])
     ])
 ])
-def test_valid_prefix_operations(source, expected_results):
-    actual_results, _ = evaluator_actual_result(f"{source};")
+def test_valid_prefix_operations(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
     assert_expressions_equal(expected_results, actual_results)
 
 
@@ -292,12 +303,12 @@ def test_valid_prefix_operations(source, expected_results):
         ]
     )
 ])
-def test_functions(source, expected_results):
-    actual_results, _ = evaluator_actual_result(source)
+def test_functions(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(source, **evaluation_mode)
     assert_expressions_equal(expected_results, actual_results)
 
 
-def test_when_if_implementation():
+def test_when_if_implementation(evaluation_mode):
     src = """
     a = 1;
     when:
@@ -335,7 +346,7 @@ def test_when_if_implementation():
         a == 4: "4"
         else: "0";
     """
-    actual_results, _ = evaluator_actual_result(src)
+    actual_results, _ = evaluator_actual_result(src, **evaluation_mode)
     expected_results = [
         o.Number(2, 1),
         o.String(3, "1"),
@@ -351,7 +362,7 @@ def test_when_if_implementation():
     assert_expressions_equal(expected_results, actual_results)
 
 
-def test_when_switch_implementation():
+def test_when_switch_implementation(evaluation_mode):
     src = """
     a = 1;
     when a:
@@ -389,7 +400,7 @@ def test_when_switch_implementation():
         is 4: "4"
         else: "0";
     """
-    actual_results, _ = evaluator_actual_result(src)
+    actual_results, _ = evaluator_actual_result(src, **evaluation_mode)
     expected_results = [
         o.Number(2, 1),
         o.String(3, "1"),
@@ -415,8 +426,8 @@ def test_when_switch_implementation():
     ("(1, 2) @ 0 == 1", [o.Boolean(1, True)]),
     ("(1, 2) @ 1.5", [o.Error(1, "Error at line 1: list index must be a whole number")]),
 ])
-def test_list_index(source, expected_ast):
-    actual_results, _ = evaluator_actual_result(f"{source};")
+def test_list_index(source, expected_ast, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
     assert_expressions_equal(expected_ast, actual_results)
 
 
@@ -454,6 +465,85 @@ def test_list_index(source, expected_ast):
         ]
     )
 ])
-def test_for_loop(source, expected_results):
-    actual_results, _ = evaluator_actual_result(f"{source};")
+def test_for_loop(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
+    assert_expressions_equal(expected_results, actual_results)
+
+
+def map_value(line_num: int, pairs: list[tuple[o.Expression, o.Expression]]) -> o.Map:
+    return o.Map(line_num, PersistentMap.from_items(pairs))
+
+
+def set_value(line_num: int, values: list[o.Expression]) -> o.Set:
+    return o.Set(line_num, PersistentMap.from_items((v, True) for v in values))
+
+
+@pytest.mark.parametrize("source, expected_results", [
+    ("{}", [map_value(1, [])]),
+    ("{\"a\": 1, \"b\": 1 + 1}", [map_value(1, [(o.String(1, "a"), o.Number(1, 1)), (o.String(1, "b"), o.Number(1, 2))])]),
+    ("{1: \"a\", 1: \"b\"}", [map_value(1, [(o.Number(1, 1), o.String(1, "b"))])]),
+    ("{\"a\": 1, \"b\": 2} @ \"b\"", [o.Number(1, 2)]),
+    ("{(1, 2): true} @ (1, 2)", [o.Boolean(1, True)]),
+    ("{\"a\": 1} @ \"b\"", [o.Error(1, "Error at line 1: key \"b\" not found in Map")]),
+    ("\"a\" in {\"a\": 1}", [o.Boolean(1, True)]),
+    ("1 in {\"a\": 1}", [o.Boolean(1, False)]),
+    ("(func: 1) in {\"a\": 1}", [o.Boolean(1, False)]),
+    ("{\"a\": 1} <- (\"b\", 2)", [map_value(1, [(o.String(1, "a"), o.Number(1, 1)), (o.String(1, "b"), o.Number(1, 2))])]),
+    ("{\"a\": 1} <- (\"a\", 2)", [map_value(1, [(o.String(1, "a"), o.Number(1, 2))])]),
+    ("{\"a\": 1, \"b\": 2} - (\"a\", \"c\")", [map_value(1, [(o.String(1, "b"), o.Number(1, 2))])]),
+    ("{\"a\": 1, \"b\": 2} - {\"b\",}", [map_value(1, [(o.String(1, "a"), o.Number(1, 1))])]),
+    ("{\"a\": 1} + {\"a\": 2, \"b\": 3}", [map_value(1, [(o.String(1, "a"), o.Number(1, 2)), (o.String(1, "b"), o.Number(1, 3))])]),
+    ("{1: 2, 3: 4} == {3: 4, 1: 2}", [o.Boolean(1, True)]),
+    ("{1: 2} == {1: 3}", [o.Boolean(1, False)]),
+    ("{(func: 1): 2}", [o.Error(1, "Error at line 1: invalid key type Function for Map")]),
+    ("{1: 2} <- (1,)", [o.Error(1, "Error at line 1: invalid types Map and List for SEND")]),
+    ("for k in {\"a\": 1, \"b\": 2}: k", [o.List(1, [o.String(1, "a"), o.String(1, "b")])]),
+    ("len <- ({1: 2, 3: 4},)", [o.Number(1, 2)]),
+    ("str = {\"a\": (1,), 2: {3,}}; print <- (str,)", [
+        map_value(1, [(o.String(1, "a"), o.List(1, [o.Number(1, 1)])), (o.Number(1, 2), set_value(1, [o.Number(1, 3)]))]),
+        o.List(1, [map_value(1, [(o.String(1, "a"), o.List(1, [o.Number(1, 1)])), (o.Number(1, 2), set_value(1, [o.Number(1, 3)]))])])
+    ]),
+])
+def test_map(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
     assert_expressions_equal(expected_results, actual_results)
+
+
+@pytest.mark.parametrize("source, expected_results", [
+    ("{,}", [set_value(1, [])]),
+    ("{3, 1, 2, 1}", [set_value(1, [o.Number(1, 3), o.Number(1, 1), o.Number(1, 2)])]),
+    ("2 in {1, 2}", [o.Boolean(1, True)]),
+    ("\"2\" in {1, 2}", [o.Boolean(1, False)]),
+    ("{1, 2} <- 3", [set_value(1, [o.Number(1, 1), o.Number(1, 2), o.Number(1, 3)])]),
+    ("{1, 2} <- 1", [set_value(1, [o.Number(1, 1), o.Number(1, 2)])]),
+    ("{1, 2} + {2, 3}", [set_value(1, [o.Number(1, 1), o.Number(1, 2), o.Number(1, 3)])]),
+    ("{1, 2, 3} - (2,)", [set_value(1, [o.Number(1, 1), o.Number(1, 3)])]),
+    ("{1, 2, 3} - {1, 3}", [set_value(1, [o.Number(1, 2)])]),
+    ("{1, 2} == {2, 1}", [o.Boolean(1, True)]),
+    ("{{1,}, {1,}}", [set_value(1, [set_value(1, [o.Number(1, 1)])])]),
+    ("{func: 1}", [o.Error(1, "Error at line 1: invalid value type Function for Set")]),
+    ("{1,} @ 0", [o.Error(1, "Error at line 1: invalid types Set and Number for INDEX")]),
+    ("for v in {1, 2} if v > 1: v", [o.List(1, [o.Number(1, 2)])]),
+    ("len <- ({1, 2, 3},)", [o.Number(1, 3)]),
+])
+def test_set(source, expected_results, evaluation_mode):
+    actual_results, _ = evaluator_actual_result(f"{source};", **evaluation_mode)
+    assert_expressions_equal(expected_results, actual_results)
+
+
+def test_map_and_set_output(evaluation_mode):
+    _, output = evaluator_actual_result("print <- ({\"a\": 1, 2: (3,)}, {1, \"b\"}, {}, {,});", **evaluation_mode)
+    assert output == ["{\"a\": 1, 2: (3)}, {1, \"b\"}, {}, {,}"]
+
+
+def test_short_circuit_skips_side_effects(evaluation_mode):
+    source = """
+    log = func s: (print <- (s,)) == (s,);
+    false and (log <- ("and",));
+    true or (log <- ("or",));
+    true and (log <- ("evaluated",));
+    """
+    actual_results, output = evaluator_actual_result(source, **evaluation_mode)
+
+    assert_expressions_equal([o.Boolean(3, False), o.Boolean(4, True), o.Boolean(5, True)], actual_results[1:])
+    assert output == ["\"evaluated\""]
@@ -17,10 +17,11 @@ from utils.utils import Platform
         o.Error(1, "Error at line 1: incorrect number of arguments. Expected 1 but got 0.")
     ),
 ])
-def test_input(params: list[str], platform: str, expected_result):
+def test_input(params: list[str], platform: str, expected_result, evaluation_mode):
     actual_results, output_results = evaluator_actual_result(
         f"input <- ({params_str(params)});",
-        platform=platform
+        platform=platform,
+        **evaluation_mode
     )
     assert_expressions_equal([expected_result], actual_results)
 
@@ -47,8 +48,8 @@ def test_input(params: list[str], platform: str, expected_result):
         []
     ),
 ])
-def test_print(params, expected_result, expected_output_results):
-    actual_results, output_results = evaluator_actual_result(f"print <- ({params_str(params)});")
+def test_print(params, expected_result, expected_output_results, evaluation_mode):
+    actual_results, output_results = evaluator_actual_result(f"print <- ({params_str(params)});", **evaluation_mode)
     assert output_results == expected_output_results
     assert_expressions_equal([expected_result], actual_results)
 
@@ -71,10 +72,10 @@ def test_print(params, expected_result, expected_output_results):
     (["0.1", "0.2"], False, 0.1, 0.2),
     (["-0.5", "0.5"], False, -0.5, 0.5),
 ])
-def test_random(params, is_randint, low, high):
+def test_random(params, is_randint, low, high, evaluation_mode):
     func_name = "randint" if is_randint else "randfloat"
     for _ in range(100):
-        ast_results, _ = evaluator_actual_result(f"{func_name} <- ({params_str(params)});")
+        ast_results, _ = evaluator_actual_result(f"{func_name} <- ({params_str(params)});", **evaluation_mode)
         actual_value = ast_results[0]
 
         assert type(actual_value) == o.Number
@@ -140,10 +141,10 @@ def test_random(params, is_randint, low, high):
         )
     ),
 ])
-def test_randint_error(params, error_result):
+def test_randint_error(params, error_result, evaluation_mode):
     """randint only accepts whole (integer) numbers.
     """
-    ast_results, _ = evaluator_actual_result(f"randint <- ({params_str(params)});")
+    ast_results, _ = evaluator_actual_result(f"randint <- ({params_str(params)});", **evaluation_mode)
     assert ast_results[0] == error_result
 
 
@@ -185,11 +186,11 @@ def test_randint_error(params, error_result):
         )
     ),
 ])
-def test_randfloat_error(params, error_result):
+def test_randfloat_error(params, error_result, evaluation_mode):
     """randfloat does not have whole-number errors because the function returns a random decimal (float) point value
     between two numbers, both of which can be decimal (floating-point) numbers.
     """
-    ast_results, _ = evaluator_actual_result(f"randfloat <- ({params_str(params)});")
+    ast_results, _ = evaluator_actual_result(f"randfloat <- ({params_str(params)});", **evaluation_mode)
     assert ast_results[0] == error_result
 
 
@@ -235,8 +236,8 @@ def test_randfloat_error(params, error_result):
         o.Error(1, "Error at line 1: unsupported type Function for built-in function len")
     ),
 ])
-def test_len(params, length):
-    ast_results, _ = evaluator_actual_result(f"len <- ({params_str(params)});")
+def test_len(params, length, evaluation_mode):
+    ast_results, _ = evaluator_actual_result(f"len <- ({params_str(params)});", **evaluation_mode)
     assert_expressions_equal([length], ast_results)
 
 
@@ -332,8 +333,8 @@ def test_len(params, length):
         o.Error(1, "Error at line 1: step value must be negative if start value is greater than end value")
     ),
 ])
-def test_range(params, expected_result):
-    ast_results, _ = evaluator_actual_result(f"range <- ({params_str(params)});")
+def test_range(params, expected_result, evaluation_mode):
+    ast_results, _ = evaluator_actual_result(f"range <- ({params_str(params)});", **evaluation_mode)
     assert_expressions_equal([expected_result], ast_results)
 
 
@@ -401,8 +402,8 @@ def test_range(params, expected_result):
         o.Error(1, "Error at line 1: round_to must be greater than or equal to 0")
     ),
 ])
-def test_round(params, expected_result):
-    ast_results, _ = evaluator_actual_result(f"round <- ({params_str(params)});")
+def test_round(params, expected_result, evaluation_mode):
+    ast_results, _ = evaluator_actual_result(f"round <- ({params_str(params)});", **evaluation_mode)
     assert_expressions_equal([expected_result], ast_results)
 
 
@@ -436,8 +437,8 @@ def test_round(params, expected_result):
         o.String(1, "I am 20 years old, and my name is John")
     ),
 ])
-def test_format(params, expected_result):
-    ast_results, _ = evaluator_actual_result(f"format <- ({params_str(params)});")
+def test_format(params, expected_result, evaluation_mode):
+    ast_results, _ = evaluator_actual_result(f"format <- ({params_str(params)});", **evaluation_mode)
     assert_expressions_equal([expected_result], ast_results)
 
 
@@ -467,11 +468,52 @@ def test_format(params, expected_result):
         o.Boolean(1, False)
     ),
 ])
-def test_is_whole_number(params, expected_result):
-    ast_results, _ = evaluator_actual_result(f"is_whole_number <- ({params_str(params)});")
+def test_is_whole_number(params, expected_result, evaluation_mode):
+    ast_results, _ = evaluator_actual_result(f"is_whole_number <- ({params_str(params)});", **evaluation_mode)
     assert_expressions_equal([expected_result], ast_results)
 
 
+@pytest.mark.parametrize("params, expected_result", [
+    (
+        ["double", "(1, 2, 3)"],
+        o.List(1, [o.Number(1, 2), o.Number(1, 4), o.Number(1, 6)])
+    ),
+    (
+        ["double", "()"],
+        o.List(1, [])
+    ),
+    (
+        ["double", "{1: \"a\", 2: \"b\"}"],
+        o.List(1, [o.Number(1, 2), o.Number(1, 4)])
+    ),
+    (
+        ["double", "{3,}"],
+        o.List(1, [o.Number(1, 6)])
+    ),
+    (
+        ["double"],
+        o.Error(1, "Error at line 1: incorrect number of arguments. Expected 2 but got 1.")
+    ),
+    (
+        ["1", "(1, 2)"],
+        o.Error(1, "Error at line 1: expected Function for function, got Number")
+    ),
+    (
+        ["double", "1"],
+        o.Error(1, "Error at line 1: expected List for values, got Number")
+    ),
+    (
+        ["double", "(1, \"a\")"],
+        o.Error(1, "Error at line 1: invalid types String and Number for MULTIPLY")
+    ),
+])
+def test_pmap(params, expected_result, evaluation_mode):
+    ast_results, _ = evaluator_actual_result(
+        f"double = func n: n * 2; pmap <- ({params_str(params)});", **evaluation_mode
+    )
+    assert_expressions_equal([expected_result], ast_results[-1:])
+
+
 def params_str(params: list[str]) -> str:
     """Take list of parameters and return them as a comma-separated string."""
     return ", ".join(params) + ("," if len(params) == 1 else "")
@@ -0,0 +1,173 @@
+import math
+import sys
+
+import pytest
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator import limits as limits_module
+from interpreter.evaluator import parallel
+from interpreter.evaluator.limits import ExecutionLimits
+from interpreter.evaluator.memory import range_length
+from tests.testing_utils import evaluator_actual_result, assert_expressions_equal
+
+
+@pytest.mark.parametrize("optimize_ast", [False, True])
+@pytest.mark.parametrize("native", [False, True])
+@pytest.mark.parametrize("source, max_steps, expected_line", [
+    # Each loop element is a step
+    ("for i in range <- (0, 100): i;", 10, 1),
+    ("x = 1;\nfor i in range <- (0, 10): for j in range <- (0, 10): i + j;", 50, 2),
+
+    # Each function call is a step
+    ("f = func n: n + 1;\nf <- (1,);\nf <- (2,);", 1, 3),
+    ("f = func n: when n: is 0: 0 else: f <- (n - 1,);\nf <- (100,);", 20, 1),
+    ("f = func n: n * 2;\npmap <- (f, range <- (0, 10));", 5, 2),
+])
+def test_step_limit(source, max_steps, expected_line, native, optimize_ast):
+    # Inlined calls are steps too, so optimizing does not change the number of steps
+    actual_results, actual_output = evaluator_actual_result(
+        source, optimize_ast=optimize_ast, limits=ExecutionLimits(max_steps=max_steps), native=native
+    )
+
+    message = f"program exceeded the limit of {max_steps} steps"
+    expected_error = o.Error(expected_line, f"Error at line {expected_line}: {message}")
+    assert_expressions_equal([expected_error], actual_results)
+    assert actual_output == [str(expected_error)]
+
+
+@pytest.mark.parametrize("native", [False, True])
+@pytest.mark.parametrize("source, max_steps", [
+    ("for i in range <- (0, 100): i;", 100),
+    ("f = func n: n + 1;\nf <- (1,);\nf <- (2,);", 2),
+    ("x = 1 + 2;", 0),
+])
+def test_within_step_limit(source, max_steps, native):
+    expected_results, expected_output = evaluator_actual_result(source, native=native)
+    actual_results, actual_output = evaluator_actual_result(
+        source, limits=ExecutionLimits(max_steps=max_steps), native=native
+    )
+
+    assert_expressions_equal(expected_results, actual_results)
+    assert actual_output == expected_output
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_output_before_limit(native):
+    source = "for i in range <- (0, 10): print <- (i,);"
+    actual_results, actual_output = evaluator_actual_result(
+        source, limits=ExecutionLimits(max_steps=3), native=native
+    )
+
+    expected_error = o.Error(1, "Error at line 1: program exceeded the limit of 3 steps")
+    assert_expressions_equal([expected_error], actual_results)
+    assert actual_output == ["0", "1", "2", str(expected_error)]
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_time_limit(native, monkeypatch):
+    monkeypatch.setattr(limits_module, "DEADLINE_CHECK_INTERVAL", 1)
+
+    source = "x = 1;\nfor i in range <- (0, 100): i;"
+    actual_results, actual_output = evaluator_actual_result(source, limits=ExecutionLimits(timeout=0), native=native)
+
+    expected_error = o.Error(2, "Error at line 2: program exceeded the time limit of 0 seconds")
+    assert_expressions_equal([expected_error], actual_results)
+    assert actual_output == [str(expected_error)]
+
+
+def test_deadline_is_checked_periodically(monkeypatch):
+    clock_reads = []
+
+    def monotonic():
+        clock_reads.append(None)
+        return 0.0
+
+    monkeypatch.setattr(limits_module.time, "monotonic", monotonic)
+    limits = ExecutionLimits(timeout=1)
+    for _ in range(limits_module.DEADLINE_CHECK_INTERVAL * 3):
+        limits.step(1)
+
+    # Once to set the deadline, and once per interval
+    assert len(clock_reads) == 4
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_limits_evaluate_pmap_serially(native, monkeypatch):
+    source = "f = func n: n * 2;\nx = pmap <- (f, range <- (0, 10));\ny = f <- (1,);"
+    expected_results, _ = evaluator_actual_result(source, native=native)
+
+    def fail(*_):
+        raise AssertionError("work was sent to a worker process")
+
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+    monkeypatch.setattr(parallel, "PARALLEL_THRESHOLD", 1)
+    monkeypatch.setattr(parallel, "get_executor", fail)
+    actual_results, _ = evaluator_actual_result(
+        source, limits=ExecutionLimits(max_steps=100), native=native, parallel_statements=True
+    )
+
+    assert_expressions_equal(expected_results, actual_results)
+
+
+@pytest.mark.parametrize("native", [False, True])
+@pytest.mark.parametrize("source, max_memory, expected_line", [
+    # Predicted before the result is built
+    ("x = 1;\nrange <- (0, 1000000000);", 10 ** 6, 2),
+    ("range <- (0, 1000000000, 1);", 10 ** 6, 1),
+    ("range <- (1000000000, 0, -1);", 10 ** 6, 1),
+    ("range <- (1000000000,);", 10 ** 6, 1),
+    ("l = range <- (0, 1000);\nl + l + l + l;", 100_000, 2),
+    ("s = \"abcdefghij\";\nt = s + s;\nt + t;", 50, 3),
+    ("100000!;", 10_000, 1),
+    ("(-100000)!;", 10_000, 1),
+    ("l = range <- (0, 1000);\nl <- 1;", 70_000, 2),
+
+    # Counted as it is allocated
+    ("for i in range <- (0, 10): range <- (0, 1000);", 100_000, 1),
+])
+def test_memory_limit(source, max_memory, expected_line, native):
+    # Not optimized, because hoisting changes which allocations the program makes
+    actual_results, actual_output = evaluator_actual_result(
+        source, optimize_ast=False, limits=ExecutionLimits(max_memory=max_memory), native=native
+    )
+
+    message = f"program exceeded the memory limit of {max_memory} bytes"
+    expected_error = o.Error(expected_line, f"Error at line {expected_line}: {message}")
+    assert_expressions_equal([expected_error], actual_results)
+    assert actual_output == [str(expected_error)]
+
+
+@pytest.mark.parametrize("native", [False, True])
+@pytest.mark.parametrize("source", [
+    "range <- (0, 1000);",
+    "l = range <- (0, 100); l + l;",
+    "s = \"abc\"; s + s;",
+    "20!;",
+    "range <- (0, 10, 0);",
+    "range <- (10, 0);",
+    "range <- (\"a\",);",
+    "\"a\" + (1, 2);",
+])
+def test_within_memory_limit(source, native):
+    expected_results, expected_output = evaluator_actual_result(source, native=native)
+    actual_results, actual_output = evaluator_actual_result(
+        source, limits=ExecutionLimits(max_memory=100_000), native=native
+    )
+
+    assert_expressions_equal(expected_results, actual_results)
+    assert actual_output == expected_output
+
+
+@pytest.mark.parametrize("arguments, expected_length", [
+    ((10.0,), 10),
+    ((o.Number(1, 2), o.Number(1, 12), o.Number(1, 3)), 4),
+    ((10.0, 0.0, -2.5), 4),
+    ((0.0, math.inf), sys.maxsize),
+    ((math.inf, math.inf), 0),
+    ((0.0, 10.0, 0.0), 0),
+    ((10.0, 0.0), 0),
+    (("a",), 0),
+    ((), 0),
+])
+def test_range_length(arguments, expected_length):
+    assert range_length(arguments) == expected_length
@@ -0,0 +1,192 @@
+import pytest
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.memo import FunctionMemo
+from interpreter.evaluator.purity import analyze_function
+from tests.testing_utils import evaluator_actual_result, assert_expressions_equal
+from utils.lru_cache import LRUCache
+
+
+def evaluate_with_memo(source: str, memo: FunctionMemo) -> tuple[list[o.Expression], list[str]]:
+    # Not optimized, because inlined calls are not memoized
+    return evaluator_actual_result(source, memo=memo, optimize_ast=False)
+
+
+def function_purity(source: str, function_name: str) -> bool:
+    env = Environment()
+    evaluator_actual_result(source, env=env)
+
+    function = env.get_var(function_name)
+    assert isinstance(function, o.Function)
+    return analyze_function(function, env).is_pure
+
+
+@pytest.mark.parametrize("source, is_pure", [
+    ("f = func a, b: a + b;", True),
+    ("f = func n: when: n < 2: n else: (f <- (n - 1,)) + (f <- (n - 2,));", True),
+    ("f = func xs: for x in xs if x > 0: x * 2;", True),
+    ("f = func s: len <- (s,);", True),
+    ("f = func a: print <- (a,);", False),
+    ("f = func a: input <- (a,);", False),
+    ("f = func: randint <- (10,);", False),
+    ("f = func: randfloat <- ();", False),
+
+    # Transitively impure
+    ("g = func a: print <- (a,); f = func a: g <- (a,);", False),
+    ("g = func a: f <- (a,); f = func a: when: a > 0: g <- (a - 1,) else: print <- (a,);", False),
+
+    # Builtins that are stored in variables
+    ("p = print; f = func a: p <- (a,);", False),
+    ("fs = (print,); f = func a: (fs @ 0) <- (a,);", False),
+
+    # Nested functions are treated as if they are called
+    ("f = func a: (func b: print <- (b,)) <- (a,);", False),
+
+    # Undefined variables
+    ("f = func: undefined;", False),
+    ("f = func: (x = 1) + x;", True),
+])
+def test_function_purity(source, is_pure):
+    assert function_purity(source, "f") == is_pure
+
+
+@pytest.mark.parametrize("source, expected_results", [
+    (
+        # Free variables are part of the cache key
+        "x = 1; f = func: x; f <- (); x = 2; f <- ();",
+        [o.Number(1, 1), o.Function(1, [], o.Identifier(1, "x")), o.Number(1, 1), o.Number(1, 2), o.Number(1, 2)]
+    ),
+    (
+        # Functions are dynamically scoped, so "n" in "g" refers to the parameter of "h"
+        "g = func: n * 2; h = func n: g <- (); h <- (3,); h <- (4,);",
+        [
+            o.Function(1, [], o.Identifier(1, "n")),
+            o.Function(1, [], o.Identifier(1, "g")),
+            o.Number(1, 6),
+            o.Number(1, 8)
+        ]
+    ),
+])
+def test_memoized_results(source, expected_results):
+    memo = FunctionMemo()
+    actual_results, _ = evaluate_with_memo(source, memo)
+
+    # Only the types, values, and line numbers of non-function results are compared
+    assert len(actual_results) == len(expected_results)
+    assert_expressions_equal(
+        [e for e in expected_results if not isinstance(e, o.Function)],
+        [a for a in actual_results if not isinstance(a, o.Function)]
+    )
+
+
+@pytest.mark.parametrize("source, expected_output", [
+    # Rebinding a function the memoized function calls
+    ("h = func: 1; f = func n: (h <- ()) + n; a = f <- (1,); h = func: 10; b = f <- (1,); print <- (a, b);", "2, 11"),
+    ("fs = (func: 1, func: 2); r = for g in fs: (func n: (g <- ()) + n) <- (1,); print <- (r,);", "(2, 3)"),
+    (
+        "h = func: 1; f = func: for i in (1, 2): h <- (); a = f <- (); h = func: 2; b = f <- (); print <- (a, b);",
+        "(1, 1), (2, 2)"
+    ),
+])
+def test_rebound_functions(source, expected_output, evaluation_mode):
+    _, output = evaluator_actual_result(source, memo=FunctionMemo(), **evaluation_mode)
+    _, unmemoized_output = evaluator_actual_result(source, memo=FunctionMemo(0), **evaluation_mode)
+
+    assert output == [expected_output]
+    assert output == unmemoized_output
+
+
+def test_memoized_result_line_numbers():
+    source = """
+    square = func n: n * n;
+    square <- (2,);
+    square <- (2,);
+    """
+    memo = FunctionMemo()
+    actual_results, _ = evaluate_with_memo(source, memo)
+
+    assert_expressions_equal([o.Number(3, 4), o.Number(4, 4)], actual_results[1:])
+    assert memo.hits == 1
+    assert memo.misses == 1
+
+
+def test_fibonacci_memoization():
+    source = """
+    fib = func n: when: n < 2: n else: (fib <- (n - 1,)) + (fib <- (n - 2,));
+    fib <- (70,);
+    """
+    memo = FunctionMemo()
+    actual_results, _ = evaluate_with_memo(source, memo)
+
+    assert actual_results[-1] == o.Number(3, 190392490709135)
+
+    # Each value of "n" is evaluated exactly once
+    assert memo.misses == 71
+    assert memo.hits == 68
+
+
+def test_impure_functions_are_not_memoized():
+    source = "p = func a: print <- (a,); p <- (1,); p <- (1,);"
+    memo = FunctionMemo()
+    _, output = evaluate_with_memo(source, memo)
+
+    assert output == ["1", "1"]
+    assert memo.hits == 0
+    assert memo.misses == 0
+
+
+def test_memoization_disabled():
+    memo = FunctionMemo(0)
+    evaluate_with_memo("f = func a: a; f <- (1,); f <- (1,);", memo)
+
+    assert memo.hits == 0
+    assert memo.hit_rate == 0
+
+
+def test_lru_cache_eviction():
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    # Accessing "a" makes "b" the least recently used entry
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get("b") is None
+
+    assert cache.hits == 3
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.75
+
+
+def test_lru_cache_size_eviction():
+    cache: LRUCache[str, str] = LRUCache(10, max_bytes=6, size_of=len)
+    cache.put("a", "aa")
+    cache.put("b", "bb")
+    cache.put("c", "cc")
+    assert cache.byte_count == 6
+
+    # "a" is evicted to make room, even though the cache holds fewer than 10 entries
+    assert cache.get("b") == "bb"
+    cache.put("d", "d")
+    assert "a" not in cache
+    assert cache.byte_count == 5
+
+    # Replacing an entry replaces its size
+    cache.put("d", "dddd")
+    assert "c" not in cache
+    assert cache.byte_count == 6
+
+    # Entries larger than the cache are not stored
+    cache.put("e", "eeeeeee")
+    assert "e" not in cache
+    assert cache.get("b") == "bb"
+    assert cache.byte_count == 6
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.byte_count == 0
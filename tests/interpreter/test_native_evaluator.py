@@ -0,0 +1,112 @@
+import typing
+
+import pytest
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.native import box, unbox, native_equal, equality_key
+from tests.testing_utils import evaluator_actual_result, assert_expression_equal
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1.0, o.Number(1, 1.0)),
+    (6, o.Number(1, 6)),
+    ("a", o.String(1, "a")),
+    (True, o.Boolean(1, True)),
+    ((1.0, ("a", False)), o.List(1, [o.Number(1, 1.0), o.List(1, [o.String(1, "a"), o.Boolean(1, False)])])),
+])
+def test_box_and_unbox(value, expected):
+    assert_expression_equal(expected, box(value, 1))
+    assert unbox(expected) == value
+
+
+@pytest.mark.parametrize("left, right, expected", [
+    (1.0, 1, True),
+    (1.0, True, False),
+    (True, 1.0, False),
+    (0.0, False, False),
+    ("a", "a", True),
+    ((1.0, 2.0), (1, 2), True),
+    ((1.0,), (True,), False),
+    ((1.0,), (1.0, 2.0), False),
+    ((), "", False),
+])
+def test_native_equal(left, right, expected):
+    assert native_equal(left, right) == expected
+    assert (equality_key(left) == equality_key(right)) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "1 + 2 * 3 - 4 / 5;",
+    "7 % 3; 2 ** 10; -5; +-5; 5++; 5--; 5!; 0!; -3!;",
+    "\"a\" + \"b\"; \"a\" == \"a\"; \"a\" != \"b\";",
+    "true and false; true or false; true xor true; not false;",
+    "1 == true; (1, 2) == (1, 2); (1,) == (true,); 1 != \"1\";",
+    "(1, 2) + (3,); (1, 2) <- 3; -(1, 2, 3); **(1, 2); (1, 2, 3, 2) - (2,);",
+    "l = (4, 5, 6); l @ 0; l @ -1; 5 in l; true in (1,); (1,) in ((1,), 2); \"a\" in (\"a\",);",
+    "m = {\"a\": 1, (1, 2): 2}; m @ \"a\"; m @ (1, 2); \"a\" in m; m <- (\"b\", 3); m + {\"c\": 4}; m - (\"a\",);",
+    "s = {1, 2, 3}; 2 in s; s <- 4; s + {5,}; s - (1,); for x in s: x * 2;",
+    "for x in {\"a\": 1, \"b\": 2}: x;",
+    "for i in range <- (0, 10) if i % 2 == 0: i * i;",
+    "for i in (1, 2): for j in (3, 4): (i, j);",
+    "add = func a, b: a + b; add <- (1, 2); add <- (\"a\", \"b\");",
+    "fib = func n: when: n < 2: n else: (fib <- (n - 1,)) + (fib <- (n - 2,)); fib <- (15,);",
+    "f = func: x; x = 5; f <- ();",
+    "x = 3; when x: is 1: \"one\" is 3: \"three\" else: \"other\";",
+    "when: 1 > 2: \"a\" else: \"b\";",
+    "print <- (1, \"a\", (true,)); len <- ((1, 2),); round <- (3.14159, 2);",
+    "format <- (\"<0> <1>\", (1, \"a\"));",
+    "false and (1 / 0); true or (1 / 0);",
+    "f = func a: a; g = f; (g <- (1,)) + 1;",
+    "x = (1, (2, 3)); (x @ 1) @ 0;",
+    "l = (1, 2); m = {l: \"list\"}; m @ (1, 2);",
+])
+def test_native_results_match(source):
+    expected_results, expected_output = evaluator_actual_result(source, optimize_ast=True)
+    actual_results, actual_output = evaluator_actual_result(source, optimize_ast=True, native=True)
+
+    assert actual_output == expected_output
+    assert [str(r) for r in actual_results if not isinstance(r, o.Function)] == \
+        [str(r) for r in expected_results if not isinstance(r, o.Function)]
+
+
+@pytest.mark.parametrize("source", [
+    "1 + true;",
+    "x = 1;\n\"a\" - x;",
+    "1 / 0;",
+    "1 % 0;",
+    "(1, 2) @ 2;",
+    "(1, 2) @ 0.5;",
+    "{\"a\": 1} @ \"b\";",
+    "1.5!;",
+    "-\"a\";",
+    "not 1;",
+    "undefined_variable;",
+    "f = func a: a;\nf <- (1, 2);",
+    "for x in 1: x;",
+    "for x in (1, 2) if x: x;",
+    "{func: 1: 2};",
+    "l = (1,);\nfor x in (1, 2):\n  l @ x;",
+])
+def test_native_errors_match(source):
+    expected_results, expected_output = evaluator_actual_result(source)
+    actual_results, actual_output = evaluator_actual_result(source, native=True)
+
+    assert actual_output == expected_output
+    assert len(actual_results) == 1
+    assert_expression_equal(expected_results[0], actual_results[0])
+
+
+def test_native_environment():
+    env = Environment()
+
+    evaluator_actual_result("x = (1, 2); f = func a: a + 1;", env=env, native=True)
+    assert_expression_equal(o.List(1, [o.Number(1, 1), o.Number(1, 2)]), typing.cast(o.Expression, env.get_var("x")))
+    assert isinstance(env.get_var("f"), o.Function)
+
+    # Variables from previous runs, like earlier lines in the REPL, can be used by both evaluators
+    actual_results, _ = evaluator_actual_result("f <- (x @ 1,);", env=env, native=True)
+    assert_expression_equal(o.Number(1, 3), actual_results[0])
+
+    actual_results, _ = evaluator_actual_result("f <- (x @ 0,);", env=env)
+    assert_expression_equal(o.Number(1, 2), actual_results[0])
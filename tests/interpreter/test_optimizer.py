@@ -0,0 +1,519 @@
+import logging
+
+import pytest
+
+import interpreter.parser_.ast_objects as o
+import interpreter.parser_.builtin_ast_objects as bo
+from interpreter.evaluator.evaluator import Evaluator
+from interpreter.evaluator.memo import FunctionMemo
+from interpreter.optimizer.constant_folding import fold_constants
+from interpreter.optimizer.optimizer import optimize
+from interpreter.optimizer.transform import walk
+from interpreter.optimizer.type_inference import infer_types
+from interpreter.tokens.token import Token
+from interpreter.tokens import tokens as t
+from tests import testing_utils
+from tests.testing_utils import evaluator_actual_result, assert_expressions_equal
+from utils.persistent_map import PersistentMap
+from utils.utils import LanguageRuntimeException
+
+
+def optimized_ast(source: str, keep_unused_variables: bool = True) -> list[o.Expression]:
+    return optimize(testing_utils.parser(source).parse(), keep_unused_variables=keep_unused_variables)
+
+
+def assert_optimized_results_match(source: str) -> None:
+    """Check that the optimized program produces the same results, output, errors, and line numbers as the original.
+    Functions are not compared because their bodies are optimized too.
+    """
+    expected_results, expected_output = evaluator_actual_result(source, optimize_ast=False)
+    actual_results, actual_output = evaluator_actual_result(source, optimize_ast=True)
+
+    assert len(actual_results) == len(expected_results)
+    assert_expressions_equal(
+        [e for e in expected_results if not isinstance(e, o.Function)],
+        [a for a in actual_results if not isinstance(a, o.Function)]
+    )
+    assert actual_output == expected_output
+
+
+@pytest.mark.parametrize("source, expected_ast", [
+    ("1 + 2 * 3;", [o.Number(1, 7)]),
+    ("-(10 / 4);", [o.Number(1, -2.5)]),
+    ("\"a\" + \"b\";", [o.String(1, "ab")]),
+    ("1 < 2 and not false;", [o.Boolean(1, True)]),
+    ("1 > 2 and f <- ();", [o.Boolean(1, False)]),
+    ("true or x;", [o.Boolean(1, True)]),
+    ("1 in (1, 2);", [o.Boolean(1, True)]),
+    ("4++;", [o.Number(1, 5)]),
+    ("(1, 1 + 1);", [o.Constant(1, o.List(1, [o.Number(1, 1), o.Number(1, 2)]))]),
+    ("(1,) + (2,);", [o.Constant(1, o.List(1, [o.Number(1, 1), o.Number(1, 2)]))]),
+    ("((1,), ());", [o.Constant(1, o.List(1, [o.List(1, [o.Number(1, 1)]), o.List(1, [])]))]),
+    (
+        "{\"a\": 1 + 1};",
+        [o.Constant(1, o.Map(1, PersistentMap.from_items([(o.String(1, "a"), o.Number(1, 2))])))]
+    ),
+    ("{1, 1};", [o.Constant(1, o.Set(1, PersistentMap.from_items([(o.Number(1, 1), True)])))]),
+
+    # Only the constant parts of an expression are folded
+    (
+        "x = a + 2 * 3;",
+        [o.Assignment(1, "x", o.InfixExpression(1, o.Identifier(1, "a"), Token(1, "+", t.PLUS), o.Number(1, 6)))]
+    ),
+    (
+        "(a, 1 + 1);",
+        [o.List(1, [o.Identifier(1, "a"), o.Number(1, 2)])]
+    ),
+    (
+        "f = func n: n * (2 + 2);",
+        [o.Assignment(1, "f", o.Function(1, [o.Identifier(1, "n")], o.InfixExpression(
+            1, o.Identifier(1, "n"), Token(1, "*", t.MULTIPLY), o.Number(1, 4)
+        )))]
+    ),
+    (
+        "for i in (1, 2) if 1 == 1: i;",
+        [o.ForLoop(
+            1,
+            "i",
+            o.Constant(1, o.List(1, [o.Number(1, 1), o.Number(1, 2)])),
+            o.Boolean(1, True),
+            o.Identifier(1, "i")
+        )]
+    ),
+
+    # Expensive operations are not folded
+    ("2 ** 3;", [o.InfixExpression(1, o.Number(1, 2), Token(1, "**", t.PACK), o.Number(1, 3))]),
+    ("5!;", [o.PostfixExpression(1, Token(1, "!", t.BANG), o.Number(1, 5))]),
+])
+def test_fold_constants(source, expected_ast):
+    assert_expressions_equal(expected_ast, optimized_ast(source))
+
+
+@pytest.mark.parametrize("source", [
+    "1 / 0;",
+    "1 % 0;",
+    "1 + \"a\";",
+    "-true;",
+    "{(func: 1): 1};",
+])
+def test_errors_are_not_folded(source):
+    original_ast = testing_utils.parser(source).parse()
+    assert_expressions_equal(original_ast, fold_constants(original_ast))
+
+
+@pytest.mark.parametrize("source", [
+    "1 + 2 * 3 - 4 / 2;",
+    "x = 1;\ny = (x, 2 + 3, (4, 5));\ny @ 2;",
+    "f = func: 1 / 0;\n1;\nf <- ();",
+    "when:\n  1 > 2: \"a\"\n  1 / 0 == 0: \"b\"\n  else: \"c\";",
+    "x = 2;\n(x + 1) / (1 - 1);",
+    "for i in range <- (3,): (i, (1, 2));",
+    "print <- (1 + 1, (2, 3));",
+    "a = (1, 2);\nb = a <- 3;\na;",
+    "{\"a\": (1, 2)} @ \"a\";",
+    "{1, 2} + {2 + 1,};",
+    "(1 / 0, 1);",
+    "1 +\n2 * \n3;",
+])
+def test_optimized_results_match(source):
+    assert_optimized_results_match(source)
+
+
+def test_constant_lists_are_shared():
+    actual_results, _ = evaluator_actual_result("for i in (1, 2, 3): (4, 5);", optimize_ast=True)
+
+    list_of_lists = actual_results[0]
+    assert isinstance(list_of_lists, o.List)
+    assert list_of_lists.values[0] is list_of_lists.values[1] is list_of_lists.values[2]
+
+
+@pytest.mark.parametrize("source, expected_ast", [
+    (
+        "for x in xs if x < len <- (ys,): x;",
+        [o.ForLoop(
+            1,
+            "x",
+            o.Identifier(1, "xs"),
+            o.InfixExpression(1, o.Identifier(1, "x"), Token(1, "<", t.LT), o.LoopInvariant(
+                1,
+                o.InfixExpression(1, bo.Length(1), Token(1, "<-", t.SEND), o.List(1, [o.Identifier(1, "ys")])),
+                frozenset({"x"})
+            )),
+            o.Identifier(1, "x")
+        )]
+    ),
+    (
+        # Variables assigned in the loop are not invariant
+        "for x in xs: (y = x) + (y * 2) + (z * 2);",
+        [o.ForLoop(1, "x", o.Identifier(1, "xs"), o.Boolean(1, True), o.InfixExpression(
+            1,
+            o.InfixExpression(
+                1,
+                o.Assignment(1, "y", o.Identifier(1, "x")),
+                Token(1, "+", t.PLUS),
+                o.InfixExpression(1, o.Identifier(1, "y"), Token(1, "*", t.MULTIPLY), o.Number(1, 2))
+            ),
+            Token(1, "+", t.PLUS),
+            o.LoopInvariant(
+                1,
+                o.InfixExpression(1, o.Identifier(1, "z"), Token(1, "*", t.MULTIPLY), o.Number(1, 2)),
+                frozenset({"x", "y"})
+            )
+        ))]
+    ),
+    (
+        # Nested loops that do not depend on the outer loop are invariant as a whole
+        "for x in xs: for y in ys: y + a;",
+        [o.ForLoop(1, "x", o.Identifier(1, "xs"), o.Boolean(1, True), o.LoopInvariant(
+            1,
+            o.ForLoop(1, "y", o.Identifier(1, "ys"), o.Boolean(1, True), o.InfixExpression(
+                1, o.Identifier(1, "y"), Token(1, "+", t.PLUS), o.Identifier(1, "a")
+            )),
+            frozenset({"x"})
+        ))]
+    ),
+    (
+        # Function bodies are never hoisted
+        "for x in xs: func: a + 1;",
+        [o.ForLoop(1, "x", o.Identifier(1, "xs"), o.Boolean(1, True), o.Function(1, [], o.InfixExpression(
+            1, o.Identifier(1, "a"), Token(1, "+", t.PLUS), o.Number(1, 1)
+        )))]
+    ),
+])
+def test_hoist_loop_invariants(source, expected_ast):
+    assert_expressions_equal(expected_ast, optimized_ast(source))
+
+
+def count_function_calls(monkeypatch: pytest.MonkeyPatch, source: str) -> tuple[list[o.Expression], int]:
+    calls = 0
+    evaluate_function_call = Evaluator.evaluate_function_call
+
+    def counting_evaluate_function_call(self: Evaluator, function_call: o.FunctionCall) -> o.Expression:
+        nonlocal calls
+        calls += 1
+        return evaluate_function_call(self, function_call)
+
+    monkeypatch.setattr(Evaluator, "evaluate_function_call", counting_evaluate_function_call)
+    # Calls are not inlined, so they can be counted
+    results, _ = evaluator_actual_result(source, memo=FunctionMemo(0), optimize_ast=True, max_inline_size=0)
+    return results, calls
+
+
+@pytest.mark.parametrize("source, expected_calls", [
+    # Invariants are evaluated once per run of the loop
+    ("limit = func: 2; for x in (1, 2, 3, 4) if x < limit <- (): x;", 1),
+    ("f = func a: a * 2; for x in (1, 2, 3): (f <- (10,)) + x;", 1),
+    ("f = func a: a * 2; for y in (1, 2): for x in (1, 2, 3): (f <- (y,)) + x;", 2),
+
+    # Functions are dynamically scoped, so a function that reads the loop's element is not invariant
+    ("g = func: x * 2; for x in (1, 2, 3): g <- ();", 3),
+
+    # Impure functions are not invariant
+    ("p = func: print <- (\"hi\",); for x in (1, 2, 3): p <- ();", 3),
+
+    # Loops with no elements never evaluate their invariants
+    ("f = func: 1; for x in (): f <- ();", 0),
+])
+def test_loop_invariant_evaluations(monkeypatch, source, expected_calls):
+    _, calls = count_function_calls(monkeypatch, source)
+    assert calls == expected_calls
+
+
+@pytest.mark.parametrize("source", [
+    "limit = func: 2; for x in (1, 2, 3, 4) if x < limit <- (): x;",
+    "g = func: x * 2; for x in (1, 2, 3): g <- ();",
+    "p = func: print <- (\"hi\",); for x in (1, 2, 3): p <- ();",
+    "for x in (1, 2): for y in (3, 4): (x, y, y + 1);",
+    "xs = (1, 2, 3);\nfor x in xs: len <- (xs,) - x;",
+    "for x in (1, 2, 3) if x > 1: (1 / 0) + x;",
+    "for x in (1, 2):\n  undefined_variable + 1;",
+    "for x in (true, false): when x: is true: (1, 2) is false: len <- ((3, 4),) else: 0;",
+])
+def test_loop_invariant_results_match(source):
+    assert_optimized_results_match(source)
+
+
+@pytest.mark.parametrize("source, is_jump_table", [
+    ("when n: is 1: \"a\" is 2: \"b\" else: \"c\";", True),
+    ("when n: is 1 + 1: \"a\" is (1, 2): \"b\" else: \"c\";", True),
+    ("when: n == 1: \"a\" else: \"b\";", False),
+    ("when n: is 1: \"a\" is m: \"b\" else: \"c\";", False),
+])
+def test_compile_jump_tables(source, is_jump_table):
+    ast = optimized_ast(source)
+    assert isinstance(ast[0], o.JumpTableWhen) == is_jump_table
+
+
+def test_jump_table_lookup():
+    when = optimized_ast("when n: is 1: \"a\" is \"1\": \"b\" is (1, 2): \"c\" is 1: \"d\" else: \"e\";")[0]
+    assert isinstance(when, o.JumpTableWhen)
+
+    assert when.lookup(o.Number(1, 1)) == 0
+    assert when.lookup(o.String(1, "1")) == 1
+    assert when.lookup(o.List(1, [o.Number(1, 1), o.Number(1, 2)])) == 2
+    assert when.lookup(o.Boolean(1, True)) == 4
+    assert when.lookup(o.Function(1, [], o.Number(1, 1))) == 4
+
+
+@pytest.mark.parametrize("source", [
+    "n = 2;\nwhen n:\n  is 1: \"one\"\n  is 2: \"two\"\n  is 2: \"also two\"\n  else: \"many\";",
+    "n = 5;\nwhen n:\n  is 1: \"one\"\n  else: n * 2;",
+    "n = true;\nwhen n:\n  is 1: \"one\"\n  else: \"not one\";",
+    "f = func: 1;\nwhen f:\n  is 1: \"one\"\n  else: \"function\";",
+    "for i in range <- (5,): when i % 3:\n  is 0: \"fizz\"\n  is 1: (i, i)\n  else: i / 0;",
+    "when print <- (\"side effect\",):\n  is (): \"empty\"\n  else: \"other\";",
+])
+def test_jump_table_results_match(source):
+    assert_optimized_results_match(source)
+
+
+def find_infix_expressions(ast: list[o.Expression]) -> list[o.InfixExpression]:
+    return [
+        expression
+        for statement in ast
+        for expression in walk(statement)
+        if isinstance(expression, o.InfixExpression)
+    ]
+
+
+@pytest.mark.parametrize("source, expected_specialized", [
+    ("x = 1; y = x * 2; y > x;", [True, True]),
+    ("for i in range <- (10,): i * i;", [False, True]),
+    ("n = len <- ((1, 2),); n + 1;", [False, True]),
+    ("xs = (1, 2, 3); (xs @ 0) + 1;", [True, False]),
+    ("x = (1 + y) - 1;", [False, False]),
+
+    # Unknown types
+    ("f = func n: n * 2;", [False]),
+    ("x + 1;", [False]),
+    ("x = 1; x = \"a\"; x + \"b\";", [False]),
+
+    # Variables assigned in a for-loop could have been assigned by the previous element
+    ("x = 1; for i in (1, 2): (x = x + 1);", [False]),
+
+    # Variables assigned in a when expression's cases, or on the right side of "and" and "or", might not be assigned
+    ("x = 1; when: true: (x = \"a\") else: 0; x + 1;", [False]),
+    ("x = 1; false and (x = \"a\") == \"a\"; x + 1;", [False, False, False]),
+    ("x = 1; when: true: (y = 2) else: 0; x + 1;", [True]),
+])
+def test_number_specialization(source, expected_specialized):
+    ast = infer_types(testing_utils.parser(source).parse())
+    actual_specialized = [isinstance(e, o.NumberInfixExpression) for e in find_infix_expressions(ast)]
+    assert actual_specialized == expected_specialized
+
+
+@pytest.mark.parametrize("source, expected_error", [
+    ("1 + true;", "Error at line 1: invalid types Number and Boolean for PLUS"),
+    ("x = \"a\";\ny = x - \"b\";", "Error at line 2: invalid types String and String for MINUS"),
+    ("xs = (1, 2);\n\nxs * 2;", "Error at line 3: invalid types List and Number for MULTIPLY"),
+    ("-true;", "Error at line 1: invalid type Boolean for negation"),
+    ("\"a\"++;", "Error at line 1: invalid type String for increment"),
+    ("1 and true;", "Error at line 1: Invalid types Number and Boolean for AND"),
+    ("1 in 2;", "Error at line 1: invalid types Number and Number for IN"),
+    ("x = 1;\ny = x * 2 + 1;\ny + \"a\";", "Error at line 3: invalid types Number and String for PLUS"),
+])
+def test_type_errors_before_running(source, expected_error):
+    with pytest.raises(LanguageRuntimeException) as error:
+        optimize(testing_utils.parser(source).parse())
+    assert str(error.value) == expected_error
+
+    # It is the same error as at runtime
+    line_num = int(expected_error.split(" ")[3].rstrip(":"))
+    runtime_results, runtime_output = evaluator_actual_result(source, optimize_ast=False)
+    assert_expressions_equal([o.Error(line_num, expected_error)], runtime_results)
+    assert runtime_output == [expected_error]
+
+
+@pytest.mark.parametrize("source", [
+    # Output and errors that come first at runtime
+    "print <- (\"hi\",);\n1 + true;",
+    "x = 1 / 0;\ny = 1 + true;",
+    "(print <- (1,)) + true;",
+    "xs = (1,);\n(xs @ 5) + true;",
+    "undefined + 1;\n1 + true;",
+    "f = func: print <- (1,);\nf <- ();\n1 + true;",
+    "for i in (1, 2): print <- (i,);\n-true;",
+])
+def test_type_errors_after_observable_effects(source):
+    # Raises an error if there is a type error
+    optimize(testing_utils.parser(source).parse())
+    assert_optimized_results_match(source)
+
+
+def test_type_errors_after_kept_assignments():
+    source = "x = 1;\n1 + true;"
+    with pytest.raises(LanguageRuntimeException):
+        optimize(testing_utils.parser(source).parse())
+
+    # The REPL keeps "x", which is assigned before the error at runtime
+    optimize(testing_utils.parser(source).parse(), keep_unused_variables=True)
+
+
+@pytest.mark.parametrize("source", [
+    # Code that might never run is not checked
+    "f = func: 1 + true;",
+    "when: false: 1 + true else: 0;",
+    "for i in (): i + true;",
+    "false and 1 + true;",
+    "when 1: is 1: 1 is 1 + true: 2 else: 3;",
+
+    # Types that are not known are not checked
+    "f = func: true; f = func: 1; (f <- ()) + 1;",
+    "xs = (1, true); (xs @ 1) + 1;",
+])
+def test_no_type_errors_before_running(source):
+    # Raises an error if there is a type error
+    optimize(testing_utils.parser(source).parse())
+
+
+@pytest.mark.parametrize("source", [
+    "x = 1;\ny = x * 2 + 3;\ny > x;",
+    "for i in range <- (5,): i * i - i / 2;",
+    "x = 10;\nx % 0;",
+    "x = 10;\nx / (5 - 5);",
+    "total = 0;\nfor i in range <- (4,): (total = total + i);",
+    "x = 1;\nwhen x:\n  is 1: x + 1\n  else: x - 1;",
+    "x = 2;\ny = (x, x + 1);\n(y @ 1) * x;",
+    "x = 1.5;\n(x * 2) == 3 and x != 2;",
+])
+def test_specialized_results_match(source):
+    assert_optimized_results_match(source)
+
+
+def find_inlined_calls(ast: list[o.Expression]) -> list[o.InlinedCall]:
+    return [node for statement in ast for node in walk(statement) if isinstance(node, o.InlinedCall)]
+
+
+@pytest.mark.parametrize("source, expected_inlined_calls", [
+    ("square = func x: x * x; for i in (1, 2, 3): square <- (i,);", 1),
+    ("add = func a, b: a + b; x = 1; add <- (x, 2);", 1),
+    ("greet = func name: print <- (\"hi\", name); greet <- (\"bob\",);", 1),
+
+    # Calls in function bodies are inlined first, so the call to "f" includes an inlined call to "square"
+    ("square = func x: x * x; f = func a: (square <- (a,)) + 1; for i in (1, 2): f <- (i,);", 3),
+
+    # Recursive functions and functions that call other functions are not inlined
+    ("fact = func n: when: n < 2: 1 else: n * (fact <- (n - 1,)); fact <- (5,);", 0),
+    ("g = func x: h <- (x,); h = func x: x; g <- (1,);", 0),
+
+    # Names that are bound more than once might not refer to the function
+    ("f = func x: x; f = func x: x + 1; f <- (1,);", 0),
+    ("f = func x: x; for f in (1, 2): 1; f <- (1,);", 0),
+    ("f = func x: x; g = func f: f; f <- (1,);", 0),
+
+    # Calls before the definition, and calls with the wrong number of arguments, are left alone
+    ("f <- (1,); f = func x: x;", 0),
+    ("f = func x: x; f <- (1, 2);", 0),
+
+    # Arguments that could have side effects or raise errors are evaluated as usual
+    ("f = func x: x; f <- (1 + y,);", 0),
+    ("f = func x: 1; f <- (undefined,);", 0),
+
+    # Bodies that bind variables, and large bodies, are not inlined
+    ("f = func x: y = x; f <- (1,);", 0),
+    ("f = func xs: for x in xs: x; f <- ((1, 2),);", 0),
+    ("f = func x: x + x + x + x + x + x + x + x + x; f <- (1,);", 0),
+])
+def test_inline_functions(source, expected_inlined_calls):
+    ast = optimize(testing_utils.parser(source).parse(), max_inline_size=16)
+    assert len(find_inlined_calls(ast)) == expected_inlined_calls
+
+
+def test_inline_size_threshold():
+    source = "add = func a, b: a + b; x = 1; add <- (x, 2);"
+    assert len(find_inlined_calls(optimize(testing_utils.parser(source).parse(), max_inline_size=3))) == 1
+    assert len(find_inlined_calls(optimize(testing_utils.parser(source).parse(), max_inline_size=2))) == 0
+
+
+@pytest.mark.parametrize("source", [
+    "square = func x: x * x;\nsquare <- (3,);",
+    "square = func x:\n  x * x;\nx = 2;\nfor i in (1, 2, 3):\n  square <- (i,);",
+    "add = func a, b: a + b;\nx = 1;\nadd <- (x,\n  2);",
+    "f = func x: x + y;\ny = 10;\nfor i in (1, 2): f <- (i,);",
+    "f = func x:\n  x + 1;\nf <- (\"a\",);",
+    "f = func l:\n  l @ 5;\nxs = (1, 2);\nf <- (xs,);",
+    "g = func: x * 2;\nfor x in (1, 2, 3): g <- ();",
+    "greet = func name: print <- (\"hi\", name);\ngreet <- (\"bob\",);\ngreet <- (\"alice\",);",
+    "id = func x: x;\nfor i in (1, 2):\n  (id <- (i,)) + 1;",
+])
+def test_inlined_results_match(source):
+    assert_optimized_results_match(source)
+
+
+def find_saved_expressions(ast: list[o.Expression]) -> tuple[list[o.SavedExpression], list[o.SavedValue]]:
+    nodes = [node for expression in ast for node in walk(expression)]
+    return [n for n in nodes if isinstance(n, o.SavedExpression)], [n for n in nodes if isinstance(n, o.SavedValue)]
+
+
+@pytest.mark.parametrize("source, expected_saved, expected_reused", [
+    ("xs = (1, 2); (len <- (xs,)) + (len <- (xs,));", 1, 1),
+    ("xs = (1, 2); (xs @ 0) * (xs @ 0) + (xs @ 0);", 1, 2),
+    ("a = 1; b = 2; (a + b) * (a + b);", 1, 1),
+    ("a = 1; b = 2; (a + b) * (a + b) + ((a + b) * (a + b));", 2, 2),
+    # "else" is compared to a copy of the switch expression, which is identical if it is on the same line
+    ("a = 1; when a > 0: is true: a > 0 else: false;", 1, 2),
+    ("xs = (1, 2); for x in xs: (x + 1) * (x + 1);", 1, 1),
+    ("a = 1; b = 2; a + b; a + b;", 0, 0),
+    ("a = 1; b = 2; (a * b) + (b = 3) + (a * b);", 0, 0),
+    ("a = 1; (a + 1) + (true and (a + 1));", 1, 1),
+    ("a = 1; (true and (a + 1)) + (a + 1);", 0, 0),
+    ("a = 1; (false and (a + 1)) or (a + 1);", 0, 0),
+    ("(randint <- (1, 10)) + (randint <- (1, 10));", 0, 0),
+    ("f = func n: n + 1; (f <- (1,)) + (f <- (1,));", 0, 0),
+    ("f = func a: (a * a) + (a * a);", 0, 0),
+])
+def test_eliminate_common_subexpressions(source, expected_saved, expected_reused):
+    # Inlining is disabled so calls to user functions stay calls
+    ast = optimize(testing_utils.parser(source).parse(), max_inline_size=0, keep_unused_variables=True)
+    saved, reused = find_saved_expressions(ast)
+    assert (len(saved), len(reused)) == (expected_saved, expected_reused)
+
+
+@pytest.mark.parametrize("source, expected_ast", [
+    ("x = 1; 2;", [o.Number(1, 1), o.Number(1, 2)]),
+    ("x = 1; x;", [o.Assignment(1, "x", o.Number(1, 1)), o.Identifier(1, "x")]),
+    (
+        "x = 1; y = print <- (x,);",
+        [
+            o.Assignment(1, "x", o.Number(1, 1)),
+            o.InfixExpression(1, bo.Print(1), Token(1, "<-", t.SEND), o.List(1, [o.Identifier(1, "x")]))
+        ]
+    ),
+    ("f = func: y = 2;", [o.Function(1, [], o.Number(1, 2))]),
+    ("f = func: y = 2; f;", [o.Assignment(1, "f", o.Function(1, [], o.Number(1, 2))), o.Identifier(1, "f")]),
+])
+def test_remove_unused_assignments(source, expected_ast):
+    assert_expressions_equal(expected_ast, optimized_ast(source, keep_unused_variables=False))
+
+
+def test_keep_unused_variables():
+    assert_expressions_equal([o.Assignment(1, "x", o.Number(1, 1))], optimized_ast("x = 1;"))
+
+
+@pytest.mark.parametrize("source", [
+    "xs = (1, 2); (len <- (xs,)) + (len <- (xs,));",
+    "xs = (1, 2);\n(xs @ 0) *\n(xs @ 0) +\n(xs @ 0);",
+    "xs = (1, 2);\n(xs @ 5) +\n(xs @ 5);",
+    "a = 1; b = \"a\";\n(a + b) *\n(a + b);",
+    "a = 1; b = 2; (a + b) * (a + b) + ((a + b) * (a + b));",
+    "a = 1;\nwhen a > 0:\n  is true: a > 0\n  else: false;",
+    "xs = (1, 2, 3); for x in xs if (x % 2) == (x % 2): (x % 2, x % 2);",
+    "for x in (1, 2, 3): for y in (1, 2): (x * y) + (x * y);",
+    "a = 1; (true and (a + 1)) + (a + 1);",
+    "a = 1; (false and (a + 1)) or ((a + 1) > 1);",
+    "sq = func n: n * n; (sq <- (3,)) + (sq <- (3,));",
+    "fib = func n: when: n < 2: n else: (fib <- (n - 1,)) + (fib <- (n - 2,)); fib <- (10,);",
+    "x = print <- (\"hi\",); y = 2; z = y + 1;",
+    "f = func: print <- (\"called\",); f <- (); unused = f <- ();",
+    "f = func: y = 2; f <- ();",
+])
+def test_common_subexpression_and_dead_assignment_results_match(source):
+    assert_optimized_results_match(source)
+
+
+def test_optimizer_debug_report(caplog):
+    with caplog.at_level(logging.DEBUG):
+        optimized_ast("xs = (1, 2);\nunused = (len <- (xs,)) + (len <- (xs,));", keep_unused_variables=False)
+
+    assert "line 2: removed assignment to unused variable \"unused\"" in caplog.messages
+    assert "line 2: reused a saved InfixExpression value" in caplog.messages
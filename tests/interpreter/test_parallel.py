@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator import parallel
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.evaluator import evaluate_calls
+from interpreter.evaluator.native_evaluator import evaluate_native_calls
+from interpreter.evaluator.shared_numbers import SharedNumbers, pack
+from tests import testing_utils
+from tests.testing_utils import evaluator_actual_result, assert_expressions_equal
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Evaluate every "pmap" call in two worker processes, even on machines with one core."""
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+    monkeypatch.setattr(parallel, "PARALLEL_THRESHOLD", 1)
+    yield
+    parallel.shutdown()
+
+
+def parsed_function(source: str) -> o.Function:
+    [function] = testing_utils.parser(source).parse()
+    assert isinstance(function, o.Function)
+    return function
+
+
+@pytest.mark.parametrize("source", [
+    "square = func n: n * n; pmap <- (square, range <- (0, 50));",
+    "half = func n: n / 2;\npmap <- (half, range <- (0, 50));",
+    "f = func n: when: n > 10: n else: \"small\"; pmap <- (f, range <- (0, 20));",
+    "f = func n: len <- (range <- (n,)); pmap <- (f, range <- (1, 20));",
+    "k = 3; f = func n: (n, n + k); pmap <- (f, (1, 2, 3, 4, 5));",
+    "g = func n: n ** 2; f = func n: (g <- (n,)) + 1; pmap <- (f, range <- (0, 20));",
+    "f = func n: pmap <- (func m: m * n, (1, 2)); pmap <- (f, (10, 20));",
+    "f = func s: s + \"!\"; pmap <- (f, {\"a\": 1, \"b\": 2});",
+    "f = func n: 10 / n;\npmap <- (f, (1, 2, 0, 4, 0));",
+    "f = func n: (1, 2) @ n;\npmap <- (f, (0, 1, 2, 3));",
+    "f = func a, b: a;\npmap <- (f, (1, 2));",
+    "f = func n: print <- (n,); pmap <- (f, (1, 2, 3));",
+    "fib = func n: when: n < 2: n else: (fib <- (n - 1,)) + (fib <- (n - 2,)); pmap <- (fib, range <- (0, 15));",
+])
+@pytest.mark.parametrize("native", [False, True])
+def test_parallel_results_match(workers, source, native):
+    expected_results, expected_output = evaluator_actual_result(source)
+    actual_results, actual_output = evaluator_actual_result(source, native=native)
+
+    assert actual_output == expected_output
+    assert_expressions_equal(
+        [e for e in expected_results if not isinstance(e, o.Function)],
+        [a for a in actual_results if not isinstance(a, o.Function)]
+    )
+
+
+def test_parallel_map(workers):
+    function = parsed_function("func n: n * k;")
+    env = Environment()
+    env.set_var("k", o.Number(1, 3))
+    values = [o.Number(1, n) for n in range(10)]
+
+    results = parallel.parallel_map(function, values, env, evaluate_calls)
+    assert results is not None
+    assert_expressions_equal([o.Number(1, n * 3) for n in range(10)], results)
+
+
+@pytest.mark.parametrize("source, value_count", [
+    # Impure functions
+    ("func n: print <- (n,);", 10),
+    ("func n: randint <- (n,);", 10),
+    # Too few values
+    ("func n: n * 2;", 0),
+])
+def test_parallel_map_serial(workers, source, value_count):
+    values = [o.Number(1, n + 1) for n in range(value_count)]
+    assert parallel.parallel_map(parsed_function(source), values, Environment(), evaluate_calls) is None
+
+
+def test_parallel_map_threshold(monkeypatch):
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+    values = [o.Number(1, n) for n in range(parallel.PARALLEL_THRESHOLD - 1)]
+    assert parallel.parallel_map(parsed_function("func n: n;"), values, Environment(), evaluate_calls) is None
+
+
+@pytest.mark.parametrize("worker, native, values, expected_results", [
+    (evaluate_calls, False, [o.Number(1, n) for n in (1.0, 2.0)], [o.Number(1, 2), o.Number(1, 4)]),
+    (evaluate_native_calls, True, [1.0, 2.0], [2.0, 4.0]),
+])
+def test_numbers_are_shared(worker, native, values, expected_results):
+    function = parsed_function("func n: n * 2;")
+
+    with pack(values) as inputs, SharedNumbers(len(values), None if native else function.line_num) as outputs:
+        # Numeric results are written to shared memory instead of being returned
+        assert parallel.evaluate_chunk(worker, function, inputs.slice(0, 2), {}, outputs.slice(0, 2)) == (None, None)
+        if native:
+            assert outputs.read() == expected_results
+        else:
+            assert_expressions_equal(expected_results, outputs.read())
+
+
+def test_shared_memory_is_freed(workers):
+    segments = set(os.listdir("/dev/shm"))
+    evaluator_actual_result("f = func n: n * 2; pmap <- (f, range <- (0, 100)); pmap <- (f, (1, 0, \"a\"));")
+    assert set(os.listdir("/dev/shm")) == segments
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_optimized_functions_are_sent_to_workers(workers, native):
+    # Optimized functions contain nodes (such as "NumberInfixExpression") that are not plain syntax
+    source = "f = func n: (n * 2) + (n * 2); pmap <- (f, range <- (0, 10));"
+    expected_results, _ = evaluator_actual_result(source, optimize_ast=False)
+    actual_results, _ = evaluator_actual_result(source, optimize_ast=True, native=native)
+    assert_expressions_equal(expected_results[-1:], actual_results[-1:])
@@ -42,6 +42,41 @@ def test_list(source, expected_list_values):
     assert_expressions_equal(expected_ast, actual_ast)
 
 
+@pytest.mark.parametrize("source, expected_value", [
+    ("{}", o.MapLiteral(1, [])),
+    ("{1: 2}", o.MapLiteral(1, [(o.Number(1, 1), o.Number(1, 2))])),
+    ("{1: 2,}", o.MapLiteral(1, [(o.Number(1, 1), o.Number(1, 2))])),
+    (
+        "{\"a\": 1 + 1, x: (1,)}",
+        o.MapLiteral(1, [
+            (o.String(1, "a"), o.InfixExpression(1, o.Number(1, 1), Token(1, "+", t.PLUS), o.Number(1, 1))),
+            (o.Identifier(1, "x"), o.List(1, [o.Number(1, 1)]))
+        ])
+    ),
+    ("{,}", o.SetLiteral(1, [])),
+    ("{1}", o.SetLiteral(1, [o.Number(1, 1)])),
+    ("{1,}", o.SetLiteral(1, [o.Number(1, 1)])),
+    ("{1, \"a\", x}", o.SetLiteral(1, [o.Number(1, 1), o.String(1, "a"), o.Identifier(1, "x")])),
+])
+def test_map_and_set(source, expected_value):
+    parser = testing_utils.parser(f"{source};")
+    actual_ast = parser.parse()
+    assert_expressions_equal([expected_value], actual_ast)
+
+
+@pytest.mark.parametrize("source, expected_error_message", [
+    ("{1: 2, 3}", "Error at line 1: expected COLON, got CLOSED_BRACE ('}')"),
+    ("{1, 2: 3}", "Error at line 1: expected CLOSED_BRACE, got COLON (':')"),
+    ("{1: 2", "Error at line 1: expected CLOSED_BRACE, got SEMICOLON (';')"),
+    ("{,,}", "Error at line 1: expected CLOSED_BRACE, got COMMA (',')"),
+])
+def test_map_and_set_errors(source, expected_error_message):
+    parser = testing_utils.parser(f"{source};")
+    with pytest.raises(LanguageRuntimeException) as error:
+        parser.parse()
+    assert str(error.value) == expected_error_message
+
+
 @pytest.mark.parametrize("source, operator, expression", [
     ("+1", Token(1, "+", t.PLUS), o.Number(1, 1)),
     ("-1", Token(1, "-", t.MINUS), o.Number(1, 1)),
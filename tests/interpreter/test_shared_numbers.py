@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator.shared_numbers import SharedNumbers, pack, read_slice, write_slice
+from tests.testing_utils import assert_expressions_equal
+
+
+@pytest.mark.parametrize("values", [
+    [1.0],
+    [0.5, -2.0, 1e300, float("inf")],
+    [float(n) for n in range(1000)],
+])
+def test_pack_native(values):
+    with pack(values) as shared:
+        assert shared.read() == values
+        assert read_slice(shared.slice(1, len(values))) == values[1:]
+
+
+def test_pack_numbers():
+    values = [o.Number(3, 1.0), o.Number(3, 2.5)]
+    with pack(values) as shared:
+        assert_expressions_equal(values, shared.read())
+        assert_expressions_equal(values[1:], read_slice(shared.slice(1, 5)))
+
+
+@pytest.mark.parametrize("values", [
+    [],
+    [1.0, 2],
+    [1.0, True],
+    [1.0, "a"],
+    [o.Number(1, 1.0), o.Number(2, 2.0)],
+    [o.Number(1, 1.0), o.Number(1, 2)],
+    [o.Number(1, 1.0), o.Boolean(1, True)],
+])
+def test_values_not_packed(values):
+    assert pack(values) is None
+
+
+def test_write_slice():
+    with SharedNumbers(4, None) as shared:
+        write_slice(shared.slice(1, 3), [5.0, 6.0, 7.0])
+        assert shared.read(1, 3) == [5.0, 6.0]
+
+
+def test_segments_are_freed():
+    shared = SharedNumbers(4, None)
+    name = shared.memory.name
+    shared.close()
+    assert not os.path.exists(f"/dev/shm/{name.lstrip('/')}")
@@ -0,0 +1,73 @@
+import pytest
+
+import interpreter.parser_.ast_objects as o
+from interpreter.evaluator import parallel
+from interpreter.evaluator.environment_ import Environment
+from interpreter.evaluator.evaluator import evaluate_in_worker
+from interpreter.evaluator.statement_scheduler import StatementScheduler
+from tests import testing_utils
+from tests.testing_utils import evaluator_actual_result, assert_expressions_equal
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+    yield
+    parallel.shutdown()
+
+
+def started_statements(source: str) -> list[int]:
+    """Indexes of the statements started in workers before the first statement runs."""
+    scheduler = StatementScheduler(testing_utils.parser(source).parse(), evaluate_in_worker)
+    scheduler.start_ready(0, Environment())
+    started = sorted(scheduler.futures.keys())
+    scheduler.cancel()
+    return started
+
+
+@pytest.mark.parametrize("source, expected_started", [
+    ("f = func n: n * 2; a = f <- (1,); b = f <- (2,);", []),
+    ("x = 1; a = for i in (1, 2): i; b = for i in (3, 4): i + x;", [1]),
+    ("x = 1; a = for i in (1, 2): i; x = 2; b = for i in (3, 4): i + x;", [1]),
+    ("print <- (1,); a = for i in (1, 2): i; b = for i in (1, 2): print <- (i,);", [1]),
+    ("a = for i in (1, 2): i; b = a; c = for i in a: i;", []),
+    ("a = 1; b = 2 + 3; c = len <- ((1, 2),);", []),
+    ("a = 1; b = for i in (1, 2): (c = i);", [1]),
+    ("a = 1; b = (c = for i in (1, 2): i);", []),
+    ("a = 1; b = func: for i in (1, 2): i;", []),
+])
+def test_start_ready(workers, source, expected_started):
+    assert started_statements(source) == expected_started
+
+
+def test_start_ready_with_one_worker():
+    assert started_statements("a = 1; b = for i in (1, 2): i;") == []
+
+
+@pytest.mark.parametrize("source", [
+    "f = func n: n * 2;\na = f <- (1,);\nb = f <- (2,);\nprint <- (a, b);\n(a, b);",
+    "x = 1;\na = for i in range <- (0, 10): i + x;\nx = 2;\nb = for i in range <- (0, 10): i + x;\n(a, b, x);",
+    "a = for i in (1, 2): i;\nprint <- (\"between\",);\nb = for i in (1, 0): 1 / i;\nc = for i in (1, 2): i;",
+    "a = for i in (1, 2): i;\nb = for i in (1, 2): undefined_variable;",
+    "a = 1 / 0;\nb = for i in (1, 2): 1 / 0;",
+    "a = for i in (1, 2): i;\nb = for i in (1, 2): print <- (i,);\nc = for i in (3, 4): i;",
+    "f = func n: pmap <- (func m: m * n, (1, 2));\na = f <- (1,);\nb = f <- (2,);",
+    "a = for i in (1, 2): func: i;\nb = for f in a: f <- ();",
+])
+@pytest.mark.parametrize("native", [False, True])
+def test_parallel_statements_results_match(workers, source, native):
+    expected_results, expected_output = evaluator_actual_result(source, native=native)
+    actual_results, actual_output = evaluator_actual_result(source, native=native, parallel_statements=True)
+
+    assert actual_output == expected_output
+    assert_expressions_equal(
+        [e for e in expected_results if not isinstance(e, o.Function)],
+        [a for a in actual_results if not isinstance(a, o.Function)]
+    )
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_parallel_statements_environment(workers, native):
+    env = Environment()
+    evaluator_actual_result("a = 1;\nb = for i in (1, 2): i + 1;", env=env, native=native, parallel_statements=True)
+    assert_expressions_equal([o.List(2, [o.Number(2, 2), o.Number(2, 3)])], [env.get_var("b")])
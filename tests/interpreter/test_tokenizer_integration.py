@@ -11,6 +11,8 @@ from interpreter.tokens.tokenizer import Token
     (",", t.COMMA),
     ("(", t.OPEN_PAREN),
     (")", t.CLOSED_PAREN),
+    ("{", t.OPEN_BRACE),
+    ("}", t.CLOSED_BRACE),
     ("+", t.PLUS),
     ("-", t.MINUS),
     ("*", t.MULTIPLY),
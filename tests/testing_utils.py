@@ -1,13 +1,19 @@
-import os
+import typing
 
 from interpreter.evaluator.evaluator import Evaluator, Environment
+from interpreter.evaluator.limits import ExecutionLimits
+from interpreter.evaluator.memo import FunctionMemo
+from interpreter.evaluator.native_evaluator import NativeEvaluator
+from interpreter.optimizer.inlining import DEFAULT_MAX_INLINE_SIZE
+from interpreter.optimizer.optimizer import optimize
 import interpreter.parser_.ast_objects as o
 import interpreter.parser_.builtin_ast_objects as bo
 from interpreter.tokens.token import Token
 from interpreter.parser_.parser_ import Parser
 from interpreter.tokens.tokenizer import Tokenizer
 from interpreter.tokens.token_queue import TokenQueue
-from utils.utils import Platform, BOOMERANG_PLATFORM
+from utils.program_io import ProgramIO
+from utils.utils import Platform, LanguageRuntimeException
 
 
 def get_tokens(source: str) -> list[Token]:
@@ -20,16 +26,38 @@ def parser(source: str) -> Parser:
     return Parser(tokens)
 
 
-def evaluator_actual_result(source: str, platform: str = Platform.TEST.name) -> tuple[list[o.Expression], list[str]]:
+def evaluator_actual_result(
+        source: str,
+        platform: str = Platform.TEST.name,
+        memo: typing.Optional[FunctionMemo] = None,
+        env: typing.Optional[Environment] = None,
+        optimize_ast: bool = True,
+        native: bool = False,
+        max_inline_size: int = DEFAULT_MAX_INLINE_SIZE,
+        parallel_statements: bool = False,
+        limits: typing.Optional[ExecutionLimits] = None
+) -> tuple[list[o.Expression], list[str]]:
     t = Tokenizer(source)
     tokens = TokenQueue(t)
 
     p = Parser(tokens)
     ast = p.parse()
 
-    os.environ[BOOMERANG_PLATFORM] = platform
-
-    e = Evaluator(ast, Environment())
+    if optimize_ast:
+        try:
+            # Variables must still be assigned if the test reads them from the environment afterwards
+            ast = optimize(ast, max_inline_size, keep_unused_variables=env is not None)
+        except LanguageRuntimeException as e:
+            error = o.Error(e.line_num, str(e))
+            return [error], [str(error)]
+
+    program_io = ProgramIO(platform)
+    if native:
+        return NativeEvaluator(
+            ast, env if env is not None else Environment(), memo, parallel_statements, program_io, limits
+        ).evaluate()
+
+    e = Evaluator(ast, env if env is not None else Environment(), memo, parallel_statements, program_io, limits)
     return e.evaluate()
 
 
@@ -80,6 +108,46 @@ def assert_expression_equal(expected: o.Expression, actual: o.Expression) -> Non
         for e_val, a_val in zip(expected.values, actual.values):
             assert_expression_equal(e_val, a_val)
 
+    elif isinstance(expected, o.Map) and isinstance(actual, o.Map):
+        assert len(actual.entries) == len(expected.entries), \
+            f"len(actual.entries): {len(actual.entries)}, len(expected.entries): {len(expected.entries)}"
+
+        for (e_key, e_val), (a_key, a_val) in zip(expected.entries.items(), actual.entries.items()):
+            assert_expression_equal(e_key, a_key)
+            assert_expression_equal(e_val, a_val)
+
+    elif isinstance(expected, o.Set) and isinstance(actual, o.Set):
+        assert_expressions_equal(expected.values, actual.values)
+
+    elif isinstance(expected, o.MapLiteral) and isinstance(actual, o.MapLiteral):
+        assert len(actual.pairs) == len(expected.pairs), \
+            f"len(actual.pairs): {len(actual.pairs)}, len(expected.pairs): {len(expected.pairs)}"
+
+        for (e_key, e_val), (a_key, a_val) in zip(expected.pairs, actual.pairs):
+            assert_expression_equal(e_key, a_key)
+            assert_expression_equal(e_val, a_val)
+
+    elif isinstance(expected, o.SetLiteral) and isinstance(actual, o.SetLiteral):
+        assert_expressions_equal(expected.values, actual.values)
+
+    elif isinstance(expected, o.Constant) and isinstance(actual, o.Constant):
+        assert_expression_equal(expected.value, actual.value)
+
+    elif isinstance(expected, o.LoopInvariant) and isinstance(actual, o.LoopInvariant):
+        assert actual.varying_names == expected.varying_names, \
+            f"actual.varying_names: {actual.varying_names}, expected.varying_names: {expected.varying_names}"
+        assert_expression_equal(expected.expression, actual.expression)
+
+    elif isinstance(expected, o.SavedExpression) and isinstance(actual, o.SavedExpression):
+        assert actual.slot == expected.slot, f"actual.slot: {actual.slot}, expected.slot: {expected.slot}"
+        assert_expression_equal(expected.expression, actual.expression)
+
+    elif isinstance(expected, o.SavedValue) and isinstance(actual, o.SavedValue):
+        assert actual.slot == expected.slot, f"actual.slot: {actual.slot}, expected.slot: {expected.slot}"
+
+    elif isinstance(expected, o.InlinedCall) and isinstance(actual, o.InlinedCall):
+        assert_expression_equal(expected.body, actual.body)
+
     elif isinstance(expected, o.Function) and isinstance(actual, o.Function):
         assert_expression_equal(expected.body, actual.body)
         assert len(actual.parameters) == len(expected.parameters), \
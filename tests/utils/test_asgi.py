@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.asgi import AsyncWSGIApp, wsgi_environ
+
+
+def echo_app(environ, start_response):
+    body = environ["wsgi.input"].read()
+    start_response("201 Created", [("Content-Type", "text/plain"), ("X-Path", environ["PATH_INFO"])])
+    return [environ["REQUEST_METHOD"].encode(), b" ", body]
+
+
+async def request(app, method, path, body=b"", chunk_size=None):
+    chunk_size = chunk_size or max(len(body), 1)
+    messages = [
+        {"type": "http.request", "body": body[i:i + chunk_size], "more_body": i + chunk_size < len(body)}
+        for i in range(0, max(len(body), 1), chunk_size)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": [(b"content-type", b"text/plain")]}
+    await app(scope, receive, send)
+
+    start, response_body = sent
+    return start["status"], dict(start["headers"]), response_body["body"]
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(2) as thread_pool:
+        yield thread_pool
+
+
+def test_request(executor):
+    app = AsyncWSGIApp(echo_app, executor)
+    status, headers, body = asyncio.run(request(app, "POST", "/echo", b"hello", chunk_size=2))
+
+    assert status == 201
+    assert headers == {b"content-type": b"text/plain", b"x-path": b"/echo"}
+    assert body == b"POST hello"
+
+
+def test_request_body_limit(executor):
+    app = AsyncWSGIApp(echo_app, executor, max_body_bytes=4)
+    status, _, body = asyncio.run(request(app, "POST", "/echo", b"hello", chunk_size=2))
+
+    assert status == 413
+    assert body == b"Request body too large"
+
+
+def test_client_disconnects_during_request_body(executor):
+    handled = []
+
+    def recording_app(environ, start_response):
+        handled.append(environ["wsgi.input"].read())
+        return echo_app(environ, start_response)
+
+    messages = [
+        {"type": "http.request", "body": b"x = ", "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    app = AsyncWSGIApp(recording_app, executor)
+    scope = {"type": "http", "method": "POST", "path": "/interpret", "headers": []}
+    asyncio.run(app(scope, receive, send))
+
+    assert handled == []
+    assert sent == []
+
+
+def test_requests_use_path_executors():
+    thread_names = []
+
+    def app(environ, start_response):
+        thread_names.append(threading.current_thread().name)
+        start_response("200 OK", [])
+        return []
+
+    with ThreadPoolExecutor(1, "default") as default, ThreadPoolExecutor(1, "slow") as slow:
+        asgi_app = AsyncWSGIApp(app, default, {"/slow": slow})
+        asyncio.run(request(asgi_app, "GET", "/slow"))
+        asyncio.run(request(asgi_app, "GET", "/"))
+
+    assert [name.split("_")[0] for name in thread_names] == ["slow", "default"]
+
+
+def test_slow_requests_do_not_block_other_requests():
+    def app(environ, start_response):
+        if environ["PATH_INFO"] == "/slow":
+            time.sleep(0.5)
+        start_response("200 OK", [])
+        return [environ["PATH_INFO"].encode()]
+
+    async def main(asgi_app):
+        slow_requests = [asyncio.create_task(request(asgi_app, "GET", "/slow")) for _ in range(4)]
+        await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        _, _, body = await request(asgi_app, "GET", "/")
+        elapsed = time.perf_counter() - start
+
+        await asyncio.gather(*slow_requests)
+        return body, elapsed
+
+    with ThreadPoolExecutor(1) as default, ThreadPoolExecutor(1) as slow:
+        body, elapsed = asyncio.run(main(AsyncWSGIApp(app, default, {"/slow": slow})))
+
+    assert body == b"/"
+    assert elapsed < 0.4
+
+
+def test_lifespan(executor):
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(AsyncWSGIApp(echo_app, executor)({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+
+def test_wsgi_environ():
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/é",
+        "query_string": b"a=1",
+        "root_path": "",
+        "scheme": "https",
+        "server": ("example.com", 443),
+        "client": ("10.0.0.1", 1234),
+        "headers": [
+            (b"content-type", b"text/plain"),
+            (b"accept", b"text/html"),
+            (b"accept", b"*/*"),
+            (b"cookie", b"a=1"),
+            (b"cookie", b"b=2"),
+        ],
+    }
+
+    environ = wsgi_environ(scope, b"body")
+
+    assert environ["PATH_INFO"] == "/é".encode().decode("latin-1")
+    assert environ["QUERY_STRING"] == "a=1"
+    assert environ["SERVER_NAME"] == "example.com"
+    assert environ["SERVER_PORT"] == "443"
+    assert environ["REMOTE_ADDR"] == "10.0.0.1"
+    assert environ["wsgi.url_scheme"] == "https"
+    assert environ["CONTENT_TYPE"] == "text/plain"
+    assert environ["CONTENT_LENGTH"] == "4"
+    assert environ["HTTP_ACCEPT"] == "text/html,*/*"
+    assert environ["HTTP_COOKIE"] == "a=1; b=2"
+    assert environ["wsgi.input"].read() == b"body"
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from utils.persistent_map import PersistentMap
+
+
+class CollidingKey:
+    """A key with a configurable hash value, for testing hash collisions"""
+
+    def __init__(self, value: int, hash_value: int):
+        self.value = value
+        self.hash_value = hash_value
+
+    def __hash__(self) -> int:
+        return self.hash_value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CollidingKey) and self.value == other.value
+
+    def __repr__(self) -> str:
+        return f"CollidingKey({self.value})"
+
+
+def test_set_get_remove():
+    empty: PersistentMap[str, int] = PersistentMap()
+    one = empty.set("a", 1)
+    two = one.set("b", 2)
+    updated = two.set("a", 3)
+    removed = updated.remove("a")
+
+    # Every version is unchanged by later operations
+    assert empty.items() == []
+    assert one.items() == [("a", 1)]
+    assert two.items() == [("a", 1), ("b", 2)]
+    assert updated.items() == [("a", 3), ("b", 2)]
+    assert removed.items() == [("b", 2)]
+
+    assert "a" in two and "a" not in removed
+    assert two.get("b") == 2
+    assert two.get("c") is None
+    assert removed.remove("a") is removed
+
+
+@pytest.mark.parametrize("hash_modulus", [1, 3, 1024, 2 ** 64])
+def test_matches_dict(hash_modulus):
+    """Compare random operations with a dictionary. Small moduli force many keys to share a hash value."""
+    rng = random.Random(hash_modulus)
+    persistent_map: PersistentMap[CollidingKey, int] = PersistentMap()
+    expected: dict[CollidingKey, int] = {}
+
+    for i in range(2000):
+        value = rng.randrange(200)
+        key = CollidingKey(value, random.Random(value).getrandbits(64) % hash_modulus)
+
+        if rng.random() < 0.6:
+            persistent_map = persistent_map.set(key, i)
+            expected[key] = i
+        else:
+            persistent_map = persistent_map.remove(key)
+            expected.pop(key, None)
+
+        assert len(persistent_map) == len(expected)
+
+    # Iteration follows insertion order, like a dictionary
+    assert persistent_map.items() == list(expected.items())
+    for key, value in expected.items():
+        assert persistent_map.get(key) == value
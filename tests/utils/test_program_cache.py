@@ -0,0 +1,182 @@
+import json
+import os
+import zlib
+
+import pytest
+
+from interpreter.evaluator.environment_ import Environment
+from main_utils import evaluate, parse
+from utils import program_cache
+from utils.program_cache import CacheMode, cache_path, compile_file
+
+SOURCE = "f = func n: n * 2;\nx = f <- (3,);\nprint <- (x + 1,);"
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "main.bng"
+    path.write_text(SOURCE)
+    return str(path)
+
+
+@pytest.fixture
+def parsed_sources(monkeypatch):
+    sources = []
+
+    def counting_parse(source):
+        sources.append(source)
+        return parse(source)
+
+    monkeypatch.setattr(program_cache, "parse", counting_parse)
+    return sources
+
+
+def test_compiled_program_is_loaded(source_file, parsed_sources):
+    first_ast = compile_file(source_file, SOURCE, True, 10)
+    second_ast = compile_file(source_file, SOURCE, True, 10)
+
+    assert os.path.isfile(cache_path(source_file))
+    assert len(parsed_sources) == 1
+
+    for ast in [first_ast, second_ast]:
+        _, output = evaluate(SOURCE, Environment(), optimize_ast=False, ast=ast)
+        assert output == ["7"]
+
+
+def test_cache_path(tmp_path):
+    path = str(tmp_path / "programs" / "main.bng")
+    assert cache_path(path) == str(tmp_path / "programs" / "__bngcache__" / "main.bngc")
+
+
+@pytest.mark.parametrize("optimize_ast, max_inline_size", [
+    (False, 10),
+    (True, 0),
+])
+def test_options_change(source_file, parsed_sources, optimize_ast, max_inline_size):
+    compile_file(source_file, SOURCE, True, 10)
+    compile_file(source_file, SOURCE, optimize_ast, max_inline_size)
+    assert len(parsed_sources) == 2
+
+
+def test_source_change(source_file, parsed_sources):
+    compile_file(source_file, SOURCE, True, 10)
+
+    new_source = SOURCE.replace("n * 2", "n * 3")
+    with open(source_file, "w") as file:
+        file.write(new_source)
+
+    ast = compile_file(source_file, new_source, True, 10)
+    assert len(parsed_sources) == 2
+
+    _, output = evaluate(new_source, Environment(), optimize_ast=False, ast=ast)
+    assert output == ["10"]
+
+
+def test_modification_time_change(source_file, parsed_sources):
+    compile_file(source_file, SOURCE, True, 10)
+
+    stat = os.stat(source_file)
+    os.utime(source_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    compile_file(source_file, SOURCE, True, 10)
+    assert len(parsed_sources) == 2
+
+
+def test_interpreter_change(source_file, parsed_sources, monkeypatch):
+    compile_file(source_file, SOURCE, True, 10)
+
+    monkeypatch.setattr(program_cache, "interpreter_version", lambda: "0.0-0000000000000000")
+    compile_file(source_file, SOURCE, True, 10)
+    assert len(parsed_sources) == 2
+
+
+@pytest.mark.parametrize("contents", [
+    b"",
+    b"BNGC",
+    b"not a compiled program",
+])
+def test_corrupt_compiled_program(source_file, parsed_sources, contents):
+    os.makedirs(os.path.dirname(cache_path(source_file)))
+    with open(cache_path(source_file), "wb") as file:
+        file.write(contents)
+
+    ast = compile_file(source_file, SOURCE, True, 10)
+    assert len(parsed_sources) == 1
+
+    _, output = evaluate(SOURCE, Environment(), optimize_ast=False, ast=ast)
+    assert output == ["7"]
+
+    # Replaced by a valid compiled program
+    compile_file(source_file, SOURCE, True, 10)
+    assert len(parsed_sources) == 1
+
+
+def test_compiled_program_with_missing_class(source_file, parsed_sources):
+    # A program compiled by an interpreter that had a module this one does not
+    header = json.dumps(program_cache.cache_header(source_file, SOURCE, True, 10)).encode()
+    os.makedirs(os.path.dirname(cache_path(source_file)))
+    with open(cache_path(source_file), "wb") as file:
+        file.write(program_cache.PREFIX.pack(program_cache.MAGIC, program_cache.FORMAT_VERSION, len(header)))
+        file.write(header)
+        file.write(zlib.compress(b"cutils.removed_module\nRemovedClass\n."))
+
+    ast = compile_file(source_file, SOURCE, True, 10)
+    assert len(parsed_sources) == 1
+
+    _, output = evaluate(SOURCE, Environment(), optimize_ast=False, ast=ast)
+    assert output == ["7"]
+
+
+def test_truncated_compiled_program(source_file, parsed_sources):
+    compile_file(source_file, SOURCE, True, 10)
+    with open(cache_path(source_file), "r+b") as file:
+        file.truncate(os.path.getsize(cache_path(source_file)) - 10)
+
+    compile_file(source_file, SOURCE, True, 10)
+    assert len(parsed_sources) == 2
+
+
+def test_ignore_mode(source_file, parsed_sources):
+    compile_file(source_file, SOURCE, True, 10)
+    compile_file(source_file, SOURCE, True, 10, CacheMode.IGNORE)
+    assert len(parsed_sources) == 2
+
+    os.remove(cache_path(source_file))
+    compile_file(source_file, SOURCE, True, 10, CacheMode.IGNORE)
+    assert not os.path.exists(cache_path(source_file))
+
+
+def test_rebuild_mode(source_file, parsed_sources):
+    compile_file(source_file, SOURCE, True, 10)
+    modification_time = os.stat(cache_path(source_file)).st_mtime_ns
+    os.utime(cache_path(source_file), ns=(0, 0))
+
+    compile_file(source_file, SOURCE, True, 10, CacheMode.REBUILD)
+    assert len(parsed_sources) == 2
+    assert os.stat(cache_path(source_file)).st_mtime_ns >= modification_time
+
+    # Only temporary files were renamed into place
+    assert os.listdir(os.path.dirname(cache_path(source_file))) == ["main.bngc"]
+
+
+@pytest.mark.parametrize("source", [
+    "x = ;",
+    "x = 1 + true;",
+])
+def test_errors_are_not_compiled(tmp_path, source):
+    path = tmp_path / "main.bng"
+    path.write_text(source)
+
+    assert compile_file(str(path), source, True, 10) is None
+    assert not os.path.exists(cache_path(str(path)))
+
+
+def test_read_only_directory(source_file, monkeypatch):
+    def fail(*_, **__):
+        raise PermissionError("read-only directory")
+
+    monkeypatch.setattr(program_cache.os, "makedirs", fail)
+
+    ast = compile_file(source_file, SOURCE, True, 10)
+    _, output = evaluate(SOURCE, Environment(), optimize_ast=False, ast=ast)
+    assert output == ["7"]
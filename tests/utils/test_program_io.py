@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+from interpreter.evaluator.environment_ import Environment
+from main_utils import evaluate
+from utils.program_io import OutputSink, ProgramIO, TRUNCATION_MARKER
+
+
+def test_output_sink_collects_lines():
+    sink = OutputSink()
+    sink.write("a")
+    sink.write("b")
+    assert sink.lines == ["a", "b"]
+    assert not sink.is_truncated
+
+
+@pytest.mark.parametrize("max_bytes, expected_lines", [
+    # Each line takes its length plus a newline
+    (4, ["a", TRUNCATION_MARKER]),
+    (5, ["a", "bb", TRUNCATION_MARKER]),
+    (9, ["a", "bb", "ccc", TRUNCATION_MARKER]),
+    (14, ["a", "bb", "ccc", "dddd"]),
+    (0, [TRUNCATION_MARKER]),
+])
+def test_output_sink_max_bytes(max_bytes, expected_lines):
+    sink = OutputSink(max_bytes)
+    for line in ["a", "bb", "ccc", "dddd"]:
+        sink.write(line)
+
+    assert sink.lines == expected_lines
+    assert sink.is_truncated == (expected_lines[-1] == TRUNCATION_MARKER)
+
+
+def test_output_sink_counts_encoded_bytes():
+    sink = OutputSink(4)
+    sink.write("é")
+    sink.write("é")
+    assert sink.lines == ["é", TRUNCATION_MARKER]
+
+
+def test_output_sink_errors_are_not_truncated():
+    sink = OutputSink(2, truncation_marker="...")
+    sink.write("a")
+    sink.write("b")
+    sink.write_error("Error at line 1: error")
+    assert sink.lines == ["a", "...", "Error at line 1: error"]
+
+
+def test_output_sink_streams_lines():
+    streamed = []
+    sink = OutputSink(4, on_line=streamed.append)
+    for line in ["a", "b", "c"]:
+        sink.write(line)
+        assert streamed == sink.lines
+
+    assert streamed == ["a", "b", TRUNCATION_MARKER]
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_program_output_is_bounded(native):
+    streamed = []
+    sink = OutputSink(100, on_line=streamed.append)
+    source = "for i in range <- (0, 1000): print <- (i,);\nx = 1 / 0;"
+
+    _, actual_output = evaluate(source, Environment(), native=native, program_io=ProgramIO(sink=sink))
+
+    expected_lines = [str(i) for i in range(36)] + [TRUNCATION_MARKER, "Error at line 2: cannot divide by zero"]
+    assert actual_output == expected_lines
+    assert streamed == expected_lines
+
+
+def test_program_io_prints_to_stdout():
+    stdout = io.StringIO()
+    program_io = ProgramIO(stdout=stdout)
+    program_io.print("a")
+    program_io.print("")
+    assert stdout.getvalue() == "a\n\n"
+    assert program_io.output == []
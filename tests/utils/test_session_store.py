@@ -0,0 +1,169 @@
+import time
+
+import pytest
+from flask import Flask, session
+
+from utils import session_store as session_store_module
+from utils.session_store import FileSessionStore, SessionStore, SQLiteSessionStore, ServerSideSessionInterface
+
+
+@pytest.fixture(params=["sqlite", "filesystem"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), 60)
+    return FileSessionStore(str(tmp_path / "sessions"), 60)
+
+
+def test_put_and_get(store):
+    assert store.get("a") is None
+
+    store.put("a", b"data")
+    store.put("b", b"other data")
+    assert store.get("a") == b"data"
+    assert store.get("b") == b"other data"
+
+    store.put("a", b"new data")
+    assert store.get("a") == b"new data"
+
+
+def test_delete(store):
+    store.put("a", b"data")
+    store.delete("a")
+    store.delete("a")
+    assert store.get("a") is None
+
+
+def test_expired_sessions(store, monkeypatch):
+    store.put("a", b"data")
+
+    later = time.time() + 120
+    monkeypatch.setattr(session_store_module.time, "time", lambda: later)
+    assert store.get("a") is None
+
+    # Saving a session evicts expired sessions once the eviction interval has passed
+    store.put("b", b"data")
+    monkeypatch.setattr(session_store_module.time, "time", lambda: 0.0)
+    assert store.get("a") is None
+    assert store.get("b") == b"data"
+
+
+def test_data_is_compressed(store):
+    data = b"print <- (1,);" * 1000
+    store.put("a", data)
+    assert store.get("a") == data
+
+    if isinstance(store, SQLiteSessionStore):
+        stored_size = store.connection().execute("SELECT length(data) FROM sessions").fetchone()[0]
+    else:
+        stored_size = len(open(store.path("a"), "rb").read())
+    assert stored_size < len(data) / 10
+
+
+def test_incomplete_store():
+    class IncompleteStore(SessionStore):
+        def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        IncompleteStore(60)
+
+
+@pytest.fixture
+def app(store):
+    flask_app = Flask(__name__)
+    flask_app.secret_key = "test_secret_key"
+    flask_app.session_interface = ServerSideSessionInterface(lambda: store)
+
+    @flask_app.route("/set/<value>")
+    def set_value(value):
+        session["value"] = value
+        return ""
+
+    @flask_app.route("/get")
+    def get_value():
+        return session.get("value", "")
+
+    @flask_app.route("/clear")
+    def clear():
+        session.clear()
+        return ""
+
+    return flask_app
+
+
+def session_cookie(client):
+    cookie = client.get_cookie("session")
+    return None if cookie is None else cookie.value
+
+
+def test_session_interface(app, store):
+    client = app.test_client()
+    value = "x" * 100_000
+
+    client.get(f"/set/{value}")
+    session_id = session_cookie(client)
+
+    # Only the session ID is in the cookie
+    assert len(session_id) == 43
+    assert client.get("/get").text == value
+
+    # The session ID does not change while the session lasts
+    client.get("/set/y")
+    assert session_cookie(client) == session_id
+    assert client.get("/get").text == "y"
+
+    client.get("/clear")
+    assert session_cookie(client) is None
+    assert store.get(session_id) is None
+
+
+def test_sessions_are_isolated(app):
+    first_client = app.test_client()
+    second_client = app.test_client()
+
+    first_client.get("/set/a")
+    second_client.get("/set/b")
+
+    assert session_cookie(first_client) != session_cookie(second_client)
+    assert first_client.get("/get").text == "a"
+    assert second_client.get("/get").text == "b"
+
+
+@pytest.mark.parametrize("session_id", [
+    # Unknown
+    "a" * 43,
+    # Not a session ID
+    "../../etc/passwd",
+    "",
+])
+def test_invalid_session_ids(app, session_id):
+    client = app.test_client()
+    client.set_cookie("session", session_id)
+    assert client.get("/get").text == ""
+
+    # A new session gets a new ID
+    client.get("/set/a")
+    assert session_cookie(client) != session_id
+    assert client.get("/get").text == "a"
+
+
+def test_unmodified_sessions_are_not_saved(app, store):
+    client = app.test_client()
+    client.get("/get")
+    assert session_cookie(client) is None
+
+
+def test_store_is_created_when_first_used(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    flask_app = Flask(__name__)
+    flask_app.secret_key = "test_secret_key"
+    flask_app.session_interface = ServerSideSessionInterface(lambda: SQLiteSessionStore(str(path), 60))
+
+    @flask_app.route("/set/<value>")
+    def set_value(value):
+        session["value"] = value
+        return ""
+
+    assert not path.exists()
+    flask_app.test_client().get("/set/a")
+    assert path.exists()
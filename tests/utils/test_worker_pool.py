@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.worker_pool import WorkerError, WorkerPool, WorkerTimeoutError
+
+
+def add(a, b):
+    return a + b
+
+
+def process_id():
+    return os.getpid()
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def fail():
+    raise ValueError("job failed")
+
+
+def crash():
+    os._exit(1)
+
+
+def large_result(size):
+    return "a" * size
+
+
+def allocate(size):
+    return len(bytearray(size))
+
+
+@pytest.fixture
+def pool():
+    worker_pool = WorkerPool(2, 2, 10_000, 512 * 1024 * 1024)
+    yield worker_pool
+    worker_pool.shutdown()
+
+
+def test_run(pool):
+    assert pool.run(add, 1, 2) == 3
+    assert pool.run(add, "a", "b") == "ab"
+    assert pool.run(process_id) != os.getpid()
+    assert pool.stats() == {"workers": 2, "idle": 2, "restarts": 0}
+
+
+def test_workers_are_reused(pool):
+    process_ids = {pool.run(process_id) for _ in range(10)}
+    assert len(process_ids) <= 2
+
+
+def test_timeout(pool, monkeypatch):
+    monkeypatch.setattr(pool, "timeout", 0.2)
+    with pytest.raises(WorkerTimeoutError, match="job exceeded the time limit of 0.2 seconds"):
+        pool.run(sleep, 60)
+
+    # The worker was killed and replaced
+    assert pool.stats() == {"workers": 2, "idle": 2, "restarts": 1}
+
+    # A new worker imports the job's module before running it, which can take longer than 0.2 seconds
+    monkeypatch.setattr(pool, "timeout", 2)
+    assert pool.run(sleep, 0) == 0
+
+
+def test_job_error(pool):
+    with pytest.raises(WorkerError, match="ValueError: job failed"):
+        pool.run(fail)
+
+    # The worker is still usable
+    assert pool.stats()["restarts"] == 0
+    assert pool.run(add, 1, 2) == 3
+
+
+def test_worker_crash(pool):
+    with pytest.raises(WorkerError, match="worker stopped unexpectedly"):
+        pool.run(crash)
+
+    assert pool.stats() == {"workers": 2, "idle": 2, "restarts": 1}
+    assert pool.run(add, 1, 2) == 3
+
+
+def test_result_size_limit(pool):
+    assert pool.run(large_result, 1000) == "a" * 1000
+    with pytest.raises(WorkerError, match="exceeded the limit of 10000 bytes"):
+        pool.run(large_result, 100_000)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="address space is only limited on Unix")
+def test_memory_limit(pool):
+    with pytest.raises(WorkerError, match="worker ran out of memory"):
+        pool.run(allocate, 1024 * 1024 * 1024)
+    assert pool.run(allocate, 1024) == 1024
+
+
+def test_concurrent_jobs(pool):
+    # Jobs wait for an idle worker, and a slow job does not hold up jobs in other workers
+    slow_job_started = threading.Event()
+
+    def run_slow_job():
+        slow_job_started.set()
+        return pool.run(sleep, 0.5)
+
+    with ThreadPoolExecutor(8) as executor:
+        slow_future = executor.submit(run_slow_job)
+        slow_job_started.wait()
+        futures = [executor.submit(pool.run, add, i, 1) for i in range(20)]
+        assert [future.result() for future in futures] == list(range(1, 21))
+        assert slow_future.result() == 0.5
+
+
+def test_shutdown_with_waiting_jobs():
+    pool = WorkerPool(1, 5, 10_000)
+    try:
+        with ThreadPoolExecutor(2) as executor:
+            running_future = executor.submit(pool.run, sleep, 60)
+            while pool.stats()["idle"] > 0 or pool.stats()["workers"] == 0:
+                time.sleep(0.01)
+            waiting_future = executor.submit(pool.run, add, 1, 2)
+
+            pool.shutdown()
+
+            # The running job is stopped, and the waiting job runs in a new worker
+            with pytest.raises(WorkerError, match="worker stopped unexpectedly"):
+                running_future.result(timeout=5)
+            assert waiting_future.result(timeout=5) == 3
+
+        assert pool.run(add, 2, 3) == 5
+        assert pool.stats()["workers"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError, match="size must be greater than or equal to 1, got 0"):
+        WorkerPool(0, 1, 1)
@@ -0,0 +1,166 @@
+import asyncio
+import io
+import sys
+import typing
+from concurrent.futures import Executor
+
+# Types from the ASGI specification (https://asgi.readthedocs.io/en/latest/specs/main.html)
+Scope = dict[str, typing.Any]
+Message = dict[str, typing.Any]
+Receive = typing.Callable[[], typing.Awaitable[Message]]
+Send = typing.Callable[[Message], typing.Awaitable[None]]
+
+# A WSGI application (see PEP 3333)
+WSGIApp = typing.Callable[[dict[str, typing.Any], typing.Callable[..., typing.Any]], typing.Iterable[bytes]]
+
+
+class RequestBodyTooLarge(Exception):
+    pass
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class AsyncWSGIApp:
+    """An ASGI application that handles each request with a WSGI application, in a thread from one of several executors.
+
+    Connections are handled by the event loop, so any number of them can wait for a request or a response without
+    holding a thread. Requests only take a thread while "wsgi_app" handles them. Requests for a path in "executors" are
+    handled in that path's executor, and every other request in "default_executor", so slow requests (like evaluating
+    or rendering a program) only ever wait for each other, and never hold up the threads that serve pages.
+
+    Request bodies larger than "max_body_bytes" are rejected with status 413. Requests whose client disconnects before
+    sending the whole body are not handled at all.
+    """
+
+    def __init__(
+            self,
+            wsgi_app: WSGIApp,
+            default_executor: Executor,
+            executors: typing.Optional[dict[str, Executor]] = None,
+            max_body_bytes: typing.Optional[int] = None
+    ) -> None:
+        self.wsgi_app = wsgi_app
+        self.default_executor = default_executor
+        self.executors = executors or {}
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f"unsupported ASGI scope type: {scope['type']}")
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for executor in [self.default_executor, *self.executors.values()]:
+                    executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            body = await self.read_body(receive)
+        except RequestBodyTooLarge:
+            await send_response(send, 413, [(b"content-type", b"text/plain")], [b"Request body too large"])
+            return
+        except ClientDisconnected:
+            # Nobody is waiting for the response, and the program in a partial body is not worth a thread
+            return
+
+        executor = self.executors.get(scope["path"], self.default_executor)
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(executor, self.call_wsgi_app, wsgi_environ(scope, body))
+        await send_response(send, status, headers, chunks)
+
+    async def read_body(self, receive: Receive) -> bytes:
+        """Return the body of the request. Raises a RequestBodyTooLarge if it is larger than "max_body_bytes", and a
+        ClientDisconnected if the client disconnects before sending all of it.
+        """
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnected()
+
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if self.max_body_bytes is not None and size > self.max_body_bytes:
+                raise RequestBodyTooLarge()
+
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    def call_wsgi_app(self, environ: dict[str, typing.Any]) -> tuple[int, list[tuple[bytes, bytes]], list[bytes]]:
+        """Handle a request with "wsgi_app", and return the status, headers, and body of the response."""
+        response: list[typing.Any] = []
+
+        def start_response(status: str, headers: list[tuple[str, str]], exc_info: typing.Any = None) -> None:
+            response[:] = [status, headers]
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+
+        status, headers = response
+        encoded_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        return int(status.split(" ", 1)[0]), encoded_headers, chunks
+
+
+async def send_response(send: Send, status: int, headers: list[tuple[bytes, bytes]], chunks: list[bytes]) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+
+def wsgi_environ(scope: Scope, body: bytes) -> dict[str, typing.Any]:
+    """Convert an ASGI HTTP scope into a WSGI environment (see PEP 3333)."""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ: dict[str, typing.Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+    client = scope.get("client")
+    if client is not None:
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = client[0], str(client[1])
+
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+
+        # Repeated headers are joined, like a WSGI server does
+        value = value.decode("latin-1")
+        if key in environ and key.startswith("HTTP_"):
+            separator = "; " if key == "HTTP_COOKIE" else ","
+            value = f"{environ[key]}{separator}{value}"
+        environ[key] = value
+
+    return environ
@@ -40,6 +40,25 @@ class ASTVisualizer:
                 self.add_edge(node_id, value)
                 self.__visualize(value)
 
+        elif isinstance(expression, SetLiteral):
+            self.add_node(node_id, "Set")
+            for value in expression.values:
+                self.add_edge(node_id, value)
+                self.__visualize(value)
+
+        elif isinstance(expression, MapLiteral):
+            self.add_node(node_id, "Map")
+            for i, (key, value) in enumerate(expression.pairs):
+                pair_node_id = f"{node_id}_pair_{i}"
+                self.add_node(pair_node_id, ":")
+                self.add_edge(node_id, pair_node_id)
+
+                self.add_edge(pair_node_id, key)
+                self.__visualize(key)
+
+                self.add_edge(pair_node_id, value)
+                self.__visualize(value)
+
         elif isinstance(expression, InfixExpression):
             self.add_node(node_id, expression.operator.value)
 
@@ -0,0 +1,85 @@
+import typing
+from collections import OrderedDict
+
+K = typing.TypeVar("K")
+V = typing.TypeVar("V")
+
+
+class LRUCache(typing.Generic[K, V]):
+    """A bounded mapping that evicts the least-recently-used entry once it holds more than "max_size" entries.
+
+    Hits and misses are counted so callers can report how effective the cache is. A "max_size" of 0 disables the
+    cache: nothing is stored and every lookup is a miss.
+
+    If "max_bytes" is set, least-recently-used entries are also evicted once the sizes of all entries, as measured by
+    "size_of", add up to more than "max_bytes". An entry larger than "max_bytes" is never stored.
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            max_bytes: typing.Optional[int] = None,
+            size_of: typing.Optional[typing.Callable[[V], int]] = None
+    ) -> None:
+        if max_size < 0:
+            raise ValueError(f"max_size must be greater than or equal to 0, got {max_size}")
+        if max_bytes is not None and size_of is None:
+            raise ValueError("size_of is required when max_bytes is set")
+
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.entries: OrderedDict[K, V] = OrderedDict()
+
+        # Sizes of the entries, and their total, if "size_of" is set
+        self.sizes: dict[K, int] = {}
+        self.byte_count = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.entries
+
+    def get(self, key: K) -> typing.Optional[V]:
+        value = self.entries.get(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+
+        # Mark the entry as the most recently used so it is the last to be evicted
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        if self.max_size == 0:
+            return
+
+        if self.size_of is not None:
+            size = self.size_of(value)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self.byte_count += size - self.sizes.get(key, 0)
+            self.sizes[key] = size
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size or (self.max_bytes is not None and self.byte_count > self.max_bytes):
+            evicted_key, _ = self.entries.popitem(last=False)
+            self.byte_count -= self.sizes.pop(evicted_key, 0)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.sizes.clear()
+        self.byte_count = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
@@ -0,0 +1,258 @@
+"""A persistent (immutable) hash map.
+
+The map is a hash array mapped trie (HAMT). Inserting or removing a key returns a new map that shares all but
+O(log n) of its nodes with the original, so neither operation copies the whole map. Lookups take O(log32 n) steps,
+which is effectively constant.
+
+Iteration follows insertion order (like a Python dict) so that printing a map always gives the same result,
+regardless of how its keys happen to hash.
+"""
+import typing
+
+K = typing.TypeVar("K", bound=typing.Hashable)
+V = typing.TypeVar("V")
+
+# Each level of the trie consumes this many bits of a key's hash
+BITS_PER_LEVEL = 5
+BRANCH_MASK = (1 << BITS_PER_LEVEL) - 1
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value", "order")
+
+    def __init__(self, hash_: int, key: typing.Any, value: typing.Any, order: int) -> None:
+        self.hash = hash_
+        self.key = key
+        self.value = value
+
+        # Insertion position, used to iterate in insertion order
+        self.order = order
+
+
+class _Collision:
+    """Leaves whose keys have the same hash value."""
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash_: int, leaves: tuple[_Leaf, ...]) -> None:
+        self.hash = hash_
+        self.leaves = leaves
+
+
+class _Branch:
+    """An interior node. Bit i of "bitmap" is set if the node has a child for the i-th 5-bit slice of a hash; the
+    children are stored densely in "children" in bit order.
+    """
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap: int, children: tuple[typing.Any, ...]) -> None:
+        self.bitmap = bitmap
+        self.children = children
+
+
+_Node = typing.Union[_Leaf, _Collision, _Branch]
+
+_EMPTY_BRANCH = _Branch(0, ())
+
+
+def _position(bitmap: int, bit: int) -> int:
+    return (bitmap & (bit - 1)).bit_count()
+
+
+def _merge_leaves(shift: int, first: _Leaf, second: _Leaf) -> _Node:
+    """Create the smallest subtree that holds two leaves with different keys."""
+    if shift >= HASH_BITS or first.hash == second.hash:
+        return _Collision(first.hash, (first, second))
+
+    first_bit = 1 << ((first.hash >> shift) & BRANCH_MASK)
+    second_bit = 1 << ((second.hash >> shift) & BRANCH_MASK)
+
+    if first_bit == second_bit:
+        return _Branch(first_bit, (_merge_leaves(shift + BITS_PER_LEVEL, first, second),))
+
+    children = (first, second) if first_bit < second_bit else (second, first)
+    return _Branch(first_bit | second_bit, children)
+
+
+def _find(node: _Node, shift: int, hash_: int, key: typing.Any) -> typing.Optional[_Leaf]:
+    while True:
+        if isinstance(node, _Branch):
+            bit = 1 << ((hash_ >> shift) & BRANCH_MASK)
+            if not node.bitmap & bit:
+                return None
+            node = node.children[_position(node.bitmap, bit)]
+            shift += BITS_PER_LEVEL
+
+        elif isinstance(node, _Leaf):
+            return node if node.hash == hash_ and node.key == key else None
+
+        else:
+            if node.hash != hash_:
+                return None
+            for leaf in node.leaves:
+                if leaf.key == key:
+                    return leaf
+            return None
+
+
+def _assoc(node: _Node, shift: int, leaf: _Leaf) -> tuple[_Node, typing.Optional[_Leaf]]:
+    """Return a copy of "node" with "leaf" added, along with the leaf it replaced (if any)."""
+    if isinstance(node, _Branch):
+        bit = 1 << ((leaf.hash >> shift) & BRANCH_MASK)
+        index = _position(node.bitmap, bit)
+
+        if not node.bitmap & bit:
+            children = node.children[:index] + (leaf,) + node.children[index:]
+            return _Branch(node.bitmap | bit, children), None
+
+        child, replaced = _assoc(node.children[index], shift + BITS_PER_LEVEL, leaf)
+        children = node.children[:index] + (child,) + node.children[index + 1:]
+        return _Branch(node.bitmap, children), replaced
+
+    elif isinstance(node, _Leaf):
+        if node.hash == leaf.hash and node.key == leaf.key:
+            return leaf, node
+        return _merge_leaves(shift, node, leaf), None
+
+    if node.hash != leaf.hash:
+        # Push the collision node down a level next to the new leaf
+        collision_bit = 1 << ((node.hash >> shift) & BRANCH_MASK)
+        branch = _Branch(collision_bit, (node,))
+        return _assoc(branch, shift, leaf)
+
+    for i, existing in enumerate(node.leaves):
+        if existing.key == leaf.key:
+            return _Collision(node.hash, node.leaves[:i] + (leaf,) + node.leaves[i + 1:]), existing
+    return _Collision(node.hash, node.leaves + (leaf,)), None
+
+
+def _dissoc(node: _Node, shift: int, hash_: int, key: typing.Any) -> tuple[typing.Optional[_Node], bool]:
+    """Return a copy of "node" without "key" (None if the node becomes empty), along with whether the key existed."""
+    if isinstance(node, _Branch):
+        bit = 1 << ((hash_ >> shift) & BRANCH_MASK)
+        if not node.bitmap & bit:
+            return node, False
+
+        index = _position(node.bitmap, bit)
+        child, removed = _dissoc(node.children[index], shift + BITS_PER_LEVEL, hash_, key)
+        if not removed:
+            return node, False
+
+        if child is None:
+            if node.bitmap == bit:
+                return None, True
+            children = node.children[:index] + node.children[index + 1:]
+            remaining = _Branch(node.bitmap & ~bit, children)
+
+            # A branch holding a single leaf can be replaced by the leaf itself
+            if len(children) == 1 and not isinstance(children[0], _Branch):
+                return children[0], True
+            return remaining, True
+
+        if len(node.children) == 1 and not isinstance(child, _Branch):
+            return child, True
+        return _Branch(node.bitmap, node.children[:index] + (child,) + node.children[index + 1:]), True
+
+    elif isinstance(node, _Leaf):
+        if node.hash == hash_ and node.key == key:
+            return None, True
+        return node, False
+
+    if node.hash != hash_:
+        return node, False
+
+    leaves = tuple(leaf for leaf in node.leaves if leaf.key != key)
+    if len(leaves) == len(node.leaves):
+        return node, False
+    if len(leaves) == 1:
+        return leaves[0], True
+    return _Collision(node.hash, leaves), True
+
+
+def _leaves(node: typing.Optional[_Node]) -> typing.Iterator[_Leaf]:
+    if node is None:
+        return
+    elif isinstance(node, _Leaf):
+        yield node
+    elif isinstance(node, _Collision):
+        yield from node.leaves
+    else:
+        for child in node.children:
+            yield from _leaves(child)
+
+
+class PersistentMap(typing.Generic[K, V]):
+    def __init__(self) -> None:
+        self.root: typing.Optional[_Node] = None
+        self.size = 0
+
+        # Order assigned to the next inserted key
+        self.next_order = 0
+
+    @classmethod
+    def from_items(cls, items: typing.Iterable[tuple[K, V]]) -> "PersistentMap[K, V]":
+        new_map: PersistentMap[K, V] = cls()
+        for key, value in items:
+            new_map = new_map.set(key, value)
+        return new_map
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: K) -> bool:
+        return self.find(key) is not None
+
+    def __iter__(self) -> typing.Iterator[K]:
+        return iter(self.keys())
+
+    def find(self, key: K) -> typing.Optional[_Leaf]:
+        if self.root is None:
+            return None
+        return _find(self.root, 0, hash(key) & HASH_MASK, key)
+
+    def get(self, key: K, default: typing.Optional[V] = None) -> typing.Optional[V]:
+        leaf = self.find(key)
+        return default if leaf is None else typing.cast(V, leaf.value)
+
+    def set(self, key: K, value: V) -> "PersistentMap[K, V]":
+        """Return a new map where "key" is mapped to "value". A key that is already in the map keeps its position in
+        the iteration order.
+        """
+        hash_ = hash(key) & HASH_MASK
+        existing = self.find(key)
+        order = self.next_order if existing is None else existing.order
+        leaf = _Leaf(hash_, key, value, order)
+
+        if self.root is None:
+            new_root: _Node = leaf
+        else:
+            new_root, _ = _assoc(self.root, 0, leaf)
+
+        return self.__with_root(new_root, self.size + (existing is None), self.next_order + (existing is None))
+
+    def remove(self, key: K) -> "PersistentMap[K, V]":
+        if self.root is None:
+            return self
+
+        new_root, removed = _dissoc(self.root, 0, hash(key) & HASH_MASK, key)
+        if not removed:
+            return self
+        return self.__with_root(new_root, self.size - 1, self.next_order)
+
+    def items(self) -> list[tuple[K, V]]:
+        leaves = sorted(_leaves(self.root), key=lambda leaf: leaf.order)
+        return [(leaf.key, leaf.value) for leaf in leaves]
+
+    def keys(self) -> list[K]:
+        return [key for key, _ in self.items()]
+
+    def values(self) -> list[V]:
+        return [value for _, value in self.items()]
+
+    def __with_root(self, root: typing.Optional[_Node], size: int, next_order: int) -> "PersistentMap[K, V]":
+        new_map: PersistentMap[K, V] = PersistentMap()
+        new_map.root = root
+        new_map.size = size
+        new_map.next_order = next_order
+        return new_map
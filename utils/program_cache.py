@@ -0,0 +1,150 @@
+import enum
+import hashlib
+import json
+import logging
+import os
+import pickle
+import struct
+import tempfile
+import typing
+import zlib
+
+from interpreter.optimizer.optimizer import optimize
+from interpreter.parser_.ast_objects import Expression
+from interpreter.version import interpreter_version
+from main_utils import parse
+from utils.utils import LanguageRuntimeException
+
+logger = logging.getLogger(__name__)
+
+# Compiled programs are stored in this directory, next to their source files, with this suffix
+CACHE_DIRECTORY = "__bngcache__"
+CACHE_SUFFIX = ".bngc"
+
+# Every compiled program starts with "MAGIC", the version of the file format, and the length of the header
+MAGIC = b"BNGC"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct(">4sBI")
+
+# Permissions of compiled programs. Temporary files are only readable by their owner.
+FILE_MODE = 0o644
+
+
+class CacheMode(enum.Enum):
+    # Load compiled programs, and save programs that were not already compiled
+    USE = "use"
+    # Always compile programs, and do not save them
+    IGNORE = "ignore"
+    # Always compile programs, and save them
+    REBUILD = "rebuild"
+
+
+def compile_file(
+        path: str,
+        source: str,
+        optimize_ast: bool,
+        max_inline_size: int,
+        mode: CacheMode = CacheMode.USE
+) -> typing.Optional[list[Expression]]:
+    """Parse and optimize "source", the contents of the file at "path", like Python's "__pycache__".
+
+    The compiled program is saved in "CACHE_DIRECTORY" and loaded by later calls, so those do not tokenize, parse, or
+    optimize the file again. A compiled program is only loaded if the file has the same modification time, size, and
+    hash as when it was saved, and it was compiled by the same interpreter (see "interpreter_version") with the same
+    options.
+
+    Returns None if the program has a syntax error or the optimizer found a type error, so "evaluate" can report it.
+    Failing to save the compiled program (e.g., in a read-only directory) is not an error.
+    """
+    header = cache_header(path, source, optimize_ast, max_inline_size)
+    compiled_path = cache_path(path)
+
+    if mode == CacheMode.USE:
+        ast = load(compiled_path, header)
+        if ast is not None:
+            return ast
+
+    try:
+        ast = parse(source)
+        if optimize_ast:
+            ast = optimize(ast, max_inline_size)
+    except LanguageRuntimeException:
+        return None
+
+    if mode != CacheMode.IGNORE:
+        save(compiled_path, header, ast)
+    return ast
+
+
+def cache_path(path: str) -> str:
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIRECTORY, os.path.splitext(name)[0] + CACHE_SUFFIX)
+
+
+def cache_header(path: str, source: str, optimize_ast: bool, max_inline_size: int) -> dict[str, typing.Any]:
+    """Everything a compiled program depends on. A compiled program is only loaded if its header is equal to this."""
+    stat = os.stat(path)
+    return {
+        "interpreter": interpreter_version(),
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "hash": hashlib.sha256(source.encode()).hexdigest(),
+        "optimize": optimize_ast,
+        "max_inline_size": max_inline_size,
+    }
+
+
+def load(compiled_path: str, header: dict[str, typing.Any]) -> typing.Optional[list[Expression]]:
+    """Return the program saved at "compiled_path", or None if it does not exist, is out of date, or is corrupt."""
+    try:
+        with open(compiled_path, "rb") as file:
+            magic, format_version, header_length = PREFIX.unpack(file.read(PREFIX.size))
+            if magic != MAGIC or format_version != FORMAT_VERSION:
+                return None
+
+            if json.loads(file.read(header_length)) != header:
+                logger.debug(f"{compiled_path} is out of date")
+                return None
+
+            body = zlib.decompress(file.read())
+    except (OSError, ValueError, EOFError, struct.error, zlib.error) as e:
+        logger.debug(f"cannot load {compiled_path}: {e}")
+        return None
+
+    try:
+        ast: list[Expression] = pickle.loads(body)
+    except Exception as e:
+        # Besides corrupt data, unpickling fails in many ways if a class the program refers to has changed or moved
+        logger.debug(f"cannot load {compiled_path}: {e}")
+        return None
+
+    logger.debug(f"loaded {compiled_path}")
+    return ast
+
+
+def save(compiled_path: str, header: dict[str, typing.Any], ast: list[Expression]) -> None:
+    """Save "ast" at "compiled_path". The file is written under a temporary name and then renamed, so other processes
+    never load a partly written program.
+    """
+    try:
+        body = zlib.compress(pickle.dumps(ast, pickle.HIGHEST_PROTOCOL))
+    except (RecursionError, pickle.PicklingError) as e:
+        logger.debug(f"cannot compile {compiled_path}: {e}")
+        return
+
+    encoded_header = json.dumps(header).encode()
+    directory = os.path.dirname(compiled_path)
+    temporary_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False) as file:
+            temporary_path = file.name
+            file.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(encoded_header)))
+            file.write(encoded_header)
+            file.write(body)
+        os.chmod(temporary_path, FILE_MODE)
+        os.replace(temporary_path, compiled_path)
+    except OSError as e:
+        logger.debug(f"cannot save {compiled_path}: {e}")
+        if temporary_path is not None and os.path.exists(temporary_path):
+            os.remove(temporary_path)
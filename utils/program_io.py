@@ -0,0 +1,100 @@
+import typing
+
+from utils.utils import Platform
+
+TRUNCATION_MARKER = "... (output truncated)"
+
+
+class OutputSink:
+    """Collects the lines a program prints, and the errors that stop it, in "lines".
+
+    If "max_bytes" is set, printed lines stop being collected once they would take up more than that many bytes
+    (encoded as UTF-8, with a newline after each line), and "truncation_marker" is added in their place. Errors are
+    always collected, so the reason a program stopped is never cut off. If "on_line" is set, it is called with each
+    line as soon as it is collected, so output can be streamed to a consumer while the program is still running.
+    """
+
+    def __init__(
+            self,
+            max_bytes: typing.Optional[int] = None,
+            truncation_marker: str = TRUNCATION_MARKER,
+            on_line: typing.Optional[typing.Callable[[str], None]] = None
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.truncation_marker = truncation_marker
+        self.on_line = on_line
+
+        self.lines: list[str] = []
+        self.byte_count = 0
+        self.is_truncated = False
+
+    def write(self, line: str) -> None:
+        if self.is_truncated:
+            return
+
+        if self.max_bytes is not None:
+            self.byte_count += len(line.encode()) + 1
+            if self.byte_count > self.max_bytes:
+                self.is_truncated = True
+                line = self.truncation_marker
+
+        self.add(line)
+
+    def write_error(self, line: str) -> None:
+        self.add(line)
+
+    def add(self, line: str) -> None:
+        self.lines.append(line)
+        if self.on_line is not None:
+            self.on_line(line)
+
+
+class ProgramIO:
+    """The platform a program runs on, and the streams its builtins read input from and write output to.
+
+    Each evaluator has its own, so programs evaluated at the same time in different threads of one process (like the
+    requests of the web app) never see each other's input or output. If "stdout" is None, lines the program prints are
+    written to "sink" instead, which is how the web app and the tests read them. If "stdin" is None, "input" reads
+    from the process's standard input.
+    """
+
+    def __init__(
+            self,
+            platform: str = Platform.CMD.name,
+            stdin: typing.Optional[typing.TextIO] = None,
+            stdout: typing.Optional[typing.TextIO] = None,
+            sink: typing.Optional[OutputSink] = None
+    ) -> None:
+        self.platform = platform
+        self.stdin = stdin
+        self.stdout = stdout
+        self.sink = sink if sink is not None else OutputSink()
+
+    @property
+    def output(self) -> list[str]:
+        return self.sink.lines
+
+    def print(self, text: str) -> None:
+        if self.stdout is not None:
+            self.stdout.write(text + "\n")
+            return
+
+        text = text.strip()
+        if len(text) > 0:
+            self.sink.write(text)
+
+    def error(self, text: str) -> None:
+        self.sink.write_error(text)
+
+    def input(self, prompt: str) -> str:
+        if self.stdin is None:
+            return input(prompt)
+
+        if self.stdout is not None:
+            self.stdout.write(prompt)
+            self.stdout.flush()
+
+        line = self.stdin.readline()
+        if line == "":
+            raise EOFError("EOF when reading a line")
+        return line.removesuffix("\n")
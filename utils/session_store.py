@@ -0,0 +1,235 @@
+import abc
+import os
+import re
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import typing
+import zlib
+
+from flask import Flask, Request, Response
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface, SessionMixin
+
+# Session IDs are random, URL-safe, and can be used as file names
+SESSION_ID_BYTES = 32
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{43}")
+
+# Seconds between removals of expired sessions
+EVICTION_INTERVAL = 60
+
+
+class SessionStore(abc.ABC):
+    """Session data, keyed by session ID. Sessions expire "ttl" seconds after they were last saved.
+
+    Data is stored compressed, as bytes. Expired sessions are never returned, and are removed by "evict_expired",
+    which "put" calls at most once every "EVICTION_INTERVAL" seconds.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.next_eviction = time.time() + EVICTION_INTERVAL
+
+    @abc.abstractmethod
+    def get(self, session_id: str) -> typing.Optional[bytes]:
+        pass
+
+    def put(self, session_id: str, data: bytes) -> None:
+        self.write(session_id, zlib.compress(data), time.time() + self.ttl)
+
+        if time.time() >= self.next_eviction:
+            self.next_eviction = time.time() + EVICTION_INTERVAL
+            self.evict_expired()
+
+    @abc.abstractmethod
+    def write(self, session_id: str, compressed_data: bytes, expires: float) -> None:
+        pass
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def evict_expired(self) -> None:
+        pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite database, which can be shared by many processes."""
+
+    def __init__(self, path: str, ttl: float) -> None:
+        super().__init__(ttl)
+        self.path = path
+
+        # Connections cannot be shared by threads, or by processes forked after they were opened, so each thread opens
+        # its own the first time it needs one
+        self.local = threading.local()
+
+        connection = sqlite3.connect(path, timeout=10)
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions "
+                    "(id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)"
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+        finally:
+            connection.close()
+
+    def connection(self) -> sqlite3.Connection:
+        connection: typing.Optional[sqlite3.Connection] = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            # Readers do not wait for writers, or writers for readers
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    def get(self, session_id: str) -> typing.Optional[bytes]:
+        row = self.connection().execute(
+            "SELECT data FROM sessions WHERE id = ? AND expires > ?", (session_id, time.time())).fetchone()
+        return None if row is None else zlib.decompress(row[0])
+
+    def write(self, session_id: str, compressed_data: bytes, expires: float) -> None:
+        with self.connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)",
+                (session_id, compressed_data, expires)
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self.connection() as connection:
+            connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict_expired(self) -> None:
+        with self.connection() as connection:
+            connection.execute("DELETE FROM sessions WHERE expires <= ?", (time.time(),))
+
+
+class FileSessionStore(SessionStore):
+    """Sessions in files in "directory", one per session. The modification time of each file is set to when its
+    session expires.
+    """
+
+    def __init__(self, directory: str, ttl: float) -> None:
+        super().__init__(ttl)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.session")
+
+    def get(self, session_id: str) -> typing.Optional[bytes]:
+        try:
+            with open(self.path(session_id), "rb") as file:
+                if os.fstat(file.fileno()).st_mtime <= time.time():
+                    return None
+                return zlib.decompress(file.read())
+        except (OSError, zlib.error):
+            return None
+
+    def write(self, session_id: str, compressed_data: bytes, expires: float) -> None:
+        # Written under a temporary name and then renamed, so requests never read a partly written session
+        with tempfile.NamedTemporaryFile("wb", dir=self.directory, suffix=".tmp", delete=False) as file:
+            file.write(compressed_data)
+        try:
+            os.utime(file.name, (expires, expires))
+            os.replace(file.name, self.path(session_id))
+        except OSError:
+            os.remove(file.name)
+            raise
+
+    def delete(self, session_id: str) -> None:
+        try:
+            os.remove(self.path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def evict_expired(self) -> None:
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".session") and entry.stat().st_mtime <= now:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                # Removed by another process
+                pass
+
+
+class ServerSideSession(SecureCookieSession):
+    def __init__(self, session_id: str, initial: typing.Optional[typing.Mapping[str, typing.Any]] = None) -> None:
+        super().__init__(initial)
+        self.session_id = session_id
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keep session data in "store", and only the session ID in the session cookie.
+
+    Session IDs are random, so they cannot be guessed, and a new one is created whenever a session is started. A
+    session is only saved when it is modified, and it is deleted from the store when it is cleared.
+
+    The store is created by "create_store" the first time it is used, not when the app is imported, so importing the
+    app does not create files.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, create_store: typing.Callable[[], SessionStore]) -> None:
+        self.create_store = create_store
+        self.created_store: typing.Optional[SessionStore] = None
+        self.lock = threading.Lock()
+
+    @property
+    def store(self) -> SessionStore:
+        with self.lock:
+            if self.created_store is None:
+                self.created_store = self.create_store()
+            return self.created_store
+
+    def open_session(self, app: Flask, request: Request) -> ServerSideSession:
+        session_id = request.cookies.get(self.get_cookie_name(app), "")
+        if SESSION_ID_PATTERN.fullmatch(session_id):
+            data = self.store.get(session_id)
+            if data is not None:
+                return ServerSideSession(session_id, self.serializer.loads(data.decode()))
+
+        return ServerSideSession(secrets.token_urlsafe(SESSION_ID_BYTES))
+
+    def save_session(self, app: Flask, session: SessionMixin, response: Response) -> None:
+        assert isinstance(session, ServerSideSession)
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.modified:
+                self.store.delete(session.session_id)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure, samesite=samesite,
+                                       httponly=httponly)
+                response.vary.add("Cookie")
+            return
+
+        if not session.modified:
+            return
+
+        self.store.put(session.session_id, self.serializer.dumps(dict(session)).encode())
+        response.set_cookie(
+            name,
+            session.session_id,
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            samesite=samesite
+        )
+        response.vary.add("Cookie")
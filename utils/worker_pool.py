@@ -0,0 +1,215 @@
+import multiprocessing
+import multiprocessing.connection
+import pickle
+import queue
+import threading
+import typing
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the address space of workers is not limited
+    resource = None  # type: ignore
+
+# Kinds of replies workers send
+RESULT = "result"
+ERROR = "error"
+TOO_LARGE = "too large"
+
+# Workers are started from request threads, so they are not forked from the process that starts them: a child forked
+# while another thread holds a lock (e.g., a logging lock or the pool's own) could wait for it forever.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class WorkerError(Exception):
+    """A job did not return a result: it raised an exception, its result was too large, or its worker had to be
+    stopped.
+    """
+
+
+class WorkerTimeoutError(WorkerError):
+    pass
+
+
+class WorkerPool:
+    """Worker processes that run jobs one at a time, so a job that never ends, or takes all of a worker's memory, cannot
+    affect the process that started it or the other jobs.
+
+    A job is a module-level function (so it can be sent to workers) and its arguments. Idle workers wait in a queue, and
+    "run" takes the next one, so at most "size" jobs run at the same time and the rest wait for a worker.
+
+    A job that takes longer than "timeout" seconds is stopped by killing its worker, which is replaced by a new one.
+    Results are pickled, and results that take up more than "max_result_bytes" bytes are not sent back. If "max_memory"
+    is set, the address space of each worker is limited to that many bytes, where the platform supports it.
+
+    Workers are started by "start", or by the first call to "run". They are started with "START_METHOD", so jobs must be
+    importable by a new process.
+    """
+
+    def __init__(
+            self,
+            size: int,
+            timeout: float,
+            max_result_bytes: int,
+            max_memory: typing.Optional[int] = None
+    ) -> None:
+        if size < 1:
+            raise ValueError(f"size must be greater than or equal to 1, got {size}")
+
+        self.size = size
+        self.timeout = timeout
+        self.max_result_bytes = max_result_bytes
+        self.max_memory = max_memory
+        self.context = multiprocessing.get_context(START_METHOD)
+
+        self.idle: queue.Queue[Worker] = queue.Queue()
+        self.workers: set[Worker] = set()
+        self.lock = threading.Lock()
+
+        # Workers that were killed and replaced
+        self.restarts = 0
+
+    def start(self) -> None:
+        with self.lock:
+            while len(self.workers) < self.size:
+                worker = Worker(self.context, self.max_memory)
+                self.workers.add(worker)
+                self.idle.put(worker)
+
+    def run(self, job: typing.Callable[..., typing.Any], *arguments: typing.Any) -> typing.Any:
+        """Return the result of calling "job" with "arguments" in a worker.
+
+        Raises a WorkerTimeoutError if the job takes too long, and a WorkerError if it raises an exception, its result
+        is too large, or its worker stops. Exceptions raised by jobs are not sent back, only their messages, because
+        not all exceptions can be pickled.
+        """
+        if len(self.workers) < self.size:
+            self.start()
+
+        worker = self.take_worker()
+        try:
+            return worker.run(job, arguments, self.timeout, self.max_result_bytes)
+        except WorkerTimeoutError:
+            worker = self.replace(worker)
+            raise
+        except (EOFError, OSError) as e:
+            worker = self.replace(worker)
+            raise WorkerError(f"worker stopped unexpectedly: {e}")
+        finally:
+            self.idle.put(worker)
+
+    def take_worker(self) -> "Worker":
+        """Wait for an idle worker. Workers that were stopped by "shutdown" can still be put back in the queue by jobs
+        that were running at the time, and are replaced here by new workers, up to "size" of them.
+        """
+        while True:
+            worker = self.idle.get()
+            with self.lock:
+                if worker in self.workers:
+                    return worker
+
+                if len(self.workers) < self.size:
+                    new_worker = Worker(self.context, self.max_memory)
+                    self.workers.add(new_worker)
+                    return new_worker
+
+    def replace(self, worker: "Worker") -> "Worker":
+        worker.kill()
+        with self.lock:
+            if worker not in self.workers:
+                # Stopped by "shutdown". "take_worker" replaces it when it is taken from the queue again.
+                return worker
+
+            new_worker = Worker(self.context, self.max_memory)
+            self.workers.discard(worker)
+            self.workers.add(new_worker)
+            self.restarts += 1
+        return new_worker
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {"workers": len(self.workers), "idle": self.idle.qsize(), "restarts": self.restarts}
+
+    def shutdown(self) -> None:
+        """Stop the workers. Jobs that are running are stopped too. New workers are started the next time a job is run.
+
+        The queue of idle workers is emptied rather than replaced, so requests that are waiting for a worker get one of
+        the new workers.
+        """
+        with self.lock:
+            for worker in self.workers:
+                worker.kill()
+            self.workers.clear()
+
+            while True:
+                try:
+                    self.idle.get_nowait()
+                except queue.Empty:
+                    break
+
+
+class Worker:
+    def __init__(self, context: multiprocessing.context.BaseContext, max_memory: typing.Optional[int]) -> None:
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(target=serve, args=(worker_connection, max_memory), daemon=True)
+        self.process.start()
+
+        # Only the worker uses its end of the pipe. Closing it here means "recv" fails if the worker stops.
+        worker_connection.close()
+
+    def run(
+            self,
+            job: typing.Callable[..., typing.Any],
+            arguments: tuple[typing.Any, ...],
+            timeout: float,
+            max_result_bytes: int
+    ) -> typing.Any:
+        self.connection.send((job, arguments, max_result_bytes))
+        if not self.connection.poll(timeout):
+            raise WorkerTimeoutError(f"job exceeded the time limit of {timeout:g} seconds")
+
+        kind, value = pickle.loads(self.connection.recv_bytes())
+        if kind == TOO_LARGE:
+            raise WorkerError(f"result of {value} bytes exceeded the limit of {max_result_bytes} bytes")
+        elif kind == ERROR:
+            raise WorkerError(value)
+        return value
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+def serve(connection: multiprocessing.connection.Connection, max_memory: typing.Optional[int]) -> None:
+    """Run jobs sent by "Worker.run" until the pool closes its end of the pipe, or the process that started the worker
+    stops.
+    """
+    if max_memory is not None and resource is not None:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        if hard_limit != resource.RLIM_INFINITY:
+            max_memory = min(max_memory, hard_limit)
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, hard_limit))
+
+    # Stop when the process that started the worker does, even if something else still holds its end of the pipe
+    parent = multiprocessing.parent_process()
+    while True:
+        ready = multiprocessing.connection.wait([connection] if parent is None else [connection, parent.sentinel])
+        if connection not in ready:
+            return
+
+        try:
+            job, arguments, max_result_bytes = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            reply = pickle.dumps((RESULT, job(*arguments)), pickle.HIGHEST_PROTOCOL)
+        except MemoryError:
+            reply = pickle.dumps((ERROR, "worker ran out of memory"))
+        except Exception as e:
+            reply = pickle.dumps((ERROR, f"{type(e).__name__}: {e}"))
+
+        if len(reply) > max_result_bytes:
+            reply = pickle.dumps((TOO_LARGE, len(reply)))
+        connection.send_bytes(reply)